@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Rewrite-throughput benchmark and golden regression corpus for cleanup-ui-imports.py.
+
+Everything runs offline in temporary directories:
+- The golden check rewrites a small corpus (one file per import shape) against a synthetic
+  UI directory and compares the results with commands/benchmarks/cleanup-ui-imports.golden.json,
+  so performance work cannot silently change what the tool writes.
+- The benchmark copies the project's UI components and tsconfig.json into a temp tree, generates
+  corpora of several sizes and measures files/second (cold and with a warm cache) plus peak memory
+  for both consolidation and de-barrel mode. Each measurement runs in its own process so peak RSS
+  numbers are not polluted by earlier runs.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import importlib.util
+from pathlib import Path
+from argparse import Namespace
+from datetime import datetime
+from typing import Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CLEANUP_SCRIPT = SCRIPT_DIR / "cleanup-ui-imports.py"
+GOLDEN_FILE = SCRIPT_DIR / "benchmarks" / "cleanup-ui-imports.golden.json"
+DEFAULT_SIZES = [100, 1000, 5000]
+MODES = ["consolidate", "debarrel"]
+UI_REL_PATH = Path("src/shared/components/ui")
+
+# ANSI colors for better output
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+CYAN = '\033[96m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+
+# One entry per import shape. "{rel}" is the relative path from a corpus file to the UI directory.
+CASES = {
+    "single_line": """import { Button } from '@/shared/components/ui/button';
+import { Card, CardContent } from '@/shared/components/ui/card';
+
+export function Example() {
+	return <Card><CardContent><Button /></CardContent></Card>;
+}
+""",
+    "multi_line": """import {
+	Card,
+	CardContent,
+} from '@/shared/components/ui/card';
+import { Button } from '@/shared/components/ui/button';
+import { Badge } from '@/shared/components/ui/badge';
+
+export function Example() {
+	return <Card><CardContent><Button /><Badge /></CardContent></Card>;
+}
+""",
+    "type_import": """import type { ButtonProps } from '@/shared/components/ui/button';
+import { Card } from '@/shared/components/ui/card';
+
+export function Example(props: ButtonProps) {
+	return <Card {...props} />;
+}
+""",
+    "aliased": """import { Button as PrimaryButton } from '@/shared/components/ui/button';
+import { Badge } from '@/shared/components/ui/badge';
+
+export function Example() {
+	return <PrimaryButton><Badge /></PrimaryButton>;
+}
+""",
+    "comments_before_imports": """// Dashboard widget
+/* eslint-disable react/no-unknown-property */
+import { Button } from '@/shared/components/ui/button';
+import { Card } from '@/shared/components/ui/card';
+
+export function Example() {
+	return <Card><Button /></Card>;
+}
+""",
+    "relative_paths": """import { Button } from '{rel}/button';
+import { Badge } from '{rel}/badge';
+
+export function Example() {
+	return <Button><Badge /></Button>;
+}
+""",
+    "mixed_with_other_imports": """import { useState } from 'react';
+import { Button } from '@/shared/components/ui/button';
+import { Check } from 'lucide-react';
+import { Card, CardContent } from '@/shared/components/ui/card';
+import { helper } from './helper';
+
+export function Example() {
+	const [open] = useState(false);
+	return <Card><CardContent>{open && <Check />}<Button onClick={helper} /></CardContent></Card>;
+}
+""",
+    "barrel_single_line": """import { Badge, Button, Card } from 'ui';
+
+export function Example() {
+	return <Card><Button /><Badge /></Card>;
+}
+""",
+    "barrel_multi_line_type_and_alias": """import {
+	Button as PrimaryButton,
+	type ButtonProps,
+	CardContent,
+} from 'ui';
+import type { Card } from 'ui';
+
+export function Example(props: ButtonProps) {
+	return <CardContent><PrimaryButton {...props} /></CardContent>;
+}
+""",
+    "no_ui_imports": """import { useState } from 'react';
+
+export function Example() {
+	const [value] = useState(0);
+	return <span>{value}</span>;
+}
+""",
+}
+
+# Minimal, stable UI library used by the golden check (independent of the real components)
+GOLDEN_UI_FILES = {
+    "button.tsx": "export interface ButtonProps {}\nexport function Button(props: ButtonProps) { return null; }\n",
+    "card.tsx": "const Card = () => null;\nconst CardContent = () => null;\nexport { Card, CardContent };\n",
+    "badge.tsx": "export function Badge() { return null; }\n",
+}
+
+def load_cleanup_module():
+    """Import cleanup-ui-imports.py (not importable by name because of the dashes)."""
+    spec = importlib.util.spec_from_file_location("cleanup_ui_imports", CLEANUP_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can unpickle references to its functions
+    sys.modules["cleanup_ui_imports"] = module
+    spec.loader.exec_module(module)
+    module.EVENT_LOG = module.EventLog(console_level=None)
+    module.args = Namespace(root=None, ui_alias=module.DEFAULT_UI_IMPORT_ALIAS)
+    return module
+
+def write_project_skeleton(root: Path, ui_source_dir: Path = None):
+    """Create the files cleanup-ui-imports.py needs to treat `root` as a project."""
+    (root / "next.config.mjs").write_text("export default {};\n")
+    (root / "tsconfig.json").write_text(json.dumps({
+        "compilerOptions": {"paths": {"@/*": ["./src/*"], "ui": [f"./{UI_REL_PATH.as_posix()}/index.ts"]}}
+    }, indent=2))
+    ui_dir = root / UI_REL_PATH
+    if ui_source_dir:
+        shutil.copytree(ui_source_dir, ui_dir)
+        return
+    ui_dir.mkdir(parents=True)
+    for name, content in GOLDEN_UI_FILES.items():
+        (ui_dir / name).write_text(content)
+    exports = "".join(f"export * from './{Path(name).stem}';\n" for name in sorted(GOLDEN_UI_FILES))
+    (ui_dir / "index.ts").write_text("// Auto-generated by script\n" + exports)
+
+def write_corpus(root: Path, corpus_dir: str, size: int) -> List[Path]:
+    """Write `size` files, cycling through the import shapes in CASES."""
+    target = root / "src" / corpus_dir
+    target.mkdir(parents=True, exist_ok=True)
+    rel = os.path.relpath(root / UI_REL_PATH, target)
+    case_items = list(CASES.items())
+    files = []
+    for i in range(size):
+        name, template = case_items[i % len(case_items)]
+        file_path = target / (f"{name}.tsx" if size == len(case_items) else f"{name}-{i}.tsx")
+        file_path.write_text(template.replace("{rel}", rel))
+        files.append(file_path)
+    return files
+
+def run_tool(module, root: Path, corpus_dir: str, mode: str, cache_path: Path = None, jobs: int = 1):
+    """Run the tool's real pipeline (file discovery, barrel handling, rewrites) over the corpus."""
+    barrels = [module.make_barrel(root, module.DEFAULT_UI_IMPORT_ALIAS, UI_REL_PATH)]
+    module.process_files(
+        root,
+        f"src/{corpus_dir}",
+        barrels=barrels,
+        debarrel_mode=(mode == "debarrel"),
+        jobs=jobs,
+        cache_path=cache_path,
+    )
+
+def compute_golden_outputs(module) -> Dict[str, Dict[str, str]]:
+    """Rewrite every case once per mode and return {case: {mode: output}}."""
+    outputs = {name: {} for name in CASES}
+    for mode in MODES:
+        with tempfile.TemporaryDirectory(prefix="cleanup-golden-") as tmp:
+            root = Path(tmp).resolve()
+            write_project_skeleton(root)
+            write_corpus(root, "golden", len(CASES))
+            run_tool(module, root, "golden", mode)
+            for name in CASES:
+                outputs[name][mode] = (root / "src" / "golden" / f"{name}.tsx").read_text()
+    return outputs
+
+def check_golden(module, update: bool) -> bool:
+    """Compare rewrite results with the golden file (or rewrite it with --update-golden)."""
+    outputs = compute_golden_outputs(module)
+    if update:
+        GOLDEN_FILE.parent.mkdir(parents=True, exist_ok=True)
+        GOLDEN_FILE.write_text(json.dumps(outputs, indent=2, sort_keys=True) + "\n")
+        print(f"{GREEN}Golden outputs written to {GOLDEN_FILE}{RESET}")
+        return True
+
+    if not GOLDEN_FILE.exists():
+        print(f"{RED}Golden file {GOLDEN_FILE} not found. Run with --update-golden first.{RESET}")
+        return False
+
+    expected = json.loads(GOLDEN_FILE.read_text())
+    mismatches = [
+        (name, mode)
+        for name in sorted(set(expected) | set(outputs))
+        for mode in MODES
+        if expected.get(name, {}).get(mode) != outputs.get(name, {}).get(mode)
+    ]
+    if not mismatches:
+        print(f"{GREEN}Golden corpus: {len(CASES)} case(s) x {len(MODES)} mode(s) match.{RESET}")
+        return True
+
+    print(f"{RED}Golden corpus: {len(mismatches)} mismatch(es):{RESET}")
+    for name, mode in mismatches:
+        print(f"  - {name} [{mode}]")
+        print(f"{YELLOW}--- expected ---{RESET}\n{expected.get(name, {}).get(mode)}")
+        print(f"{YELLOW}--- actual ---{RESET}\n{outputs.get(name, {}).get(mode)}")
+    return False
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB (ru_maxrss is bytes on macOS, KiB elsewhere)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def measure_once(mode: str, size: int, jobs: int, project_root: Path) -> Dict:
+    """Time a cold run and a warm (cached) re-run over a fresh corpus. Runs inside a child process."""
+    module = load_cleanup_module()
+    with tempfile.TemporaryDirectory(prefix="cleanup-bench-") as tmp:
+        root = Path(tmp).resolve()
+        write_project_skeleton(root, project_root / UI_REL_PATH)
+        write_corpus(root, "bench", size)
+        cache_path = root / module.DEFAULT_CACHE_FILE_NAME
+
+        start = time.perf_counter()
+        run_tool(module, root, "bench", mode, cache_path=cache_path, jobs=jobs)
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_tool(module, root, "bench", mode, cache_path=cache_path, jobs=jobs)
+        warm_seconds = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "files": size,
+        "cold_seconds": round(cold_seconds, 4),
+        "cold_files_per_second": round(size / cold_seconds, 1),
+        "warm_seconds": round(warm_seconds, 4),
+        "warm_files_per_second": round(size / warm_seconds, 1),
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+def measure_in_subprocess(mode: str, size: int, jobs: int, project_root: Path) -> Dict:
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--measure-one",
+        "--mode", mode, "--size", str(size), "--jobs", str(jobs), "--root", str(project_root),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Measurement {mode}/{size} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def git_commit(project_root: Path) -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else "unknown"
+
+def print_results(report: Dict, baseline: Dict = None):
+    """Print the results table, with relative change against a baseline report if given."""
+    baseline_rows = {(r["mode"], r["files"]): r for r in (baseline or {}).get("results", [])}
+    print(f"\n{BOLD}{'mode':<12}{'files':>8}{'cold f/s':>12}{'warm f/s':>12}{'peak RSS KiB':>14}{'  vs baseline' if baseline else ''}{RESET}")
+    for row in report["results"]:
+        line = f"{row['mode']:<12}{row['files']:>8}{row['cold_files_per_second']:>12}{row['warm_files_per_second']:>12}{row['peak_rss_kb']:>14}"
+        previous = baseline_rows.get((row["mode"], row["files"]))
+        if previous:
+            change = (row["cold_files_per_second"] / previous["cold_files_per_second"] - 1) * 100
+            color = GREEN if change >= 0 else RED
+            line += f"  {color}{change:+.1f}% cold{RESET}"
+        print(line)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark and golden regression check for cleanup-ui-imports.py")
+    parser.add_argument("--root", default=str(SCRIPT_DIR.parent), help="Project root whose UI components are copied (default: repository root)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Corpus sizes to measure (default: 100 1000 5000)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes for de-barrel mode (default: number of CPU cores)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a report previously written with --output")
+    parser.add_argument("--golden-only", action="store_true", help="Only run the golden regression check")
+    parser.add_argument("--skip-golden", action="store_true", help="Skip the golden regression check")
+    parser.add_argument("--update-golden", action="store_true", help="Regenerate the golden outputs from the current implementation")
+    # Internal: a single measurement, run in a child process
+    parser.add_argument("--measure-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    project_root = Path(args.root).resolve()
+
+    if args.measure_one:
+        print(json.dumps(measure_once(args.mode, args.size, args.jobs, project_root)))
+        return 0
+
+    if not args.skip_golden:
+        if not check_golden(load_cleanup_module(), args.update_golden):
+            return 1
+        if args.golden_only:
+            return 0
+
+    print(f"{CYAN}Measuring {', '.join(MODES)} at sizes {args.sizes} (jobs: {args.jobs})...{RESET}")
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(project_root),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "jobs": args.jobs,
+        "results": [
+            measure_in_subprocess(mode, size, args.jobs, project_root)
+            for size in args.sizes
+            for mode in MODES
+        ],
+    }
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_results(report, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\n{GREEN}Report written to {args.output}{RESET}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
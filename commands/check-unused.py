@@ -6,23 +6,68 @@ Handles Next.js specific files and conventions.
 """
 
 import os
-import re
 import argparse
 import json
 from collections import defaultdict
 import sys
 from typing import List, Set, Dict, Tuple
 import time
-from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import shutil
+import bisect
+import sqlite3
+import subprocess
+from statistics import median
+from urllib.parse import unquote
 from datetime import datetime
 
+import project_scan # Shared walker, import tokenizer and parse cache (commands/project_scan.py)
+
 # Default settings
 DEFAULT_EXTENSIONS = ["tsx", "ts"]
-DEFAULT_EXCLUDE = ["node_modules", ".next", ".git", "dist", "build"]
+DEFAULT_EXCLUDE = project_scan.DEFAULT_EXCLUDE_DIRS
 DEFAULT_PARALLEL_JOBS = os.cpu_count()
 
+# Asset audit (--assets)
+DEFAULT_PUBLIC_DIR = "public"
+ASSET_REFERENCE_EXTENSIONS = ["tsx", "ts", "jsx", "js", "mjs", "css", "scss", "mdx"] # Files scanned for asset references
+DEFAULT_ASSET_TOP = 10
+STYLESHEET_IMPORT_EXTENSIONS = (".css", ".scss", ".sass", ".less") # Tried in order for an @import without one
+# Served from public/ by convention (crawlers, browsers), never referenced from source
+CONVENTIONAL_PUBLIC_FILES = {
+    'robots.txt', 'sitemap.xml', 'favicon.ico', 'manifest.json', 'manifest.webmanifest',
+    'site.webmanifest', 'browserconfig.xml', 'humans.txt', 'ads.txt', 'security.txt',
+}
+# App Router metadata files (icon.png, opengraph-image.jpg, ...) are picked up by file name
+NEXTJS_METADATA_ASSETS = {'favicon', 'icon', 'apple-icon', 'opengraph-image', 'twitter-image'}
+
+# Schema audit (--schema)
+SCHEMA_ALIAS = "schema" # tsconfig path alias of the schema entry point
+DEFAULT_SCHEMA_ENTRY = "src/api/db/schema.ts"
+QUERY_CONTEXTS = ("where", "order", "join")
+
+# Query pattern audit (--queries)
+SEVERITIES = ["low", "medium", "high"]
+SEQUENTIAL_LOOPS = {"for", "while", "do"} # Unlike .map/.forEach callbacks, each iteration waits for the last
+
+# Duplicate module detection (--duplicates)
+DEFAULT_SIMILARITY = 0.8
+DEFAULT_MIN_TOKENS = 50 # Smaller files (barrels, one-line re-exports) look alike without being copies
+COMMON_SHINGLE_SHARE = 0.05 # Shingles found in more files than this share (and COMMON_SHINGLE_MIN_FILES) are
+COMMON_SHINGLE_MIN_FILES = 10 # boilerplate, and don't make two files a candidate pair
+
+# Analysis history (--history)
+DEFAULT_HISTORY_FILE_NAME = ".check-unused-history.sqlite"
+DEFAULT_TREND_RUNS = 50
+SNAPSHOT_INTERVAL = 100 # Every Nth run of a mode stores its full result sets, so rebuilding one never replays more deltas
+HISTORY_SETS = { # Result sets recorded per mode; every other list or number in the results is recorded as a count
+    "unused": ["unused_files"],
+    "assets": ["unused_assets"],
+    "schema": ["unused_tables", "unused_columns", "unindexed_columns"],
+    "queries": [],
+    "duplicates": [],
+}
+
 # ANSI colors for better output
 GREEN = '\033[92m'
 YELLOW = '\033[93m'
@@ -89,6 +134,11 @@ It analyzes import statements and identifies files that aren't imported anywhere
 • Parallel processing for better performance
 • Interactive file cleanup
 • Report generation
+• Static asset audit (--assets): unreferenced and oversized files in public/ and imported assets
+• Drizzle schema audit (--schema): unused tables/columns and unindexed query columns
+• Query pattern audit (--queries): N+1 database access and sequential await waterfalls
+• Duplicate modules (--duplicates): exact and near-duplicate files, and the bytes saved by consolidating them
+• Analysis history: every run is recorded per git commit; compare with --since COMMIT, time it with --trend
 
 {CYAN}Common Use Cases:{RESET}
 1. Finding dead code:
@@ -322,27 +372,102 @@ def parse_arguments():
         default=os.cpu_count(),
         help="Number of parallel jobs for processing (default: number of CPU cores)"
     )
+    parser.add_argument(
+        "--cache",
+        default=project_scan.DEFAULT_CACHE_FILE_NAME,
+        help=f"Parse cache shared with cleanup-ui-imports.py, relative to --dir (default: {project_scan.DEFAULT_CACHE_FILE_NAME})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every file instead of reusing the parse cache"
+    )
+    parser.add_argument(
+        "--assets",
+        action="store_true",
+        help="Audit static assets instead: unreferenced files in public/ and imported stylesheets/images, and the largest referenced ones"
+    )
+    parser.add_argument(
+        "--public-dir",
+        default=DEFAULT_PUBLIC_DIR,
+        help=f"Static asset directory served from /, relative to --dir (default: {DEFAULT_PUBLIC_DIR})"
+    )
+    parser.add_argument(
+        "--schema",
+        action="store_true",
+        help="Audit the Drizzle schema instead: unused tables/columns and unindexed where/orderBy/join columns"
+    )
+    parser.add_argument(
+        "--schema-entry",
+        help=f"Schema entry point, relative to --dir (default: the '{SCHEMA_ALIAS}' tsconfig alias, else {DEFAULT_SCHEMA_ENTRY})"
+    )
+    parser.add_argument(
+        "--queries",
+        action="store_true",
+        help="Detect N+1 database access (queries inside loops and .map callbacks) and sequential await waterfalls in pages, layouts and routes"
+    )
+    parser.add_argument(
+        "--fail-on",
+        choices=SEVERITIES,
+        help="With --queries, exit with status 1 if there is a finding of this severity or higher (for CI)"
+    )
+    parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help="Find exact and near-duplicate modules from token fingerprints, with the bytes saved by consolidating them"
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help=f"With --duplicates, the share of shingles two files must have in common (default: {DEFAULT_SIMILARITY})"
+    )
+    parser.add_argument(
+        "--min-tokens",
+        type=int,
+        default=DEFAULT_MIN_TOKENS,
+        help=f"With --duplicates, ignore files with fewer tokens (default: {DEFAULT_MIN_TOKENS})"
+    )
+    parser.add_argument(
+        "--unused",
+        action="store_true",
+        help="Run the unused file analysis without the interactive menu (for CI)"
+    )
+    parser.add_argument(
+        "--history",
+        default=DEFAULT_HISTORY_FILE_NAME,
+        help=f"SQLite file every run is recorded in, relative to --dir (default: {DEFAULT_HISTORY_FILE_NAME})"
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not record this run in the analysis history"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="COMMIT",
+        help="Show what became unused (and what stopped being unused) since the last recorded run at COMMIT, for the selected mode"
+    )
+    parser.add_argument(
+        "--trend",
+        type=int,
+        nargs="?",
+        const=DEFAULT_TREND_RUNS,
+        metavar="RUNS",
+        help=f"Show counts, durations and phase timings of the last RUNS recorded runs of the selected mode (default: {DEFAULT_TREND_RUNS})"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_ASSET_TOP,
+        help=f"Number of largest referenced assets to list (default: {DEFAULT_ASSET_TOP})"
+    )
     return parser.parse_args()
 
 def find_all_files(root_dir: str, extensions: List[str], exclude_dirs: List[str]) -> List[str]:
     """Find all files with the specified extensions in the given directory."""
-    all_files = []
-    exclude_dirs = set(exclude_dirs)
-
-    for root, dirs, files in os.walk(root_dir):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-
-        for file in files:
-            file_ext = file.split('.')[-1]
-            if file_ext in extensions:
-                file_path = os.path.join(root, file)
-                # Skip test files as they're not meant to be imported
-                if not any(part.startswith('__tests__') or part.endswith('.test') or part.endswith('.spec')
-                          for part in file_path.split(os.sep)):
-                    all_files.append(file_path)
-
-    return all_files
+    # Skip test files as they're not meant to be imported
+    return [str(path) for path in project_scan.walk_source_files(root_dir, extensions, exclude_dirs, skip_tests=True)]
 
 def normalize_path(path: str) -> str:
     """Normalize a file path for consistent comparison."""
@@ -363,62 +488,25 @@ def resolve_alias_path(import_path: str, aliases: Dict[str, List[str]], project_
 
     return potential_paths
 
+def import_specifiers(parsed: Dict) -> Set[str]:
+    """Module specifiers referenced by a parsed file (imports, re-exports, dynamic imports and requires)."""
+    imports = set()
+    for ref in project_scan.import_refs(parsed):
+        specifier = ref.specifier
+        # Clean up UI component paths
+        if '/ui/index.ts/' in specifier:
+            specifier = specifier.replace('/index.ts/', '/')
+        imports.add(specifier)
+    return imports
+
 def find_imports_in_file(file_path: str, aliases: Dict) -> Set[str]:
     """Find all imports in a file."""
-    imports = set()
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-            # Look for various import patterns
-            patterns = [
-                # Relative imports
-                r'from\s+[\'"](\.[^\'"]+)[\'"]',
-                r'import\s+[^\'";]+\s+from\s+[\'"](\.[^\'"]+)[\'"]',
-                r'import\s+[\'"](\.[^\'"]+)[\'"]',
-                r'require\([\'"](\.[^\'")]+)[\'"]\)',
-
-                # Absolute imports (including alias paths)
-                r'from\s+[\'"](@[^\'"]+)[\'"]',
-                r'import\s+[^\'";]+\s+from\s+[\'"](@[^\'"]+)[\'"]',
-                r'from\s+[\'"]([^\'".][^\'"]+)[\'"]',  # Non-relative imports
-                r'import\s+[^\'";]+\s+from\s+[\'"]([^\'".][^\'"]+)[\'"]',  # Non-relative imports
-
-                # Dynamic imports
-                r'import\([\'"](\.[^\'"]+)[\'"]\)',
-                r'import\([\'"](@[^\'"]+)[\'"]\)',
-
-                # Special handling for UI component imports
-                r'from\s+[\'"](@/shared/components/ui/[^\'"]+/[^\'"]+)[\'"]',
-                r'import\s+[^\'";]+\s+from\s+[\'"](@/shared/components/ui/[^\'"]+/[^\'"]+)[\'"]',
-                r'from\s+[\'"](@/components/ui/[^\'"]+/[^\'"]+)[\'"]',
-                r'import\s+[^\'";]+\s+from\s+[\'"](@/components/ui/[^\'"]+/[^\'"]+)[\'"]'
-            ]
-
-            for pattern in patterns:
-                matches = re.findall(pattern, content)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    # Clean up UI component paths
-                    if '/ui/index.ts/' in match:
-                        match = match.replace('/index.ts/', '/')
-                    imports.add(match)
-
-            # Look for re-exports
-            re_export_patterns = [
-                r'export\s+\*\s+from\s+[\'"]([^\'"]+)[\'"]',
-                r'export\s+{\s*[^}]+\s*}\s+from\s+[\'"]([^\'"]+)[\'"]',
-            ]
-
-            for pattern in re_export_patterns:
-                matches = re.findall(pattern, content)
-                imports.update(matches)
-
+            return import_specifiers(project_scan.parse_source(f.read(), kinds=("imports",)))
     except Exception as e:
         print(f"{RED}Error reading {file_path}: {str(e)}{RESET}")
-
-    return imports
+        return set()
 
 def resolve_import_path(base_dir: str, import_path: str, extensions: List[str], aliases: Dict) -> List[str]:
     """Resolve a relative import path to absolute file paths."""
@@ -446,16 +534,14 @@ def resolve_import_path(base_dir: str, import_path: str, extensions: List[str],
 
     return potential_paths
 
-def process_file(args: Tuple[str, List[str], Dict, List[str]]) -> Set[str]:
-    """Process a single file to find its imports. Used for parallel processing."""
-    file_path, extensions, aliases, normalized_all_files = args
-    imports = find_imports_in_file(file_path, aliases)
+def resolve_imported_files(file_path: str, imports: Set[str], extensions: List[str], aliases: Dict, all_files: Set[str]) -> Set[str]:
+    """The project files a file's imports resolve to."""
     imported_files = set()
 
     for import_path in imports:
         potential_paths = resolve_import_path(file_path, import_path, extensions, aliases)
         for path in potential_paths:
-            if path in normalized_all_files:
+            if path in all_files:
                 imported_files.add(path)
 
     return imported_files
@@ -473,6 +559,7 @@ def find_unused_files(args):
     print(f"Using {n_jobs} parallel jobs")
 
     start_time = time.time()
+    timer = PhaseTimer()
 
     # Parse tsconfig.json for aliases
     aliases = parse_tsconfig(root_dir)
@@ -480,18 +567,25 @@ def find_unused_files(args):
     # Step 1: Find all files
     all_files = find_all_files(root_dir, extensions, exclude_dirs)
     normalized_all_files = [normalize_path(f) for f in all_files]
+    timer.lap("walk")
 
     if verbose:
         print(f"Found {len(all_files)} files to analyze")
 
-    # Step 2: Process files in parallel
-    imported_files = set()
-    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
-        process_args = [(f, extensions, aliases, normalized_all_files) for f in all_files]
-        results = list(executor.map(process_file, process_args))
+    # Step 2: Parse files (in parallel; unchanged files come from the shared parse cache)
+    cache_path = None if args.no_cache else os.path.join(root_dir, args.cache)
+    parsed_files, cache, errors = project_scan.scan_files(root_dir, all_files, n_jobs, cache_path, prune=True, kinds=("imports",))
+    for file_path, error in errors.items():
+        print(f"{RED}Error reading {file_path}: {error}{RESET}")
+    if verbose:
+        print(f"Parsed {cache.misses} files, reused {cache.hits} from the parse cache")
+    timer.lap("parse")
 
-        for result in results:
-            imported_files.update(result)
+    imported_files = set()
+    all_files_set = set(normalized_all_files)
+    for file_path, parsed in parsed_files.items():
+        imported_files.update(resolve_imported_files(file_path, import_specifiers(parsed), extensions, aliases, all_files_set))
+    timer.lap("resolve")
 
     # Step 3: Find unused files
     used_files = set(normalized_all_files) & imported_files
@@ -506,6 +600,7 @@ def find_unused_files(args):
     root_abs_path = os.path.abspath(root_dir)
     unused_files_rel = [os.path.relpath(f, root_abs_path) for f in unused_files]
     used_files_rel = [os.path.relpath(f, root_abs_path) for f in used_files]
+    timer.lap("classify")
 
     # Results
     end_time = time.time()
@@ -542,20 +637,840 @@ def find_unused_files(args):
         "used_files": used_files_rel,
         "unused_files": unused_files_rel,
         "duration": duration,
+        "phases": timer.phases,
         "unused_by_directory": {
             dir_name: files for dir_name, files in unused_by_dir.items()
         } if 'unused_by_dir' in locals() else {}
     }
 
+def format_size(size: int) -> str:
+    """Human readable byte count."""
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024 or unit == 'MiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def is_conventional_asset(asset_path: str, public_dir: str) -> bool:
+    """Assets that are used without being referenced: well-known public/ files and App Router metadata images."""
+    name = os.path.basename(asset_path)
+    if asset_path.startswith(public_dir + os.sep):
+        url_path = os.path.relpath(asset_path, public_dir)
+        return (name in CONVENTIONAL_PUBLIC_FILES or name.startswith('apple-touch-icon')
+                or url_path.split(os.sep)[0] == '.well-known')
+    return name.split('.')[0].rstrip('0123456789') in NEXTJS_METADATA_ASSETS
+
+def build_asset_index(root_dir: str, public_dir: str, exclude_dirs: List[str]) -> Dict:
+    """
+    Every asset with its size, indexed by absolute path, by the URL it is served at (public/ only) and
+    as a sorted URL list for prefix lookups, so each reference resolves with a dict lookup or a bisect.
+    """
+    sizes, urls = {}, {}
+    if os.path.isdir(public_dir):
+        for root, dirs, files in os.walk(public_dir):
+            for file in files:
+                asset_path = normalize_path(os.path.join(root, file))
+                sizes[asset_path] = os.path.getsize(asset_path)
+                urls['/' + Path(os.path.relpath(asset_path, public_dir)).as_posix()] = asset_path
+    for path in project_scan.walk_source_files(root_dir, project_scan.SOURCE_ASSET_EXTENSIONS, exclude_dirs):
+        asset_path = normalize_path(os.path.abspath(path))
+        if asset_path not in sizes:
+            sizes[asset_path] = os.path.getsize(asset_path)
+    return {"sizes": sizes, "urls": urls, "sorted_urls": sorted(urls)}
+
+def resolve_asset_reference(file_path: str, ref, index: Dict, aliases: Dict, root_dir: str) -> List[str]:
+    """The indexed assets a reference points at (several for a dynamic `/dir/${...}` prefix)."""
+    reference = ref.reference.split('?')[0].split('#')[0]
+    if ref.kind == "prefix":
+        sorted_urls = index["sorted_urls"]
+        start = bisect.bisect_left(sorted_urls, reference)
+        end = bisect.bisect_left(sorted_urls, reference[:-1] + chr(ord(reference[-1]) + 1))
+        return [index["urls"][url] for url in sorted_urls[start:end]]
+    if reference.startswith('/'):
+        asset_path = index["urls"].get(unquote(reference))
+        return [asset_path] if asset_path else []
+
+    if reference.startswith('.') or ref.kind == "url":
+        candidates = [normalize_path(os.path.join(os.path.dirname(file_path), unquote(reference)))]
+    elif ref.kind == "css_import":
+        # Relative to the stylesheet unless it names a package or an alias
+        candidates = [normalize_path(os.path.join(os.path.dirname(file_path), reference))] + resolve_alias_path(reference, aliases, root_dir)
+    else:
+        candidates = resolve_alias_path(reference, aliases, root_dir)
+    if ref.kind == "css_import":
+        # @import "./theme/utilities" may mean utilities.css, or a Sass partial (_utilities.scss)
+        candidates = [f"{base}{ext}" for base in candidates for ext in ('',) + STYLESHEET_IMPORT_EXTENSIONS]
+        candidates += [os.path.join(os.path.dirname(path), '_' + os.path.basename(path)) for path in candidates]
+        return [path for path in candidates if path in index["sizes"]][:1]
+    return [path for path in candidates if path in index["sizes"]]
+
+def find_unused_assets(args):
+    """Report unreferenced static assets and the largest referenced ones."""
+    root_dir = os.path.abspath(args.dir)
+    public_dir = normalize_path(os.path.join(root_dir, args.public_dir))
+    verbose = args.verbose
+
+    print(f"Auditing static assets in {os.path.relpath(public_dir, root_dir)}/ and imported stylesheets/images")
+    print(f"Searching for references in: {', '.join(ASSET_REFERENCE_EXTENSIONS)}")
+
+    start_time = time.time()
+    timer = PhaseTimer()
+    aliases = parse_tsconfig(root_dir)
+
+    # Step 1: Index the assets
+    index = build_asset_index(root_dir, public_dir, args.exclude)
+    if verbose:
+        print(f"Indexed {len(index['sizes'])} assets ({len(index['urls'])} served from public/)")
+
+    # Step 2: Parse the files that can reference them (unchanged files come from the shared parse cache)
+    source_files = [str(path) for path in project_scan.walk_source_files(root_dir, ASSET_REFERENCE_EXTENSIONS, args.exclude)]
+    cache_path = None if args.no_cache else os.path.join(root_dir, args.cache)
+    parsed_files, cache, errors = project_scan.scan_files(root_dir, source_files, args.jobs, cache_path, prune=True, kinds=("assets",))
+    for file_path, error in errors.items():
+        print(f"{RED}Error reading {file_path}: {error}{RESET}")
+    if verbose:
+        print(f"Parsed {cache.misses} files, reused {cache.hits} from the parse cache")
+    timer.lap("scan")
+
+    # Step 3: Resolve references against the index
+    references = defaultdict(list)
+    dynamic_prefixes = set()
+    for file_path, parsed in parsed_files.items():
+        for ref in project_scan.asset_refs(parsed):
+            location = f"{os.path.relpath(file_path, root_dir)}:{ref.line}"
+            resolved = resolve_asset_reference(file_path, ref, index, aliases, root_dir)
+            for asset_path in resolved:
+                references[asset_path].append(location)
+            if ref.kind == "prefix" and resolved:
+                dynamic_prefixes.add(ref.reference)
+
+    sizes = index["sizes"]
+    unused_assets = sorted(
+        (path for path in sizes if path not in references and not is_conventional_asset(path, public_dir)),
+        key=lambda path: (-sizes[path], path)
+    )
+    largest_used = sorted(references, key=lambda path: (-sizes[path], path))[:args.top]
+    timer.lap("analysis")
+    duration = time.time() - start_time
+
+    print("\n=== ASSET AUDIT ===")
+    print(f"Total assets: {len(sizes)} ({format_size(sum(sizes.values()))})")
+    print(f"Referenced assets: {len(references)} ({format_size(sum(sizes[path] for path in references))})")
+    print(f"Unreferenced assets: {len(unused_assets)} ({format_size(sum(sizes[path] for path in unused_assets))})")
+    print(f"Time taken: {duration:.2f} seconds")
+
+    if unused_assets:
+        print("\nUnreferenced assets (largest first):")
+        for path in unused_assets:
+            print(f"  - {os.path.relpath(path, root_dir)}  {format_size(sizes[path])}")
+    else:
+        print("\nEvery asset is referenced somewhere!")
+
+    if largest_used:
+        print("\nLargest referenced assets:")
+        for path in largest_used:
+            locations = references[path]
+            more = f" (+{len(locations) - 1} more)" if len(locations) > 1 else ""
+            print(f"  - {os.path.relpath(path, root_dir)}  {format_size(sizes[path])}  <- {locations[0]}{more}")
+
+    if dynamic_prefixes:
+        print(f"\n{YELLOW}Paths built at runtime count as references to every asset under: {', '.join(sorted(dynamic_prefixes))}{RESET}")
+
+    return {
+        "total_assets": len(sizes),
+        "unused_assets": [os.path.relpath(path, root_dir) for path in unused_assets],
+        "largest_used": [(os.path.relpath(path, root_dir), sizes[path]) for path in largest_used],
+        "duration": duration,
+        "phases": timer.phases,
+    }
+
+def resolve_module(file_path: str, specifier: str, aliases: Dict, root_dir: str, all_files: Set[str]):
+    """The project file an import specifier points at (relative or through a tsconfig alias), or None."""
+    if specifier.startswith('.'):
+        bases = [normalize_path(os.path.join(os.path.dirname(file_path), specifier))]
+    else:
+        bases = resolve_alias_path(specifier, aliases, root_dir)
+    for base in bases:
+        candidates = [base] + [f"{base}.{ext}" for ext in DEFAULT_EXTENSIONS]
+        candidates += [os.path.join(base, f"index.{ext}") for ext in DEFAULT_EXTENSIONS]
+        for candidate in candidates:
+            if candidate in all_files:
+                return candidate
+    return None
+
+def find_schema_files(entry: str, parsed_files: Dict, aliases: Dict, root_dir: str) -> List[str]:
+    """The schema entry point and every module it re-exports, transitively."""
+    all_files = set(parsed_files)
+    schema_files, pending = [], [entry]
+    while pending:
+        file_path = pending.pop()
+        if file_path in schema_files:
+            continue
+        schema_files.append(file_path)
+        for ref in project_scan.import_refs(parsed_files[file_path]):
+            if ref.kind == "export":
+                module = resolve_module(file_path, ref.specifier, aliases, root_dir, all_files)
+                if module:
+                    pending.append(module)
+    return schema_files
+
+def is_column_indexed(table: Dict, prop: str, filtered: Set[str]) -> bool:
+    """
+    A primary key or unique column, or a column of a declared index whose preceding columns are
+    filtered too (an index on (a, b) serves `a = ? AND b = ?` but not `b = ?` alone).
+    """
+    for column_prop, _, _, flags in table["columns"]:
+        if column_prop == prop and ("primary" in flags or "unique" in flags):
+            return True
+    for _, props in table["indexes"]:
+        if prop in props and all(p in filtered for p in props[:props.index(prop)]):
+            return True
+    return False
+
+def find_schema_issues(args):
+    """Report unused tables/columns and where/orderBy/join columns without an index."""
+    root_dir = os.path.abspath(args.dir)
+    aliases = parse_tsconfig(root_dir)
+    if args.schema_entry:
+        entry = normalize_path(os.path.join(root_dir, args.schema_entry))
+    elif SCHEMA_ALIAS in aliases:
+        entry = resolve_alias_path(SCHEMA_ALIAS, aliases, root_dir)[0]
+    else:
+        entry = normalize_path(os.path.join(root_dir, DEFAULT_SCHEMA_ENTRY))
+    verbose = args.verbose
+
+    print(f"Auditing the Drizzle schema in {os.path.relpath(entry, root_dir)}")
+    start_time = time.time()
+    timer = PhaseTimer()
+
+    # Step 1: Parse every source file (unchanged files come from the shared parse cache)
+    all_files = [normalize_path(f) for f in find_all_files(root_dir, args.files, args.exclude)]
+    cache_path = None if args.no_cache else os.path.join(root_dir, args.cache)
+    parsed_files, cache, errors = project_scan.scan_files(root_dir, all_files, args.jobs, cache_path, prune=True, kinds=("imports", "drizzle"))
+    for file_path, error in errors.items():
+        print(f"{RED}Error reading {file_path}: {error}{RESET}")
+    if verbose:
+        print(f"Parsed {cache.misses} files, reused {cache.hits} from the parse cache")
+    timer.lap("scan")
+    if entry not in parsed_files:
+        print(f"{RED}Schema entry point not found: {entry}{RESET}")
+        return None
+
+    # Step 2: Tables, columns and indexes of every module behind the schema entry point
+    schema_files = find_schema_files(entry, parsed_files, aliases, root_dir)
+    tables = {}
+    for file_path in schema_files:
+        for table in parsed_files[file_path]["drizzle"]["tables"]:
+            tables[table["var"]] = dict(table, file=file_path)
+    if verbose:
+        print(f"Found {len(tables)} tables in {len(schema_files)} schema files")
+
+    # Step 3: Usage outside the schema: identifiers of query files and clause-tagged column references
+    table_files = defaultdict(set)
+    used_columns = defaultdict(set)
+    query_refs = defaultdict(list) # (table var, column prop) -> [(context, file, line, statement)]
+    schema_file_set = set(schema_files)
+    for file_path, parsed in parsed_files.items():
+        if file_path in schema_file_set:
+            continue
+        identifiers = set(parsed["drizzle"]["identifiers"])
+        for var, table in tables.items():
+            if var in identifiers:
+                table_files[var].add(file_path)
+                used_columns[var].update(column[0] for column in table["columns"] if column[0] in identifiers)
+        for ref in project_scan.column_refs(parsed):
+            if ref.table in tables:
+                query_refs[(ref.table, ref.column)].append((ref.context, file_path, ref.line, ref.statement))
+
+    # An index's leading columns only help if the same query (statement) filters them too
+    filtered_by_statement = defaultdict(set) # (file, statement, table var) -> filtered/joined column props
+    for (var, prop), refs in query_refs.items():
+        for context, file_path, _, statement in refs:
+            if context != "order":
+                filtered_by_statement[(file_path, statement, var)].add(prop)
+
+    unindexed = []
+    for (var, prop), refs in query_refs.items():
+        if prop not in {column[0] for column in tables[var]["columns"]}:
+            continue
+        refs = list(dict.fromkeys(refs)) # or(isNull(t.a), gt(t.a, x)) is one call site
+        missing = [ref for ref in refs if not is_column_indexed(tables[var], prop, filtered_by_statement[(ref[1], ref[3], var)])]
+        if missing:
+            unindexed.append((var, prop, missing))
+    unindexed.sort(key=lambda item: (-len(item[2]), tables[item[0]]["name"], item[1]))
+
+    unused_tables = sorted((var for var in tables if var not in table_files), key=lambda var: tables[var]["name"])
+    unused_columns = [
+        (var, column) for var in sorted(table_files, key=lambda var: tables[var]["name"])
+        for column in tables[var]["columns"] if column[0] not in used_columns[var]
+    ]
+    timer.lap("analysis")
+    duration = time.time() - start_time
+
+    def column_label(var, prop):
+        name = next((column[1] for column in tables[var]["columns"] if column[0] == prop), prop)
+        return f"{tables[var]['name']}.{name}" + (f" ({var}.{prop})" if name != prop else "")
+
+    print("\n=== SCHEMA AUDIT ===")
+    print(f"Schema files: {len(schema_files)}")
+    print(f"Tables: {len(tables)} ({sum(len(t['columns']) for t in tables.values())} columns, "
+          f"{sum(len(t['indexes']) for t in tables.values())} declared indexes)")
+    print(f"Unused tables: {len(unused_tables)}")
+    print(f"Unused columns: {len(unused_columns)}")
+    print(f"Unindexed query columns: {len(unindexed)}")
+    print(f"Time taken: {duration:.2f} seconds")
+
+    if unused_tables:
+        print("\nUnused tables:")
+        for var in unused_tables:
+            print(f"  - {tables[var]['name']} ({var})  {os.path.relpath(tables[var]['file'], root_dir)}:{tables[var]['line']}")
+    if unused_columns:
+        print("\nUnused columns:")
+        for var, (prop, name, line, _) in unused_columns:
+            print(f"  - {column_label(var, prop)}  {os.path.relpath(tables[var]['file'], root_dir)}:{line}")
+    if unindexed:
+        print("\nColumns used in where/orderBy/join without an index (most call sites first):")
+        for var, prop, refs in unindexed:
+            counts = ", ".join(f"{context} x{sum(1 for ref in refs if ref[0] == context)}"
+                               for context in QUERY_CONTEXTS if any(ref[0] == context for ref in refs))
+            print(f"  - {column_label(var, prop)}  {counts}")
+            for context, file_path, line, _ in refs[:3]:
+                print(f"      {os.path.relpath(file_path, root_dir)}:{line} ({context})")
+            if len(refs) > 3:
+                print(f"      ... and {len(refs) - 3} more")
+    if not (unused_tables or unused_columns or unindexed):
+        print("\nEvery table and column is used, and every filtered column is indexed!")
+
+    return {
+        "tables": len(tables),
+        "unused_tables": [tables[var]["name"] for var in unused_tables],
+        "unused_columns": [column_label(var, column[0]) for var, column in unused_columns],
+        "unindexed_columns": [column_label(var, prop) for var, prop, _ in unindexed],
+        "duration": duration,
+        "phases": timer.phases,
+    }
+
+def imported_names(file_path: str, parsed: Dict, aliases: Dict, root_dir: str, all_files: Set[str]) -> Dict[str, str]:
+    """Named imports of a file mapped to the project module they come from."""
+    names = {}
+    for ref in project_scan.import_refs(parsed):
+        if ref.kind != "import":
+            continue
+        module = resolve_module(file_path, ref.specifier, aliases, root_dir, all_files)
+        if module:
+            names.update((name, module) for name in ref.names if name not in ('default', '*'))
+    return names
+
+def name_origins(module: str, name: str, parsed_files: Dict, aliases: Dict, root_dir: str, all_files: Set[str], seen=None) -> List[str]:
+    """The module a name is imported from, plus the modules it is re-exported from (through barrels)."""
+    seen = seen if seen is not None else set()
+    if module in seen:
+        return []
+    seen.add(module)
+    origins = [module]
+    for ref in project_scan.import_refs(parsed_files[module]):
+        if ref.kind == "export" and (name in ref.names or '*' in ref.names):
+            target = resolve_module(module, ref.specifier, aliases, root_dir, all_files)
+            if target:
+                origins += name_origins(target, name, parsed_files, aliases, root_dir, all_files, seen)
+    return origins
+
+def bump_severity(severity: str, levels: int = 1) -> str:
+    return SEVERITIES[min(SEVERITIES.index(severity) + levels, len(SEVERITIES) - 1)]
+
+def find_query_patterns(args):
+    """Report database calls made per loop iteration (N+1) and independent awaits run one after another."""
+    root_dir = os.path.abspath(args.dir)
+    aliases = parse_tsconfig(root_dir)
+    verbose = args.verbose
+
+    print(f"Searching for N+1 database access and await waterfalls in: {root_dir}")
+    start_time = time.time()
+    timer = PhaseTimer()
+
+    # Step 1: Parse every source file (unchanged files come from the shared parse cache)
+    all_files = [normalize_path(f) for f in find_all_files(root_dir, args.files, args.exclude)]
+    cache_path = None if args.no_cache else os.path.join(root_dir, args.cache)
+    parsed_files, cache, errors = project_scan.scan_files(root_dir, all_files, args.jobs, cache_path, prune=True, kinds=("imports", "async"))
+    for file_path, error in errors.items():
+        print(f"{RED}Error reading {file_path}: {error}{RESET}")
+    if verbose:
+        print(f"Parsed {cache.misses} files, reused {cache.hits} from the parse cache")
+    timer.lap("scan")
+
+    # Step 2: Modules that query the database directly, and modules that wrap them (services, actions)
+    all_files_set = set(parsed_files)
+    db_modules = {f for f, parsed in parsed_files.items() if parsed["async"]["db_calls"]}
+    imports_by_file = {f: imported_names(f, parsed, aliases, root_dir, all_files_set) for f, parsed in parsed_files.items()}
+    db_wrappers = {f for f, names in imports_by_file.items() if f not in db_modules and set(names.values()) & db_modules}
+    if verbose:
+        print(f"{len(db_modules)} modules query the database, {len(db_wrappers)} more wrap them")
+
+    def database_module(file_path, callee):
+        """The module behind an imported callee that reaches the database, or None."""
+        module = imports_by_file[file_path].get(callee)
+        if not module:
+            return None
+        return next((m for m in name_origins(module, callee, parsed_files, aliases, root_dir, all_files_set)
+                     if m in db_modules or m in db_wrappers), None)
+
+    # Step 3: Database calls per loop iteration, directly or through an imported query function
+    n_plus_one = []
+    for file_path, parsed in parsed_files.items():
+        for call in project_scan.loop_calls(parsed):
+            via = None if call.direct else database_module(file_path, call.callee)
+            if not (call.direct or via):
+                continue
+            sequential = call.awaited and call.loop in SEQUENTIAL_LOOPS
+            if call.direct:
+                severity = "high" if sequential else "medium"
+            else:
+                severity = "medium" if sequential else "low"
+            severity = bump_severity(severity, call.depth - 1) # Nested loops multiply the query count
+            n_plus_one.append((severity, file_path, call, via))
+
+    # Step 4: Independent awaits one after another in pages, layouts and route handlers
+    waterfalls = []
+    for file_path, parsed in parsed_files.items():
+        if not is_nextjs_special_file(file_path):
+            continue
+        for run in project_scan.waterfalls(parsed):
+            queries = any(step.direct or database_module(file_path, step.callee) for step in run)
+            severity = "high" if len(run) > 2 else "medium" if queries else "low"
+            waterfalls.append((severity, file_path, run))
+
+    def rank(finding):
+        return (-SEVERITIES.index(finding[0]), os.path.relpath(finding[1], root_dir))
+    n_plus_one.sort(key=lambda finding: rank(finding) + (finding[2].line,))
+    waterfalls.sort(key=lambda finding: rank(finding) + (finding[2][0].line,))
+    timer.lap("analysis")
+    duration = time.time() - start_time
+
+    colors = {"high": RED, "medium": YELLOW, "low": CYAN}
+    def count_by_severity(findings):
+        return ", ".join(f"{severity} {sum(1 for f in findings if f[0] == severity)}" for severity in reversed(SEVERITIES))
+
+    print("\n=== QUERY PATTERNS ===")
+    print(f"Total files analyzed: {len(parsed_files)} ({len(db_modules)} query the database)")
+    print(f"N+1 candidates: {len(n_plus_one)} ({count_by_severity(n_plus_one)})")
+    print(f"Await waterfalls: {len(waterfalls)} ({count_by_severity(waterfalls)})")
+    print(f"Time taken: {duration:.2f} seconds")
+
+    if n_plus_one:
+        print("\nDatabase access inside loops (one query per iteration):")
+        for severity, file_path, call, via in n_plus_one:
+            loop = f"{call.loop} loop" if call.loop in SEQUENTIAL_LOOPS else f".{call.loop}() callback"
+            what = f"{call.callee} query" if call.direct else f"call to {call.callee} (reaches the database via {os.path.relpath(via, root_dir)})"
+            detail = ", awaited each iteration" if call.awaited and call.loop in SEQUENTIAL_LOOPS else ""
+            nested = f", {call.depth} loops deep" if call.depth > 1 else ""
+            print(f"  {colors[severity]}[{severity.upper()}]{RESET} {os.path.relpath(file_path, root_dir)}:{call.line}  "
+                  f"{what} in {loop} (line {call.loop_line}){detail}{nested}")
+    if waterfalls:
+        print("\nIndependent awaits run one after another (could use Promise.all):")
+        for severity, file_path, run in waterfalls:
+            steps = ", ".join(f"{step.callee} query" if step.direct else step.callee for step in run)
+            print(f"  {colors[severity]}[{severity.upper()}]{RESET} {os.path.relpath(file_path, root_dir)}:{run[0].line}-{run[-1].line}  "
+                  f"{len(run)} awaits: {steps}")
+    if not (n_plus_one or waterfalls):
+        print("\nNo N+1 access or await waterfalls found!")
+
+    threshold = SEVERITIES.index(args.fail_on) if args.fail_on else len(SEVERITIES)
+    return {
+        "n_plus_one": [(severity, os.path.relpath(f, root_dir), call.line) for severity, f, call, _ in n_plus_one],
+        "waterfalls": [(severity, os.path.relpath(f, root_dir), run[0].line) for severity, f, run in waterfalls],
+        "duration": duration,
+        "phases": timer.phases,
+        "failed": any(SEVERITIES.index(finding[0]) >= threshold for finding in n_plus_one + waterfalls),
+    }
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def find_duplicate_modules(args):
+    """Report files with the same code (ignoring formatting and comments) and clusters of near-duplicates."""
+    root_dir = os.path.abspath(args.dir)
+    verbose = args.verbose
+
+    print(f"Searching for duplicate modules in: {root_dir}")
+    start_time = time.time()
+    timer = PhaseTimer()
+
+    # Step 1: Fingerprint every source file (unchanged files come from the shared parse cache)
+    all_files = [normalize_path(f) for f in find_all_files(root_dir, args.files, args.exclude)]
+    cache_path = None if args.no_cache else os.path.join(root_dir, args.cache)
+    parsed_files, cache, errors = project_scan.scan_files(root_dir, all_files, args.jobs, cache_path, prune=True, kinds=("fingerprint",))
+    for file_path, error in errors.items():
+        print(f"{RED}Error reading {file_path}: {error}{RESET}")
+    if verbose:
+        print(f"Parsed {cache.misses} files, reused {cache.hits} from the parse cache")
+    timer.lap("scan")
+
+    fingerprints = {f: parsed["fingerprint"] for f, parsed in parsed_files.items()
+                    if parsed["fingerprint"]["tokens"] >= args.min_tokens}
+    sizes = {f: os.path.getsize(f) for f in fingerprints}
+
+    # Step 2: Exact duplicates share the hash of their token stream; the largest copy is kept
+    by_hash = defaultdict(list)
+    for file_path, fingerprint in fingerprints.items():
+        by_hash[fingerprint["exact"]].append(file_path)
+    exact_groups = []
+    for files in by_hash.values():
+        files.sort(key=lambda f: (-sizes[f], f))
+        if len(files) > 1:
+            exact_groups.append((sum(sizes[f] for f in files[1:]), files))
+
+    # Step 3: Candidate pairs share an uncommon shingle; one file stands in for each exact group
+    shingles = {files[0]: set(fingerprints[files[0]]["shingles"]) for files in by_hash.values()}
+    index = defaultdict(list)
+    for file_path, file_shingles in shingles.items():
+        for shingle in file_shingles:
+            index[shingle].append(file_path)
+    common = max(COMMON_SHINGLE_MIN_FILES, int(len(shingles) * COMMON_SHINGLE_SHARE))
+    candidates = set()
+    for files in index.values():
+        if 1 < len(files) <= common:
+            candidates.update((a, b) for i, a in enumerate(files) for b in files[i + 1:])
+    if verbose:
+        print(f"Fingerprinted {len(fingerprints)} files ({len(shingles)} distinct), comparing {len(candidates)} candidate pairs")
+
+    # Step 4: Cluster pairs above the similarity threshold (union-find)
+    parent = {}
+    def find(f):
+        while parent.get(f, f) != f:
+            f = parent[f] = parent.get(parent[f], parent[f])
+        return f
+    similarity = {}
+    for a, b in candidates:
+        score = jaccard(shingles[a], shingles[b])
+        if score >= args.similarity:
+            similarity[(a, b)] = similarity[(b, a)] = score
+            parent[find(a)] = find(b)
+    clusters = defaultdict(list)
+    for file_path in {f for pair in similarity for f in pair}:
+        clusters[find(file_path)].append(file_path)
+
+    near_groups = []
+    for files in clusters.values():
+        files.sort(key=lambda f: (-sizes[f], f))
+        keeper = files[0]
+        scores = [similarity.get((keeper, f)) or jaccard(shingles[keeper], shingles[f]) for f in files[1:]]
+        near_groups.append((int(sum(sizes[f] * score for f, score in zip(files[1:], scores))), files, scores))
+
+    exact_groups.sort(key=lambda group: (-group[0], group[1][0]))
+    near_groups.sort(key=lambda group: (-group[0], group[1][0]))
+    exact_savings = sum(group[0] for group in exact_groups)
+    near_savings = sum(group[0] for group in near_groups)
+    timer.lap("analysis")
+    duration = time.time() - start_time
+
+    print("\n=== DUPLICATE MODULES ===")
+    print(f"Total files analyzed: {len(parsed_files)} ({len(parsed_files) - len(fingerprints)} below {args.min_tokens} tokens)")
+    print(f"Exact duplicate groups: {len(exact_groups)} ({format_size(exact_savings)} to save)")
+    print(f"Near-duplicate clusters: {len(near_groups)} (~{format_size(near_savings)} to save at {args.similarity:.0%} similarity)")
+    print(f"Time taken: {duration:.2f} seconds")
+
+    if exact_groups:
+        print("\nExact duplicates (same code, ignoring formatting and comments):")
+        for savings, files in exact_groups:
+            print(f"  - {len(files)} copies, {format_size(savings)} to save:")
+            for file_path in files:
+                print(f"      {os.path.relpath(file_path, root_dir)}  {format_size(sizes[file_path])}")
+    if near_groups:
+        print("\nNear duplicates (similarity to the largest file; locally declared names may differ):")
+        for savings, files, scores in near_groups:
+            print(f"  - {len(files)} files, ~{format_size(savings)} to save:")
+            print(f"      {os.path.relpath(files[0], root_dir)}  {format_size(sizes[files[0]])}")
+            for file_path, score in zip(files[1:], scores):
+                copies = len(by_hash[fingerprints[file_path]["exact"]]) - 1
+                more = f" (+{copies} exact {'copy' if copies == 1 else 'copies'})" if copies else ""
+                print(f"      {os.path.relpath(file_path, root_dir)}  {format_size(sizes[file_path])}  {score:.0%}{more}")
+    if not (exact_groups or near_groups):
+        print("\nNo duplicate modules found!")
+
+    return {
+        "exact_groups": [[os.path.relpath(f, root_dir) for f in files] for _, files in exact_groups],
+        "near_groups": [[os.path.relpath(f, root_dir) for f in files] for _, files, _ in near_groups],
+        "savings": exact_savings + near_savings,
+        "duration": duration,
+        "phases": timer.phases,
+    }
+
+class PhaseTimer:
+    """Wall-clock seconds of each phase of an analysis, in order."""
+    def __init__(self):
+        self.phases = {}
+        self.last = time.time()
+
+    def lap(self, name: str):
+        now = time.time()
+        self.phases[name] = round(now - self.last, 3)
+        self.last = now
+
+def git_revision(root_dir: str) -> Tuple[str, str]:
+    """The checked out commit and branch (CI variables first), or None for either outside a git work tree."""
+    def git(*git_args):
+        try:
+            result = subprocess.run(["git", *git_args], cwd=root_dir, capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
+    branch = next((os.environ[v] for v in ("GITHUB_HEAD_REF", "GITHUB_REF_NAME", "CI_COMMIT_REF_NAME") if os.environ.get(v)), None)
+    return git("rev-parse", "HEAD"), branch or git("rev-parse", "--abbrev-ref", "HEAD")
+
+class AnalysisHistory:
+    """
+    Every run of every mode in a SQLite file: counts, phase timings and result sets, keyed by git commit.
+
+    Result sets are stored as deltas against the previous run of the same mode (one row per path that
+    appeared or disappeared), with paths interned to integer ids. Every SNAPSHOT_INTERVAL-th run also
+    stores its full sets, so a run's sets are its latest snapshot plus the deltas after it, and "what
+    changed since run X" is one aggregate over the deltas in between.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            mode TEXT NOT NULL,
+            commit_sha TEXT,
+            branch TEXT,
+            started_at TEXT NOT NULL,
+            duration REAL NOT NULL,
+            counts TEXT NOT NULL,
+            snapshot INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_mode ON runs (mode, id);
+        CREATE INDEX IF NOT EXISTS runs_by_commit ON runs (commit_sha);
+        CREATE TABLE IF NOT EXISTS phases (
+            run_id INTEGER NOT NULL, position INTEGER NOT NULL, phase TEXT NOT NULL, seconds REAL NOT NULL,
+            PRIMARY KEY (run_id, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL,
+            UNIQUE (kind, value)
+        );
+        CREATE TABLE IF NOT EXISTS changes (
+            run_id INTEGER NOT NULL, item_id INTEGER NOT NULL, added INTEGER NOT NULL,
+            PRIMARY KEY (run_id, item_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS snapshots (
+            run_id INTEGER NOT NULL, item_id INTEGER NOT NULL,
+            PRIMARY KEY (run_id, item_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def item_ids(self, kind: str, values) -> Set[int]:
+        values = set(values)
+        self.connection.executemany("INSERT OR IGNORE INTO items (kind, value) VALUES (?, ?)", [(kind, v) for v in values])
+        rows = self.connection.execute("SELECT id, value FROM items WHERE kind = ?", (kind,))
+        return {item_id for item_id, value in rows if value in values}
+
+    def members(self, run_id: int, mode: str) -> Set[int]:
+        """Item ids of a run's result sets: its latest snapshot, plus the deltas recorded after it."""
+        (base,) = self.connection.execute(
+            "SELECT MAX(id) FROM runs WHERE mode = ? AND snapshot = 1 AND id <= ?", (mode, run_id)).fetchone()
+        items = {item_id for (item_id,) in self.connection.execute("SELECT item_id FROM snapshots WHERE run_id = ?", (base,))}
+        rows = self.connection.execute("""
+            SELECT item_id, SUM(CASE added WHEN 1 THEN 1 ELSE -1 END) FROM changes JOIN runs ON runs.id = run_id
+            WHERE mode = ? AND run_id > ? AND run_id <= ? GROUP BY item_id
+        """, (mode, base, run_id))
+        for item_id, net in rows:
+            if net > 0:
+                items.add(item_id)
+            elif net < 0:
+                items.discard(item_id)
+        return items
+
+    def record(self, mode: str, results: Dict, commit: str, branch: str) -> int:
+        """Store one run; returns its id."""
+        sets = HISTORY_SETS[mode]
+        counts = {key: len(value) if isinstance(value, list) else value for key, value in results.items()
+                  if isinstance(value, (int, list)) and not isinstance(value, bool)}
+        with self.connection:
+            previous = self.connection.execute("SELECT MAX(id), COUNT(*) FROM runs WHERE mode = ?", (mode,)).fetchone()
+            snapshot = previous[1] % SNAPSHOT_INTERVAL == 0
+            cursor = self.connection.execute(
+                "INSERT INTO runs (mode, commit_sha, branch, started_at, duration, counts, snapshot) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (mode, commit, branch, datetime.now().isoformat(timespec="seconds"), round(results["duration"], 3),
+                 json.dumps(counts), int(snapshot)))
+            run_id = cursor.lastrowid
+            self.connection.executemany("INSERT INTO phases (run_id, position, phase, seconds) VALUES (?, ?, ?, ?)",
+                                        [(run_id, position, phase, seconds)
+                                         for position, (phase, seconds) in enumerate(results.get("phases", {}).items())])
+            current = set()
+            for kind in sets:
+                current |= self.item_ids(kind, results[kind])
+            before = self.members(previous[0], mode) if previous[0] else set()
+            self.connection.executemany("INSERT INTO changes (run_id, item_id, added) VALUES (?, ?, ?)",
+                                        [(run_id, item_id, 1) for item_id in current - before] +
+                                        [(run_id, item_id, 0) for item_id in before - current])
+            if snapshot:
+                self.connection.executemany("INSERT INTO snapshots (run_id, item_id) VALUES (?, ?)", [(run_id, i) for i in current])
+        return run_id
+
+    def find_run(self, mode: str, commit: str = None):
+        """The latest run of a mode (at a commit, which may be abbreviated) as (id, commit, started_at), or None."""
+        if commit is None:
+            return self.connection.execute(
+                "SELECT id, commit_sha, started_at FROM runs WHERE mode = ? ORDER BY id DESC LIMIT 1", (mode,)).fetchone()
+        return self.connection.execute(
+            "SELECT id, commit_sha, started_at FROM runs WHERE mode = ? AND commit_sha LIKE ? ORDER BY id DESC LIMIT 1",
+            (mode, commit + "%")).fetchone()
+
+    def changes_between(self, mode: str, first_id: int, last_id: int) -> Dict[str, Tuple[List[str], List[str]]]:
+        """Per result set, the values added and removed from run first_id to run last_id."""
+        rows = self.connection.execute("""
+            SELECT kind, value, SUM(CASE added WHEN 1 THEN 1 ELSE -1 END) AS net
+            FROM changes JOIN runs ON runs.id = run_id JOIN items ON items.id = item_id
+            WHERE mode = ? AND run_id > ? AND run_id <= ? GROUP BY item_id HAVING net != 0 ORDER BY kind, value
+        """, (mode, first_id, last_id))
+        changes = {kind: ([], []) for kind in HISTORY_SETS[mode]}
+        for kind, value, net in rows:
+            changes.setdefault(kind, ([], []))[0 if net > 0 else 1].append(value)
+        return changes
+
+    def recent_runs(self, mode: str, limit: int) -> List[Dict]:
+        """The last `limit` runs of a mode, oldest first, with their counts and phase timings."""
+        rows = self.connection.execute(
+            "SELECT id, commit_sha, started_at, duration, counts FROM runs WHERE mode = ? ORDER BY id DESC LIMIT ?",
+            (mode, limit)).fetchall()
+        runs = [{"id": r[0], "commit": r[1], "started_at": r[2], "duration": r[3], "counts": json.loads(r[4]), "phases": {}}
+                for r in reversed(rows)]
+        by_id = {run["id"]: run for run in runs}
+        if runs:
+            for run_id, phase, seconds in self.connection.execute(
+                    "SELECT run_id, phase, seconds FROM phases WHERE run_id >= ? ORDER BY run_id, position", (runs[0]["id"],)):
+                if run_id in by_id:
+                    by_id[run_id]["phases"][phase] = seconds
+        return runs
+
+def selected_mode(args) -> str:
+    for mode in ("assets", "schema", "queries", "duplicates"):
+        if getattr(args, mode):
+            return mode
+    return "unused"
+
+def record_run(args, mode: str, results: Dict):
+    """Add a finished run to the analysis history (unless --no-history)."""
+    if args.no_history or not results:
+        return
+    root_dir = os.path.abspath(args.dir)
+    history_path = os.path.join(root_dir, args.history)
+    try:
+        history = AnalysisHistory(history_path)
+        try:
+            run_id = history.record(mode, results, *git_revision(root_dir))
+        finally:
+            history.close()
+    except sqlite3.Error as e:
+        print(f"{YELLOW}Could not record the run in {history_path}: {e}{RESET}")
+        return
+    if args.verbose:
+        print(f"Recorded as run #{run_id} in {os.path.relpath(history_path, root_dir)}")
+
+def short_commit(commit: str) -> str:
+    return commit[:7] if commit else "-"
+
+def show_changes_since(history: AnalysisHistory, mode: str, commit: str):
+    """Print what each result set of a mode gained and lost since the last run at a commit; False if there is none."""
+    base, latest = history.find_run(mode, commit), history.find_run(mode)
+    if not base:
+        print(f"{RED}No recorded {mode} run at commit {commit}{RESET}")
+        return False
+    print(f"\n=== {mode.upper()} SINCE {short_commit(base[1])} ===")
+    print(f"Comparing run #{base[0]} ({short_commit(base[1])}, {base[2]}) with run #{latest[0]} ({short_commit(latest[1])}, {latest[2]})")
+    for kind, (added, removed) in history.changes_between(mode, base[0], latest[0]).items():
+        label = kind.replace('_', ' ')
+        print(f"\nNew {label}: {len(added)}")
+        for value in added:
+            print(f"  {RED}+ {value}{RESET}")
+        print(f"No longer {label}: {len(removed)}")
+        for value in removed:
+            print(f"  {GREEN}- {value}{RESET}")
+    if not HISTORY_SETS[mode]:
+        print(f"\n{YELLOW}No result sets are recorded for {mode} runs; use --trend to compare counts{RESET}")
+    return True
+
+def show_trend(history: AnalysisHistory, mode: str, limit: int):
+    """Print counts, durations and phase timings of recent runs, and how the duration moved."""
+    runs = history.recent_runs(mode, limit)
+    if not runs:
+        print(f"{YELLOW}No recorded {mode} runs yet{RESET}")
+        return
+    count_keys = list(dict.fromkeys(key for run in runs for key in run["counts"]))
+    phase_keys = list(dict.fromkeys(phase for run in runs for phase in run["phases"]))
+
+    print(f"\n=== {mode.upper()} TREND (last {len(runs)} runs) ===")
+    header = f"{'run':>5}  {'date':<19}  {'commit':<7}  {'seconds':>7}"
+    header += "".join(f"  {key:>{max(len(key), 6)}}" for key in count_keys + phase_keys)
+    print(f"{BOLD}{header}{RESET}")
+    for run in runs:
+        line = f"{run['id']:>5}  {run['started_at']:<19}  {short_commit(run['commit']):<7}  {run['duration']:>7.2f}"
+        line += "".join(f"  {run['counts'].get(key, ''):>{max(len(key), 6)}}" for key in count_keys)
+        line += "".join(f"  {run['phases'].get(phase, ''):>{max(len(phase), 6)}}" for phase in phase_keys)
+        print(line)
+
+    durations = [run["duration"] for run in runs]
+    print(f"\nDuration: min {min(durations):.2f}s, median {median(durations):.2f}s, max {max(durations):.2f}s")
+    if len(runs) > 1 and durations[0]:
+        change = (durations[-1] - durations[0]) / durations[0]
+        color = RED if change > 0 else GREEN
+        print(f"Latest vs oldest: {color}{change:+.0%}{RESET}")
+    for phase in phase_keys:
+        seconds = [run["phases"][phase] for run in runs if phase in run["phases"]]
+        print(f"  {phase}: median {median(seconds):.3f}s, latest {seconds[-1]:.3f}s")
+
 def main():
+    args = parse_arguments()
+    mode = selected_mode(args)
+    if args.since or args.trend:
+        history_path = os.path.join(os.path.abspath(args.dir), args.history)
+        if not os.path.exists(history_path):
+            print(f"{RED}No analysis history at {history_path}{RESET}")
+            sys.exit(1)
+        history = AnalysisHistory(history_path)
+        try:
+            found = show_changes_since(history, mode, args.since) if args.since else True
+            if args.trend:
+                show_trend(history, mode, args.trend)
+        finally:
+            history.close()
+        if not found:
+            sys.exit(1)
+        return
+    if args.assets:
+        record_run(args, mode, find_unused_assets(args))
+        return
+    if args.schema:
+        record_run(args, mode, find_schema_issues(args))
+        return
+    if args.duplicates:
+        record_run(args, mode, find_duplicate_modules(args))
+        return
+    if args.queries:
+        results = find_query_patterns(args)
+        record_run(args, mode, results)
+        if results and results["failed"]:
+            sys.exit(1)
+        return
+    if args.unused:
+        record_run(args, mode, find_unused_files(args))
+        return
+
     print_banner()
 
     while True:
         choice = print_menu()
 
         if choice == '1':
-            args = parse_arguments()
             results = find_unused_files(args)
+            record_run(args, "unused", results)
             print(f"\n{GREEN}Analysis complete! Use other menu options to manage results.{RESET}")
 
         elif choice == '2':
@@ -1,16 +1,52 @@
 #!/usr/bin/env python3
 import os
 import re
+import json
+import difflib
+import hashlib
 import argparse
 import shutil
+import subprocess
+import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import project_scan # Shared walker, import tokenizer and parse cache (commands/project_scan.py)
+
 # --- Configuration ---
 NEXT_CONFIG_FILES = ["next.config.js", "next.config.ts", "next.config.mjs"]
 UI_COMPONENTS_REL_PATH = Path("src/shared/components/ui")
 BARREL_FILE_NAME = "index.ts"
 DEFAULT_UI_IMPORT_ALIAS = "ui"
+DEFAULT_CONFIG_FILE_NAME = "import-barrels.json"
+TSCONFIG_FILE_NAME = "tsconfig.json"
+AUTO_GENERATED_HEADER = "// Auto-generated by script"
+DEFAULT_CACHE_FILE_NAME = ".import-barrels-cache.json"
+CACHE_FORMAT_VERSION = 1
+SOURCE_ROOT_REL_PATH = Path("src")
+SOURCE_ROOT_ALIAS = "@"
+MODULE_EXTENSIONS = [".tsx", ".ts"]
+DEFAULT_PARALLEL_JOBS = os.cpu_count()
+PARALLEL_MIN_FILES = 32 # Below this, process start-up costs more than the rewrite itself
+SERVER_WATCH_INTERVAL = 1.0 # Seconds between checks of the barrel directories in --server mode
+SCAN_KINDS = ("imports",) # The only project_scan parser the rewrite needs, so pre-commit runs skip the others
+
+# --- Export map patterns (used by --debarrel) ---
+EXPORT_STAR_REGEX = re.compile(r"export\s+\*\s+from\s+(['\"])([^'\"]+)\1")
+EXPORT_NAMED_FROM_REGEX = re.compile(r"export\s+(?:type\s+)?\{([^}]+)\}\s+from\s+(['\"])([^'\"]+)\2")
+EXPORT_LOCAL_LIST_REGEX = re.compile(r"^\s*export\s+(?:type\s+)?\{([^}]+)\}\s*;?\s*$", re.MULTILINE)
+EXPORT_DECLARATION_REGEX = re.compile(
+    r"^\s*export\s+(?:declare\s+)?(?:async\s+)?(?:abstract\s+)?"
+    r"(?:const|let|var|function\*?|class|interface|type|enum)\s+([A-Za-z_$][\w$]*)",
+    re.MULTILINE
+)
+
+# --- Import patterns ---
+NAMED_IMPORT_REGEX = re.compile(r"import\s+(?:type\s+)?\{([^}]+)\}\s+from\s+(['\"])([^'\"]+)\2;?")
+OTHER_IMPORT_REGEX = re.compile(r"import\s+.*;") # General import regex to find other imports
 
 # --- Colorama for colored output ---
 try:
@@ -25,74 +61,347 @@ try:
 except ImportError:
     GREEN = YELLOW = RED = CYAN = MAGENTA = RESET = ""
 
+# --- Structured Event Log ---
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+ANSI_ESCAPE_REGEX = re.compile(r"\x1b\[[0-9;]*m")
+
+class EventLog:
+    # Buffers events instead of printing line by line. Console output is filtered by level
+    # (per-file chatter is debug and therefore opt-in); recorded events can be written out as JSON lines.
+    def __init__(self, console_level="warning", record_level=None, flush_every=200, stream=None):
+        self.stream = stream # Defaults to stdout; --server keeps stdout for responses and logs to stderr
+        self.console_threshold = LOG_LEVELS[console_level] if console_level else None
+        self.record_threshold = LOG_LEVELS[record_level] if record_level else None
+        self.flush_every = flush_every
+        self.started_at = time.time()
+        self.events = []         # (timestamp, level, event, message, fields)
+        self.console_buffer = []
+        self.counts = defaultdict(int)
+
+    def emit(self, level, event, message, **fields):
+        self.counts[level] += 1
+        severity = LOG_LEVELS[level]
+        if self.record_threshold is not None and severity >= self.record_threshold:
+            self.events.append((time.time(), level, event, message, fields))
+        if self.console_threshold is not None and severity >= self.console_threshold:
+            self.write_console(message)
+
+    def announce(self, level, event, message, **fields):
+        # Recorded like any other event, but shown on the console whatever its level (e.g. where the server listens)
+        self.emit(level, event, message, **fields)
+        if self.console_threshold is not None and LOG_LEVELS[level] < self.console_threshold:
+            self.write_console(message)
+
+    def replay(self, events):
+        # Events recorded in a worker process are re-emitted so the parent's filters apply
+        for _, level, event, message, fields in events:
+            self.emit(level, event, message, **fields)
+
+    def summary(self, message):
+        # Summary lines are always shown, whatever the console level
+        self.write_console(message)
+
+    def write_console(self, message):
+        self.console_buffer.append(message)
+        if len(self.console_buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.console_buffer:
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(self.console_buffer) + "\n")
+            stream.flush()
+            self.console_buffer = []
+
+    def write_json_lines(self, destination: str):
+        lines = [
+            json.dumps({
+                "ts": round(timestamp, 3),
+                "level": level,
+                "event": event,
+                "message": ANSI_ESCAPE_REGEX.sub("", message).strip(),
+                **fields
+            })
+            for timestamp, level, event, message, fields in self.events
+        ]
+        output = "\n".join(lines) + "\n" if lines else ""
+        if destination == "-":
+            self.flush()
+            sys.stdout.write(output)
+            return
+        try:
+            with open(destination, "w", encoding="utf-8") as f:
+                f.write(output)
+        except IOError as e:
+            self.summary(f"{RED}Error writing event log {MAGENTA}{destination}{RESET}: {e}")
+
+EVENT_LOG = EventLog()
+
+def emit(level, event, message, **fields):
+    EVENT_LOG.emit(level, event, message, **fields)
+
 # --- Helper Functions ---
 
 def find_project_root(start_path="."):
     current_path = Path(start_path).resolve()
-    print(f"{CYAN}Attempting to find project root starting from: {MAGENTA}{current_path}{RESET}")
+    emit("debug", "project_root_search", f"{CYAN}Attempting to find project root starting from: {MAGENTA}{current_path}{RESET}")
     while True:
         for config_file in NEXT_CONFIG_FILES:
             if (current_path / config_file).is_file():
-                print(f"{GREEN}Found project root at: {MAGENTA}{current_path}{RESET}")
+                emit("debug", "project_root_found", f"{GREEN}Found project root at: {MAGENTA}{current_path}{RESET}", root=str(current_path))
                 return current_path
         parent_path = current_path.parent
         if parent_path == current_path:
-            print(f"{RED}Error: Could not find project root ({'/'.join(NEXT_CONFIG_FILES)} not found).{RESET}")
-            print(f"{YELLOW}Please ensure you are running the script from within your project or use the --root option.{RESET}")
+            emit("error", "project_root_missing", f"{RED}Error: Could not find project root ({'/'.join(NEXT_CONFIG_FILES)} not found).{RESET}")
+            emit("warning", "project_root_hint", f"{YELLOW}Please ensure you are running the script from within your project or use the --root option.{RESET}")
             return None
         current_path = parent_path
 
 def find_tsx_files(target_path: Path):
-    print(f"{CYAN}Searching for .tsx files in: {MAGENTA}{target_path.resolve()}{RESET}")
-    tsx_files = list(target_path.rglob("*.tsx"))
+    emit("debug", "scan_start", f"{CYAN}Searching for .tsx files in: {MAGENTA}{target_path}{RESET}")
+    tsx_files = project_scan.walk_source_files(target_path, ["tsx"]) # Same exclusions as check-unused.py (node_modules, .next, ...)
     if tsx_files:
-        print(f"{GREEN}Found {len(tsx_files)} .tsx files to analyze.{RESET}")
+        emit("info", "scan_complete", f"{GREEN}Found {len(tsx_files)} .tsx files to analyze.{RESET}", files=len(tsx_files))
     else:
-        print(f"{YELLOW}No .tsx files found in {MAGENTA}{target_path.resolve()}{RESET}.")
+        emit("warning", "scan_empty", f"{YELLOW}No .tsx files found in {MAGENTA}{target_path}{RESET}.")
     return tsx_files
 
-def create_barrel_file(project_root: Path, dry_run=False):
-    ui_dir_abs_path = (project_root / UI_COMPONENTS_REL_PATH).resolve()
-    barrel_file_abs_path = (ui_dir_abs_path / BARREL_FILE_NAME).resolve()
+# --- Barrel Configuration ---
 
-    print(f"{CYAN}Checking UI components directory: {MAGENTA}{ui_dir_abs_path}{RESET}")
-    if not ui_dir_abs_path.exists() or not ui_dir_abs_path.is_dir():
-        print(f"{YELLOW}UI components directory not found: {MAGENTA}{ui_dir_abs_path}{RESET}")
-        print(f"{YELLOW}Skipping barrel file creation. Please ensure the path '{UI_COMPONENTS_REL_PATH}' is correct.{RESET}")
-        return False, barrel_file_abs_path
+def make_barrel(project_root: Path, alias: str, rel_dir, barrel_file_name=BARREL_FILE_NAME, generate=True):
+    rel_dir = Path(rel_dir)
+    abs_dir = (project_root / rel_dir).resolve()
+    try:
+        match_path = abs_dir.relative_to((project_root / SOURCE_ROOT_REL_PATH).resolve()).as_posix()
+    except ValueError:
+        match_path = rel_dir.as_posix()
+    return {
+        "alias": alias,
+        "dir": rel_dir,
+        "abs_dir": abs_dir,
+        "barrel_file": barrel_file_name,
+        "barrel_path": abs_dir / barrel_file_name,
+        "generate": generate,
+        # Names a hand-written barrel file re-exports (filled in by load_barrel_exports); None for generated
+        # barrels, which re-export every module in the directory
+        "exports": None,
+        # Matches non-relative specifiers pointing at a module inside the barrel directory,
+        # e.g. '@/shared/components/ui/button' for the 'src/shared/components/ui' barrel.
+        "specifier_regex": re.compile(r"(?:^|/)" + re.escape(match_path) + r"/[^/]+$"),
+    }
+
+def is_generated_barrel(barrel_file_path: Path):
+    try:
+        with open(barrel_file_path, "r", encoding="utf-8") as f:
+            return f.readline().strip() == AUTO_GENERATED_HEADER
+    except IOError:
+        return False
+
+def derive_barrels_from_tsconfig(project_root: Path):
+    tsconfig_path = project_root / TSCONFIG_FILE_NAME
+    try:
+        with open(tsconfig_path, "r", encoding="utf-8") as f:
+            paths = json.load(f).get("compilerOptions", {}).get("paths", {})
+    except (IOError, json.JSONDecodeError) as e:
+        emit("warning", "tsconfig_unreadable", f"{YELLOW}Warning: Could not read paths from {MAGENTA}{tsconfig_path}{RESET}: {e}", error=str(e))
+        return []
+
+    barrels = []
+    for alias, targets in paths.items():
+        for target in targets:
+            if alias.endswith("/*") and target.endswith("/*"):
+                # Wildcard alias: every sub-directory with an index file is its own barrel (e.g. 'modules/tasks')
+                base_dir = project_root / target[:-2]
+                if not base_dir.is_dir():
+                    continue
+                for sub_dir in sorted(d for d in base_dir.iterdir() if d.is_dir()):
+                    index_file = next((sub_dir / f"index{ext}" for ext in MODULE_EXTENSIONS if (sub_dir / f"index{ext}").is_file()), None)
+                    if index_file:
+                        barrels.append(make_barrel(
+                            project_root, f"{alias[:-2]}/{sub_dir.name}", sub_dir.relative_to(project_root),
+                            index_file.name, is_generated_barrel(index_file)
+                        ))
+            elif "*" not in alias and Path(target).stem == "index" and Path(target).suffix in MODULE_EXTENSIONS:
+                # Exact alias pointing straight at a barrel file (e.g. 'ui' -> './src/shared/components/ui/index.ts')
+                barrels.append(make_barrel(
+                    project_root, alias, Path(target).parent, Path(target).name,
+                    is_generated_barrel(project_root / target)
+                ))
+    return barrels
 
-    print(f"{CYAN}Scanning UI components in: {MAGENTA}{ui_dir_abs_path}{RESET} to create barrel file '{BARREL_FILE_NAME}'")
+def load_barrel_config(project_root: Path, config_arg=None, from_tsconfig=False, ui_alias=DEFAULT_UI_IMPORT_ALIAS):
+    config_path = Path(config_arg) if config_arg else Path(DEFAULT_CONFIG_FILE_NAME)
+    if not config_path.is_absolute():
+        config_path = project_root / config_path
+
+    configured_barrels = []
+    if config_path.is_file():
+        emit("debug", "config_load", f"{CYAN}Loading barrel configuration from: {MAGENTA}{config_path}{RESET}", config=str(config_path))
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            from_tsconfig = from_tsconfig or config.get("fromTsconfig", False)
+            for entry in config.get("barrels", []):
+                configured_barrels.append(make_barrel(
+                    project_root, entry["alias"], entry["dir"],
+                    entry.get("barrelFile", BARREL_FILE_NAME), entry.get("generate", True)
+                ))
+        except (IOError, json.JSONDecodeError, KeyError) as e:
+            emit("error", "config_invalid", f"{RED}Error: Invalid barrel configuration in {MAGENTA}{config_path}{RESET}: {e}", error=str(e))
+            return None
+    elif config_arg:
+        emit("error", "config_missing", f"{RED}Error: Barrel configuration file '{MAGENTA}{config_path}{RESET}' does not exist.", config=str(config_path))
+        return None
+
+    barrels_by_dir = {}
+    if from_tsconfig:
+        # Prefer the shortest alias when several tsconfig paths point at the same directory ('core/x' over '@/core/x')
+        for barrel in sorted(derive_barrels_from_tsconfig(project_root), key=lambda b: len(b["alias"])):
+            barrels_by_dir.setdefault(barrel["abs_dir"], barrel)
+    for barrel in configured_barrels:
+        barrels_by_dir[barrel["abs_dir"]] = barrel # Explicit entries win over derived ones
+
+    if not barrels_by_dir:
+        default_barrel = make_barrel(project_root, ui_alias, UI_COMPONENTS_REL_PATH)
+        barrels_by_dir[default_barrel["abs_dir"]] = default_barrel
+
+    barrels = list(barrels_by_dir.values())
+    emit("info", "barrels_configured", f"{GREEN}Configured {len(barrels)} barrel(s):{RESET}", barrels=len(barrels))
+    for barrel in barrels:
+        generated_note = "" if barrel["generate"] else f" {YELLOW}(barrel file not regenerated){RESET}"
+        emit("debug", "barrel_configured", f"  {CYAN}'{barrel['alias']}'{RESET} -> {MAGENTA}{barrel['dir'].as_posix()}/{barrel['barrel_file']}{RESET}{generated_note}", alias=barrel['alias'], dir=barrel['dir'].as_posix())
+    return barrels
+
+def find_barrel_for_specifier(specifier: str, tsx_dir: Path, barrels):
+    for barrel in barrels:
+        if tsx_dir == barrel["abs_dir"]:
+            continue # Modules inside a barrel must not import their own barrel (circular import)
+        if specifier == barrel["alias"]:
+            return barrel
+        if specifier.startswith('.'):
+            # Pure path arithmetic: avoids a filesystem round-trip per relative import
+            target = Path(os.path.normpath(tsx_dir / specifier))
+            if target.parent == barrel["abs_dir"] and target.name != Path(barrel["barrel_file"]).stem:
+                return barrel
+        elif barrel["specifier_regex"].search(specifier) and not specifier.endswith("/" + Path(barrel["barrel_file"]).stem):
+            return barrel
+    return None
+
+# --- Staged Files (pre-commit mode) ---
+
+def run_git(project_root: Path, git_args):
+    result = subprocess.run(["git", *git_args], cwd=project_root, capture_output=True, text=True)
+    if result.returncode != 0:
+        emit("error", "git_failed", f"{RED}Error running 'git {' '.join(git_args)}': {result.stderr.strip()}{RESET}", args=git_args)
+        return None
+    return result.stdout
+
+def get_staged_changes(project_root: Path):
+    # Returns [(status_letter, [path, ...])] relative to project_root; renames/copies carry (old, new)
+    output = run_git(project_root, ["diff", "--cached", "--name-status", "-z", "--relative", "-M"])
+    if output is None:
+        return None
+    tokens = output.split("\0")
+    changes = []
+    i = 0
+    while i < len(tokens) and tokens[i]:
+        status = tokens[i][0]
+        path_count = 2 if status in ("R", "C") else 1
+        changes.append((status, tokens[i + 1:i + 1 + path_count]))
+        i += 1 + path_count
+    return changes
+
+def get_partially_staged_paths(project_root: Path):
+    # Files with unstaged edits on top of staged ones; rewriting and re-adding them would stage those edits too
+    output = run_git(project_root, ["diff", "--name-only", "-z", "--relative"])
+    return set(filter(None, output.split("\0"))) if output else set()
+
+def barrel_structure_changed(barrel, staged_changes, project_root: Path):
+    # Only additions, deletions and renames change what a generated barrel exports
+    for status, paths in staged_changes:
+        if status not in ("A", "D", "R", "C"):
+            continue
+        for path in paths:
+            file_path = project_root / path
+            if file_path.parent.resolve() == barrel["abs_dir"] and file_path.name != barrel["barrel_file"]:
+                return True
+    return False
+
+def find_staged_tsx_files(project_root: Path, staged_changes):
+    partially_staged = get_partially_staged_paths(project_root)
+    staged_files = []
+    for status, paths in staged_changes:
+        if status == "D" or not paths[-1].endswith(".tsx"):
+            continue
+        if paths[-1] in partially_staged:
+            emit("warning", "staged_partial_skip", f"  {YELLOW}Skipping partially staged file (stage or stash its remaining changes first): {MAGENTA}{paths[-1]}{RESET}", path=paths[-1])
+            continue
+        staged_files.append(project_root / paths[-1])
+    emit("info", "staged_scan_complete", f"{GREEN}Found {len(staged_files)} staged .tsx file(s) to analyze.{RESET}", files=len(staged_files))
+    return staged_files
+
+def restage_files(project_root: Path, file_paths):
+    if not file_paths:
+        return
+    rel_paths = [os.path.relpath(path, project_root) for path in file_paths]
+    if run_git(project_root, ["add", "--", *rel_paths]) is not None:
+        emit("info", "restaged", f"{GREEN}Re-staged {len(rel_paths)} file(s).{RESET}", files=len(rel_paths))
+
+# --- Barrel Files ---
+
+# Returns the generated barrel file content, or None when the directory has no modules to export
+def build_barrel_content(barrel):
+    ui_dir_abs_path = barrel["abs_dir"]
+    barrel_file_abs_path = barrel["barrel_path"]
+    barrel_file_name = barrel["barrel_file"]
+
+    emit("debug", "barrel_scan", f"{CYAN}Scanning components in: {MAGENTA}{ui_dir_abs_path}{RESET} to create barrel file '{barrel_file_name}'", alias=barrel['alias'])
     component_files = [
         f for f in ui_dir_abs_path.iterdir()
-        if f.is_file() and (f.name.endswith(".ts") or f.name.endswith(".tsx")) and f.name != BARREL_FILE_NAME
+        if f.is_file() and (f.name.endswith(".ts") or f.name.endswith(".tsx")) and f.name != barrel_file_name
     ]
 
     if not component_files:
-        print(f"{YELLOW}No component files (ending in .ts or .tsx, excluding {BARREL_FILE_NAME}) found in {MAGENTA}{ui_dir_abs_path}{RESET} to export.")
-        return False, barrel_file_abs_path
+        emit("warning", "barrel_empty", f"{YELLOW}No component files (ending in .ts or .tsx, excluding {barrel_file_name}) found in {MAGENTA}{ui_dir_abs_path}{RESET} to export.", alias=barrel['alias'])
+        return None
 
     exports = []
-    print(f"{CYAN}The following components will be exported in '{MAGENTA}{barrel_file_abs_path}{RESET}':")
+    emit("debug", "barrel_exports", f"{CYAN}The following components will be exported in '{MAGENTA}{barrel_file_abs_path}{RESET}':", alias=barrel['alias'])
     for comp_file in sorted(component_files):
         module_name = comp_file.stem
         exports.append(f"export * from './{module_name}';")
-        print(f"  {GREEN}export * from './{module_name}';{RESET} (from {comp_file.name})")
+        emit("debug", "barrel_export", f"  {GREEN}export * from './{module_name}';{RESET} (from {comp_file.name})", module=module_name)
+
+    return AUTO_GENERATED_HEADER + "\n" + "\n".join(exports) + "\n"
 
-    barrel_content = "// Auto-generated by script\n" + "\n".join(exports) + "\n"
+def create_barrel_file(project_root: Path, barrel, dry_run=False):
+    ui_dir_abs_path = barrel["abs_dir"]
+    barrel_file_abs_path = barrel["barrel_path"]
+
+    emit("debug", "barrel_check", f"{CYAN}Checking components directory for '{barrel['alias']}': {MAGENTA}{ui_dir_abs_path}{RESET}", alias=barrel['alias'])
+    if not ui_dir_abs_path.exists() or not ui_dir_abs_path.is_dir():
+        emit("warning", "barrel_dir_missing", f"{YELLOW}Components directory not found: {MAGENTA}{ui_dir_abs_path}{RESET}", alias=barrel['alias'])
+        emit("warning", "barrel_skipped", f"{YELLOW}Skipping barrel file creation. Please ensure the path '{barrel['dir']}' is correct.{RESET}", alias=barrel['alias'])
+        return False, barrel_file_abs_path
+
+    barrel_content = build_barrel_content(barrel)
+    if barrel_content is None:
+        return False, barrel_file_abs_path
 
     if dry_run:
-        print(f"{YELLOW}[DRY RUN]{RESET} Would create/update barrel file at: {MAGENTA}{barrel_file_abs_path}{RESET}")
-        print(f"{YELLOW}[DRY RUN]{RESET} Barrel file content would be:\n{CYAN}{barrel_content}{RESET}")
+        emit("info", "barrel_would_write", f"{YELLOW}[DRY RUN]{RESET} Would create/update barrel file at: {MAGENTA}{barrel_file_abs_path}{RESET}", path=str(barrel_file_abs_path))
+        emit("debug", "barrel_preview", f"{YELLOW}[DRY RUN]{RESET} Barrel file content would be:\n{CYAN}{barrel_content}{RESET}")
         return True, barrel_file_abs_path
 
     try:
-        print(f"{CYAN}Writing barrel file to: {MAGENTA}{barrel_file_abs_path}{RESET}")
+        emit("debug", "barrel_write", f"{CYAN}Writing barrel file to: {MAGENTA}{barrel_file_abs_path}{RESET}", path=str(barrel_file_abs_path))
         with open(barrel_file_abs_path, "w", encoding="utf-8") as f:
             f.write(barrel_content)
-        print(f"{GREEN}Successfully created/updated barrel file: {MAGENTA}{barrel_file_abs_path}{RESET}")
+        emit("info", "barrel_written", f"{GREEN}Successfully created/updated barrel file: {MAGENTA}{barrel_file_abs_path}{RESET}", path=str(barrel_file_abs_path))
         return True, barrel_file_abs_path
     except IOError as e:
-        print(f"{RED}Error writing barrel file {MAGENTA}{barrel_file_abs_path}{RESET}: {e}")
+        emit("error", "barrel_write_failed", f"{RED}Error writing barrel file {MAGENTA}{barrel_file_abs_path}{RESET}: {e}", path=str(barrel_file_abs_path), error=str(e))
         return False, barrel_file_abs_path
 
 def get_backup_file_path(file_path: Path):
@@ -103,10 +412,10 @@ def backup_file(file_path: Path, dry_run=False): # dry_run is not strictly neede
     # No dry_run check here, assume it's handled by caller
     try:
         shutil.copy2(file_path, backup_path)
-        print(f"  {CYAN}Backed up {MAGENTA}{file_path.resolve()}{RESET} to {MAGENTA}{backup_path.resolve()}{RESET}")
+        emit("debug", "backup_created", f"  {CYAN}Backed up {MAGENTA}{file_path}{RESET} to {MAGENTA}{backup_path}{RESET}", path=str(file_path))
         return True
     except Exception as e:
-        print(f"  {RED}Error backing up {MAGENTA}{file_path.resolve()}{RESET}: {e}")
+        emit("error", "backup_failed", f"  {RED}Error backing up {MAGENTA}{file_path}{RESET}: {e}", path=str(file_path), error=str(e))
         return False
 
 def revert_file(file_path: Path, dry_run=False):
@@ -116,145 +425,612 @@ def revert_file(file_path: Path, dry_run=False):
         if not dry_run:
             try:
                 shutil.move(str(backup_path), str(resolved_file_path))
-                print(f"  {GREEN}Reverted {MAGENTA}{resolved_file_path}{RESET} from {MAGENTA}{backup_path}{RESET}")
+                emit("info", "reverted", f"  {GREEN}Reverted {MAGENTA}{resolved_file_path}{RESET} from {MAGENTA}{backup_path}{RESET}", path=str(resolved_file_path))
                 return True
             except Exception as e:
-                print(f"  {RED}Error reverting {MAGENTA}{resolved_file_path}{RESET}: {e}")
+                emit("error", "revert_failed", f"  {RED}Error reverting {MAGENTA}{resolved_file_path}{RESET}: {e}", path=str(resolved_file_path), error=str(e))
                 return False
         else:
-            print(f"  {YELLOW}[DRY RUN]{RESET} Would revert {MAGENTA}{resolved_file_path}{RESET} from {MAGENTA}{backup_path}{RESET}")
+            emit("info", "would_revert", f"  {YELLOW}[DRY RUN]{RESET} Would revert {MAGENTA}{resolved_file_path}{RESET} from {MAGENTA}{backup_path}{RESET}", path=str(resolved_file_path))
             return True
     else:
-        print(f"  {YELLOW}No backup file found for {MAGENTA}{resolved_file_path}{RESET} at {MAGENTA}{backup_path}{RESET}")
+        emit("debug", "backup_missing", f"  {YELLOW}No backup file found for {MAGENTA}{resolved_file_path}{RESET} at {MAGENTA}{backup_path}{RESET}", path=str(resolved_file_path))
         return False
 
-def update_import_statements(
-    tsx_file_path: Path,
-    project_root_path: Path,
-    current_ui_import_alias: str,
-    barrel_file_was_managed: bool,
-    dry_run=False
-):
-    resolved_tsx_file_path = tsx_file_path.resolve()
-    if not barrel_file_was_managed:
-        print(f"{YELLOW}Note for {MAGENTA}{resolved_tsx_file_path}{RESET}: Barrel file management was skipped or incomplete. Assuming '{current_ui_import_alias}' points to a valid UI barrel if changes are made.{RESET}")
+def write_updated_file(resolved_tsx_file_path: Path, updated_content: str, dry_run=False):
+    if dry_run:
+        emit("info", "would_modify", f"  {YELLOW}[DRY RUN]{RESET} Would modify {MAGENTA}{resolved_tsx_file_path}{RESET}.", path=str(resolved_tsx_file_path))
+        return True # Signify that a change would be made
 
-    ui_import_regex_str = r"import\s+(?:type\s+)?\{([^}]+)\}\s+from\s+(['\"])((?:[^'\"]*\/)?" + re.escape(UI_COMPONENTS_REL_PATH.name) + r"\/[^'\"]+)\2;?"
-    ui_import_regex = re.compile(ui_import_regex_str)
-    other_import_regex = re.compile(r"import\s+.*;") # General import regex to find other imports
+    # Actual modification: backup first
+    if not backup_file(resolved_tsx_file_path): # Pass resolved_tsx_file_path
+        emit("error", "modify_skipped", f"  {RED}Skipping modification of {MAGENTA}{resolved_tsx_file_path}{RESET} due to backup failure.", path=str(resolved_tsx_file_path))
+        return False
 
     try:
-        with open(resolved_tsx_file_path, "r", encoding="utf-8") as f:
-            original_content = f.read()
-    except Exception as e:
-        print(f"  {RED}Error reading file {MAGENTA}{resolved_tsx_file_path}{RESET}: {e}")
+        with open(resolved_tsx_file_path, "w", encoding="utf-8") as f:
+            f.write(updated_content)
+        emit("info", "modified", f"  {GREEN}Successfully updated imports in: {MAGENTA}{resolved_tsx_file_path}{RESET}", path=str(resolved_tsx_file_path))
+        return True # Actual modification happened
+    except IOError as e:
+        emit("error", "write_failed", f"  {RED}Error writing updated file {MAGENTA}{resolved_tsx_file_path}{RESET}: {e}", path=str(resolved_tsx_file_path), error=str(e))
+        # Attempt to restore from backup if write fails
+        if get_backup_file_path(resolved_tsx_file_path).exists():
+             emit("warning", "restore_attempt", f"  {YELLOW}Attempting to restore {MAGENTA}{resolved_tsx_file_path}{RESET} from backup due to write error...{RESET}", path=str(resolved_tsx_file_path))
+             revert_file(resolved_tsx_file_path, dry_run=True) # Log revert attempt, don't actually revert in this state
         return False
 
+# The exported name an import specifier refers to: 'type Foo as Bar' -> 'Foo'
+def imported_name(spec: str):
+    spec = spec.strip()
+    if spec.startswith("type "):
+        spec = spec[len("type "):].strip()
+    return spec.partition(" as ")[0].strip()
+
+# Consolidate a file's barrel imports in memory.
+# Returns the rewritten content, or None when the file needs no change.
+def consolidate_import_content(original_content: str, resolved_tsx_file_path: Path, barrels):
     lines = original_content.splitlines()
 
-    candidate_ui_import_details = [] # List of dicts: {'line_content': str, 'components': list, 'line_num': int}
-    other_imports_to_keep = []       # Imports that are not candidates for consolidation
-    code_lines_to_keep = []          # Non-import lines
+    # Single pass over the file: every barrel's candidates are collected at once
+    candidate_ui_import_details = defaultdict(list) # barrel alias -> list of dicts: {'line_content': str, 'components': list, 'line_num': int}
+    import_entries = []                             # (line_content, barrel alias or None, remainder) in file order
+    code_lines_to_keep = []                         # Non-import lines
 
     for line_num, line_content in enumerate(lines):
-        is_candidate_ui_import = False
-        match = ui_import_regex.search(line_content)
+        barrel = None
+        match = NAMED_IMPORT_REGEX.search(line_content)
         if match:
-            components_str = match.group(1).strip()
-            # path_str = match.group(3) # Full path from the import statement
-            components = [c.strip() for c in components_str.split(',') if c.strip()]
-            if components:
-                # This is a UI import matching our specific pattern (e.g., from '@/shared/components/ui/...')
-                print(f"  {CYAN}In {MAGENTA}{resolved_tsx_file_path}{RESET} (line {line_num + 1}), found potential UI import: {GREEN}{line_content.strip()}{RESET}")
-                candidate_ui_import_details.append({
+            components = [c.strip() for c in match.group(1).strip().split(',') if c.strip()]
+            barrel = find_barrel_for_specifier(match.group(3), resolved_tsx_file_path.parent, barrels) if components else None
+            remainder = None # The names a hand-written barrel does not re-export stay on the original specifier
+            if barrel and barrel["exports"] is not None:
+                exported = [c for c in components if imported_name(c) in barrel["exports"]]
+                kept = [c for c in components if imported_name(c) not in barrel["exports"]]
+                if not exported:
+                    barrel = None
+                elif kept:
+                    components = exported
+                    start, end = match.span(1)
+                    remainder = f"{line_content[:start]} {', '.join(kept)} {line_content[end:]}"
+            if barrel:
+                # This is an import from one of the configured barrel directories (e.g., from '@/shared/components/ui/...')
+                emit("debug", "candidate_import", f"  {CYAN}In {MAGENTA}{resolved_tsx_file_path}{RESET} (line {line_num + 1}), found potential '{barrel['alias']}' import: {GREEN}{line_content.strip()}{RESET}", path=str(resolved_tsx_file_path), line=line_num + 1, alias=barrel['alias'])
+                candidate_ui_import_details[barrel['alias']].append({
                     'line_content': line_content,
                     'components': components,
                     'line_num': line_num
                 })
-                is_candidate_ui_import = True
+                import_entries.append((line_content, barrel['alias'], remainder))
 
-        if not is_candidate_ui_import:
-            # This line is NOT a UI import we plan to consolidate OR it didn't match the UI import regex
-            if other_import_regex.search(line_content) and "from" in line_content:
-                other_imports_to_keep.append(line_content)
+        if not barrel:
+            # This line is NOT a barrel import we plan to consolidate OR it didn't match the import regex
+            if OTHER_IMPORT_REGEX.search(line_content) and "from" in line_content:
+                import_entries.append((line_content, None, None))
             else:
                 code_lines_to_keep.append(line_content)
 
-    # Decision time: only consolidate if more than 1 specific UI import line was found
-    if len(candidate_ui_import_details) > 1:
-        print(f"  {CYAN}Found {len(candidate_ui_import_details)} distinct UI imports from specific UI paths in {MAGENTA}{resolved_tsx_file_path}{RESET}. Consolidating...{RESET}")
+    # Decision time: only consolidate a barrel if more than 1 import line from it was found
+    aliases_to_consolidate = [
+        barrel['alias'] for barrel in barrels if len(candidate_ui_import_details[barrel['alias']]) > 1
+    ]
+    if aliases_to_consolidate:
+        consolidated_import_strings = []
+        for alias in aliases_to_consolidate:
+            details = candidate_ui_import_details[alias]
+            emit("debug", "consolidating", f"  {CYAN}Found {len(details)} distinct imports for barrel '{alias}' in {MAGENTA}{resolved_tsx_file_path}{RESET}. Consolidating...{RESET}", path=str(resolved_tsx_file_path), alias=alias, imports=len(details))
 
-        all_ui_components_to_consolidate = set()
-        for detail in candidate_ui_import_details:
-            all_ui_components_to_consolidate.update(detail['components'])
-            # Verbose logging of components being added from each line can be here if needed
+            all_components_to_consolidate = set()
+            for detail in details:
+                all_components_to_consolidate.update(detail['components'])
 
-        sorted_components = sorted(list(all_ui_components_to_consolidate))
-        consolidated_ui_import_string = f"import {{ {', '.join(sorted_components)} }} from '{current_ui_import_alias}';"
-        print(f"  {GREEN}Consolidated UI import for {MAGENTA}{resolved_tsx_file_path}{RESET}: {CYAN}{consolidated_ui_import_string}{RESET}")
+            sorted_components = sorted(list(all_components_to_consolidate))
+            consolidated_import_string = f"import {{ {', '.join(sorted_components)} }} from '{alias}';"
+            emit("debug", "consolidated", f"  {GREEN}Consolidated import for {MAGENTA}{resolved_tsx_file_path}{RESET}: {CYAN}{consolidated_import_string}{RESET}", path=str(resolved_tsx_file_path), alias=alias)
+            consolidated_import_strings.append(consolidated_import_string)
 
-        # Reconstruct file content: other imports, then the new consolidated UI import, then code lines
-        updated_content_lines = other_imports_to_keep + [consolidated_ui_import_string] + code_lines_to_keep
+        # Imports from barrels that were not consolidated stay exactly where they were
+        other_imports_to_keep = [
+            line if alias not in aliases_to_consolidate else remainder
+            for line, alias, remainder in import_entries
+            if alias not in aliases_to_consolidate or remainder
+        ]
+
+        # Reconstruct file content: other imports, then the new consolidated imports, then code lines
+        updated_content_lines = other_imports_to_keep + consolidated_import_strings + code_lines_to_keep
         # Ensure a single trailing newline for consistent git diffs
         updated_content = "\n".join(updated_content_lines).strip() + "\n"
 
         # Check if the content actually changed
         if updated_content.strip() == original_content.strip():
-            print(f"  {YELLOW}No effective change in content for {MAGENTA}{resolved_tsx_file_path}{RESET} after attempting consolidation (already organized or no net change).")
-            return False # No actual modification
+            emit("debug", "no_change", f"  {YELLOW}No effective change in content for {MAGENTA}{resolved_tsx_file_path}{RESET} after attempting consolidation (already organized or no net change).", path=str(resolved_tsx_file_path))
+            return None # No actual modification
 
-        # If we are here, content has changed.
-        if dry_run:
-            print(f"  {YELLOW}[DRY RUN]{RESET} Would modify {MAGENTA}{resolved_tsx_file_path}{RESET}.")
-            # For detailed dry run of content change, you can print excerpts:
-            # print(f"{YELLOW}--- OLD CONTENT (excerpt for {resolved_tsx_file_path}) ---{RESET}\n{original_content[:300]}...\n")
-            # print(f"{YELLOW}--- NEW CONTENT (excerpt for {resolved_tsx_file_path}) ---{RESET}\n{updated_content[:300]}...\n")
-            return True # Signify that a change would be made
-
-        # Actual modification: backup first
-        if not backup_file(resolved_tsx_file_path): # Pass resolved_tsx_file_path
-            print(f"  {RED}Skipping modification of {MAGENTA}{resolved_tsx_file_path}{RESET} due to backup failure.")
-            return False
+        return updated_content
+    else:
+        # 0 or 1 candidate imports per barrel, so no changes related to consolidation.
+        num_found = sum(len(details) for details in candidate_ui_import_details.values())
+        reason = "No barrel imports found matching the configured barrels." if num_found == 0 else "At most 1 import per barrel found."
+        emit("debug", "no_consolidation", f"  {CYAN}In {MAGENTA}{resolved_tsx_file_path}{RESET}: {reason} No consolidation performed (requires >1).{RESET}", path=str(resolved_tsx_file_path), imports=num_found)
+        return None
 
+def update_import_statements(
+    tsx_file_path: Path,
+    project_root_path: Path,
+    barrels,
+    barrel_file_was_managed: bool,
+    dry_run=False,
+    original_content=None
+):
+    resolved_tsx_file_path = tsx_file_path if tsx_file_path.is_absolute() else tsx_file_path.resolve()
+    if not barrel_file_was_managed:
+        aliases = ", ".join(f"'{barrel['alias']}'" for barrel in barrels)
+        emit("debug", "barrel_unmanaged", f"{YELLOW}Note for {MAGENTA}{resolved_tsx_file_path}{RESET}: Barrel file management was skipped or incomplete. Assuming {aliases} point(s) to valid barrels if changes are made.{RESET}", path=str(resolved_tsx_file_path))
+
+    if original_content is None:
         try:
-            with open(resolved_tsx_file_path, "w", encoding="utf-8") as f:
-                f.write(updated_content)
-            print(f"  {GREEN}Successfully updated imports in: {MAGENTA}{resolved_tsx_file_path}{RESET}")
-            return True # Actual modification happened
-        except IOError as e:
-            print(f"  {RED}Error writing updated file {MAGENTA}{resolved_tsx_file_path}{RESET}: {e}")
-            # Attempt to restore from backup if write fails
-            if get_backup_file_path(resolved_tsx_file_path).exists():
-                 print(f"  {YELLOW}Attempting to restore {MAGENTA}{resolved_tsx_file_path}{RESET} from backup due to write error...{RESET}")
-                 revert_file(resolved_tsx_file_path, dry_run=True) # Log revert attempt, don't actually revert in this state
+            with open(resolved_tsx_file_path, "r", encoding="utf-8") as f:
+                original_content = f.read()
+        except Exception as e:
+            emit("error", "read_failed", f"  {RED}Error reading file {MAGENTA}{resolved_tsx_file_path}{RESET}: {e}", path=str(resolved_tsx_file_path), error=str(e))
             return False
+
+    updated_content = consolidate_import_content(original_content, resolved_tsx_file_path, barrels)
+    if updated_content is None:
+        return False
+    return write_updated_file(resolved_tsx_file_path, updated_content, dry_run)
+
+# --- Normalized-file Cache ---
+# Remembers which files are already normalized for a given barrel configuration, so re-runs
+# (e.g. from a pre-commit hook) skip them. A matching size + mtime skips a file without opening it;
+# a matching content hash skips the analysis when only the mtime changed (e.g. after a checkout).
+
+def content_hash(content: str):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def compute_barrel_config_hash(barrels, mode: str, export_maps=None):
+    digest = hashlib.sha1(f"{CACHE_FORMAT_VERSION}:{mode}".encode("utf-8"))
+    for barrel in barrels:
+        digest.update(f"|{barrel['alias']}|{barrel['abs_dir']}|{barrel['barrel_file']}".encode("utf-8"))
+        # The export set: which modules live in the barrel directory and what the barrel file re-exports
+        if barrel["abs_dir"].is_dir():
+            digest.update(",".join(sorted(f.name for f in barrel["abs_dir"].iterdir())).encode("utf-8"))
+        try:
+            digest.update(barrel["barrel_path"].read_bytes())
+        except IOError:
+            digest.update(b"<missing>")
+        if barrel["exports"] is not None:
+            digest.update(",".join(sorted(barrel["exports"])).encode("utf-8"))
+    if export_maps:
+        digest.update(json.dumps(export_maps, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def load_normalized_cache(cache_path: Path, config_hash: str):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_FORMAT_VERSION and cache.get("config_hash") == config_hash:
+            return cache
+        emit("info", "cache_invalidated", f"{YELLOW}Barrel configuration or exports changed; ignoring cache at {MAGENTA}{cache_path}{RESET}", cache=str(cache_path))
+    except FileNotFoundError:
+        pass
+    except (IOError, json.JSONDecodeError) as e:
+        emit("warning", "cache_unreadable", f"{YELLOW}Warning: Could not read cache {MAGENTA}{cache_path}{RESET}: {e}", cache=str(cache_path), error=str(e))
+    return {"version": CACHE_FORMAT_VERSION, "config_hash": config_hash, "files": {}}
+
+def save_normalized_cache(cache_path: Path, cache):
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path) # Atomic, so an interrupted run never leaves a truncated cache
+    except IOError as e:
+        emit("warning", "cache_write_failed", f"{YELLOW}Warning: Could not write cache {MAGENTA}{cache_path}{RESET}: {e}", cache=str(cache_path), error=str(e))
+
+# Returns (is_normalized, content, stat). content is only read when the stat no longer matches.
+def check_normalized_cache(cache, cache_key: str, file_path: Path):
+    stat = file_path.stat()
+    entry = cache["files"].get(cache_key)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return True, None, stat
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if entry and entry["sha1"] == content_hash(content):
+        record_normalized(cache, cache_key, stat, content)
+        return True, content, stat
+    return False, content, stat
+
+def record_normalized(cache, cache_key: str, stat, content: str):
+    cache["files"][cache_key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": content_hash(content)}
+
+def update_cache_entry(cache, cache_key: str, file_path: Path, stat, content: str, changed: bool, dry_run=False):
+    if not changed:
+        record_normalized(cache, cache_key, stat, content)
+    elif dry_run:
+        cache["files"].pop(cache_key, None) # Still needs rewriting
     else:
-        # 0 or 1 candidate UI imports, so no changes related to UI consolidation.
-        num_found = len(candidate_ui_import_details)
-        reason = "No specific UI imports found matching the pattern." if num_found == 0 else "Only 1 specific UI import found matching the pattern."
-        print(f"  {CYAN}In {MAGENTA}{resolved_tsx_file_path}{RESET}: {reason} No consolidation performed (requires >1).{RESET}")
+        # The rewritten file is normalized by construction; hash what actually landed on disk
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                record_normalized(cache, cache_key, file_path.stat(), f.read())
+        except IOError:
+            cache["files"].pop(cache_key, None)
+
+def load_barrel_exports(project_root: Path, barrel):
+    # Imports are only moved onto a hand-written barrel for the names it actually re-exports
+    if not barrel["generate"]:
+        barrel["exports"] = set(build_barrel_export_map(project_root, barrel))
+
+# Decide from a file's tokenized imports (shared parse cache) whether a rewrite could change it.
+# The tokenizer finds at least every import the rewrite regexes match, so False is always safe.
+def may_need_rewrite(parsed, tsx_dir: Path, barrels, export_maps, debarrel_mode=False):
+    static_imports = [ref.specifier for ref in project_scan.import_refs(parsed) if ref.kind == "import"]
+    if debarrel_mode:
+        return any(specifier in export_maps for specifier in static_imports)
+    imports_per_barrel = defaultdict(int)
+    for specifier in static_imports:
+        barrel = find_barrel_for_specifier(specifier, tsx_dir, barrels)
+        if barrel:
+            imports_per_barrel[barrel["alias"]] += 1
+    return any(count > 1 for count in imports_per_barrel.values()) # Consolidation needs more than one
+
+# --- De-barrel Mode ---
+
+# Resolve a relative module specifier to a .ts/.tsx file (or its index file)
+def resolve_module_file(base_dir: Path, specifier: str):
+    candidate = (base_dir / specifier).resolve()
+    if candidate.is_file():
+        return candidate
+    for ext in MODULE_EXTENSIONS:
+        with_ext = candidate.with_name(candidate.name + ext)
+        if with_ext.is_file():
+            return with_ext
+    for ext in MODULE_EXTENSIONS:
+        index_file = candidate / f"index{ext}"
+        if index_file.is_file():
+            return index_file
+    return None
+
+# Build an alias-based import specifier (e.g. '@/shared/components/ui/button') for a module file
+def to_direct_specifier(project_root: Path, module_file: Path):
+    source_root = (project_root / SOURCE_ROOT_REL_PATH).resolve()
+    module_path = module_file.with_suffix("")
+    if module_path.name == "index":
+        module_path = module_path.parent
+    try:
+        return f"{SOURCE_ROOT_ALIAS}/{module_path.relative_to(source_root).as_posix()}"
+    except ValueError:
+        return module_path.relative_to(project_root.resolve()).as_posix()
+
+# Parse 'A, B as C, type D' into (exported_name, original_name) pairs
+def parse_export_specifiers(specifiers_str: str):
+    pairs = []
+    for raw in specifiers_str.split(','):
+        spec = re.sub(r"^type\s+", "", raw.strip())
+        if not spec:
+            continue
+        if " as " in spec:
+            original, exported = [part.strip() for part in spec.split(" as ", 1)]
+        else:
+            original = exported = spec
+        pairs.append((exported, original))
+    return pairs
+
+# Collect the names a module exports, following its own 'export *' re-exports
+def collect_module_exports(module_file: Path, visited=None):
+    visited = visited if visited is not None else set()
+    if module_file in visited:
+        return set()
+    visited.add(module_file)
+
+    try:
+        content = module_file.read_text(encoding="utf-8")
+    except Exception as e:
+        emit("error", "module_read_failed", f"  {RED}Error reading module {MAGENTA}{module_file}{RESET}: {e}", path=str(module_file), error=str(e))
+        return set()
+
+    names = set(EXPORT_DECLARATION_REGEX.findall(content))
+    for match in EXPORT_LOCAL_LIST_REGEX.finditer(content):
+        names.update(exported for exported, _ in parse_export_specifiers(match.group(1)))
+    for match in EXPORT_NAMED_FROM_REGEX.finditer(content):
+        names.update(exported for exported, _ in parse_export_specifiers(match.group(1)))
+    for match in EXPORT_STAR_REGEX.finditer(content):
+        if match.group(2).startswith('.'):
+            nested = resolve_module_file(module_file.parent, match.group(2))
+            if nested:
+                names.update(collect_module_exports(nested, visited))
+    names.discard("default")
+    return names
+
+def build_barrel_export_map(project_root: Path, barrel):
+    # Maps every name exported by the barrel to the module that actually defines it:
+    # {exported_name: (direct_specifier, name_in_module)}
+    barrel_file_abs_path = barrel["barrel_path"]
+    emit("debug", "export_map_build", f"{CYAN}Building export map for '{barrel['alias']}' from barrel file: {MAGENTA}{barrel_file_abs_path}{RESET}", alias=barrel['alias'])
+    if not barrel_file_abs_path.is_file():
+        emit("warning", "export_map_no_barrel", f"{YELLOW}Barrel file not found at {MAGENTA}{barrel_file_abs_path}{RESET}. Nothing to de-barrel for '{barrel['alias']}'.", alias=barrel['alias'])
+        return {}
+
+    content = barrel_file_abs_path.read_text(encoding="utf-8")
+    export_map = {}
+
+    for match in EXPORT_STAR_REGEX.finditer(content):
+        specifier = match.group(2)
+        if not specifier.startswith('.'):
+            emit("warning", "export_map_skip", f"  {YELLOW}Skipping non-relative 'export *' from '{specifier}' in barrel (names cannot be resolved statically).{RESET}", specifier=specifier)
+            continue
+        module_file = resolve_module_file(barrel_file_abs_path.parent, specifier)
+        if not module_file:
+            emit("warning", "export_map_unresolved", f"  {YELLOW}Could not resolve barrel entry '{specifier}'.{RESET}", specifier=specifier)
+            continue
+        direct_specifier = to_direct_specifier(project_root, module_file)
+        for name in collect_module_exports(module_file):
+            export_map.setdefault(name, (direct_specifier, name))
+
+    for match in EXPORT_NAMED_FROM_REGEX.finditer(content):
+        specifier = match.group(3)
+        if specifier.startswith('.'):
+            module_file = resolve_module_file(barrel_file_abs_path.parent, specifier)
+            if not module_file:
+                emit("warning", "export_map_unresolved", f"  {YELLOW}Could not resolve barrel entry '{specifier}'.{RESET}", specifier=specifier)
+                continue
+            specifier = to_direct_specifier(project_root, module_file)
+        for exported, original in parse_export_specifiers(match.group(1)):
+            export_map[exported] = (specifier, original)
+
+    emit("info", "export_map_built", f"{GREEN}Export map contains {len(export_map)} name(s).{RESET}", alias=barrel['alias'], names=len(export_map))
+    return export_map
+
+# Rewrite imports from barrel aliases into per-component direct imports.
+# export_maps: {alias: export_map}, so every barrel is handled in the same pass over the file.
+# Compiled once per alias set (not once per file)
+@lru_cache(maxsize=None)
+def compile_barrel_import_regex(aliases):
+    alias_alternation = "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+    return re.compile(
+        r"import\s+(type\s+)?\{([^}]*)\}\s+from\s+(['\"])(" + alias_alternation + r")\3(;?)"
+    )
+
+# De-barrel a file's imports in memory.
+# Returns the rewritten content, or None when the file needs no change.
+def debarrel_content(original_content: str, resolved_tsx_file_path: Path, export_maps: dict):
+    barrel_import_regex = compile_barrel_import_regex(tuple(export_maps))
+
+    def rewrite(match):
+        type_only, specifiers_str, quote, current_ui_import_alias, semicolon = match.groups()
+        export_map = export_maps[current_ui_import_alias]
+        grouped = {}  # direct_specifier -> list of import specifiers, in order of first appearance
+        unresolved = []
+        for raw in specifiers_str.split(','):
+            spec = raw.strip()
+            if not spec:
+                continue
+            inline_type = spec.startswith("type ")
+            name_part = spec[len("type "):].strip() if inline_type else spec
+            imported, _, local = [part.strip() for part in name_part.partition(" as ")]
+            if imported not in export_map:
+                unresolved.append(spec)
+                continue
+            direct_specifier, original = export_map[imported]
+            local = local or imported
+            rendered = original if original == local else f"{original} as {local}"
+            grouped.setdefault(direct_specifier, []).append(f"type {rendered}" if inline_type else rendered)
+
+        if unresolved:
+            emit("warning", "debarrel_unresolved", f"  {YELLOW}In {MAGENTA}{resolved_tsx_file_path}{RESET}: could not resolve {', '.join(unresolved)} through the barrel; keeping them on '{current_ui_import_alias}'.{RESET}", path=str(resolved_tsx_file_path), names=unresolved)
+        if not grouped:
+            return match.group(0)
+
+        prefix = f"import {type_only or ''}"
+        statements = [
+            f"{prefix}{{ {', '.join(specs)} }} from {quote}{specifier}{quote}{semicolon}"
+            for specifier, specs in grouped.items()
+        ]
+        if unresolved:
+            statements.append(f"{prefix}{{ {', '.join(unresolved)} }} from {quote}{current_ui_import_alias}{quote}{semicolon}")
+        return "\n".join(statements)
+
+    updated_content = barrel_import_regex.sub(rewrite, original_content)
+
+    if updated_content == original_content:
+        return None
+
+    emit("debug", "debarrelled", f"  {CYAN}De-barrelled imports in {MAGENTA}{resolved_tsx_file_path}{RESET}", path=str(resolved_tsx_file_path))
+    return updated_content
+
+def debarrel_import_statements(
+    tsx_file_path: Path,
+    export_maps: dict,
+    dry_run=False,
+    original_content=None
+):
+    resolved_tsx_file_path = tsx_file_path if tsx_file_path.is_absolute() else tsx_file_path.resolve()
+
+    if original_content is None:
+        try:
+            with open(resolved_tsx_file_path, "r", encoding="utf-8") as f:
+                original_content = f.read()
+        except Exception as e:
+            emit("error", "read_failed", f"  {RED}Error reading file {MAGENTA}{resolved_tsx_file_path}{RESET}: {e}", path=str(resolved_tsx_file_path), error=str(e))
+            return False
+
+    updated_content = debarrel_content(original_content, resolved_tsx_file_path, export_maps)
+    if updated_content is None:
         return False
+    return write_updated_file(resolved_tsx_file_path, updated_content, dry_run)
+
+# Unpack a task tuple for ProcessPoolExecutor.map
+# Events are recorded in the worker and returned, so the parent can replay them through its own log
+def debarrel_worker(task):
+    global EVENT_LOG
+    tsx_file, export_maps, dry_run, original_content = task
+    EVENT_LOG = EventLog(console_level=None, record_level="debug")
+    changed = debarrel_import_statements(tsx_file, export_maps, dry_run, original_content)
+    return changed, EVENT_LOG.events
+
 
+# --- Patch Output (--dry-run --patch) ---
+# Dry runs can write every pending change as one unified diff that `git apply` accepts,
+# so a large migration can be reviewed first and applied later without running the script again.
 
-def process_files(project_root: Path, target_arg: str, dry_run=False, revert_mode=False, current_ui_alias: str = "ui"):
+def unified_diff_text(rel_path: str, original_content, updated_content: str):
+    # original_content is None for files that do not exist yet
+    old_lines = original_content.splitlines(keepends=True) if original_content is not None else []
+    new_lines = updated_content.splitlines(keepends=True)
+    header = [f"diff --git a/{rel_path} b/{rel_path}\n"]
+    if original_content is None:
+        header.append("new file mode 100644\n")
+    diff_lines = list(difflib.unified_diff(
+        old_lines, new_lines,
+        fromfile=f"a/{rel_path}" if original_content is not None else "/dev/null",
+        tofile=f"b/{rel_path}",
+    ))
+    if not diff_lines:
+        return None
+    output = header
+    for line in diff_lines:
+        output.append(line)
+        if not line.endswith("\n"):
+            output.append("\n\\ No newline at end of file\n")
+    return "".join(output)
+
+def render_file_patch(tsx_file: Path, project_root: Path, barrels, export_maps, original_content=None):
+    if original_content is None:
+        try:
+            with open(tsx_file, "r", encoding="utf-8") as f:
+                original_content = f.read()
+        except Exception as e:
+            emit("error", "read_failed", f"  {RED}Error reading file {MAGENTA}{tsx_file}{RESET}: {e}", path=str(tsx_file), error=str(e))
+            return None
+    if export_maps:
+        updated_content = debarrel_content(original_content, tsx_file, export_maps)
+    else:
+        updated_content = consolidate_import_content(original_content, tsx_file, barrels)
+    if updated_content is None:
+        return None
+    emit("info", "would_modify", f"  {YELLOW}[DRY RUN]{RESET} Would modify {MAGENTA}{tsx_file}{RESET}.", path=str(tsx_file))
+    return unified_diff_text(Path(os.path.relpath(tsx_file, project_root)).as_posix(), original_content, updated_content)
+
+def patch_worker(task):
+    global EVENT_LOG
+    EVENT_LOG = EventLog(console_level=None, record_level="debug")
+    return render_file_patch(*task), EVENT_LOG.events
+
+def count_diff_lines(diff: str):
+    added = removed = 0
+    for line in diff.splitlines():
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return added, removed
+
+# Generates the per-file diffs (in parallel for large runs) and streams them into patch_path as they arrive.
+# barrel_diffs: [(file_path, diff)] for barrel files that would be regenerated.
+# Returns (one bool per task telling whether the file would change, per-directory stats {dir: [files, added, removed]}).
+def write_patch(patch_path: Path, project_root: Path, patch_tasks, barrels, export_maps, barrel_diffs, jobs):
+    stats = defaultdict(lambda: [0, 0, 0])
+    results = []
+
+    def record(file_path: Path, diff, patch_file):
+        if diff is None:
+            return False
+        patch_file.write(diff)
+        added, removed = count_diff_lines(diff)
+        entry = stats[Path(os.path.relpath(file_path.parent, project_root)).as_posix()]
+        entry[0] += 1
+        entry[1] += added
+        entry[2] += removed
+        return True
+
+    tasks = [(tsx_file, project_root, barrels, export_maps, content) for tsx_file, content in patch_tasks]
+    try:
+        with open(patch_path, "w", encoding="utf-8") as patch_file:
+            for file_path, diff in barrel_diffs:
+                record(file_path, diff, patch_file)
+            if len(tasks) < PARALLEL_MIN_FILES or jobs <= 1:
+                for task in tasks:
+                    results.append(record(task[0], render_file_patch(*task), patch_file))
+            else:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    # map() yields in order as chunks complete, so early diffs hit the disk while later files are still being rewritten
+                    for task, (diff, events) in zip(tasks, executor.map(patch_worker, tasks, chunksize=16)):
+                        EVENT_LOG.replay(events)
+                        results.append(record(task[0], diff, patch_file))
+    except IOError as e:
+        emit("error", "patch_write_failed", f"{RED}Error writing patch {MAGENTA}{patch_path}{RESET}: {e}", path=str(patch_path), error=str(e))
+        return None, stats
+    return results, stats
+
+def process_files(
+    project_root: Path,
+    target_arg: str,
+    dry_run=False,
+    revert_mode=False,
+    barrels=None,
+    debarrel_mode=False,
+    jobs=DEFAULT_PARALLEL_JOBS,
+    cache_path=None,
+    staged_mode=False,
+    patch_path=None,
+    scan_cache_path=None
+):
     if not project_root:
         return
+    dry_run = dry_run or bool(patch_path)
+
+    staged_changes = []
+    if staged_mode:
+        # Latency scales with the commit: only the git index is consulted, the tree is never walked
+        staged_changes = get_staged_changes(project_root)
+        if staged_changes is None:
+            return
 
-    barrel_file_created_successfully = False
-    barrel_file_path_actual = (project_root / UI_COMPONENTS_REL_PATH / BARREL_FILE_NAME).resolve()
+    barrels = barrels or [make_barrel(project_root, DEFAULT_UI_IMPORT_ALIAS, UI_COMPONENTS_REL_PATH)]
+    aliases_label = ", ".join(f"'{barrel['alias']}'" for barrel in barrels)
+    barrel_results = {} # barrel file path -> created/updated successfully
+    barrel_file_paths = {barrel["barrel_path"] for barrel in barrels}
     barrel_management_attempted = False
+    export_maps = {}
+    barrel_diffs = [] # (barrel file path, diff) for --patch
 
     if revert_mode:
-        print(f"{YELLOW}--- Starting Revert Mode ---{RESET}")
+        emit("info", "start_revert", f"{YELLOW}--- Starting Revert Mode ---{RESET}")
+    elif debarrel_mode:
+        emit("info", "start_debarrel", f"{CYAN}--- Starting De-barrel Mode (aliases: {aliases_label}, jobs: {jobs}) ---{RESET}", aliases=[barrel['alias'] for barrel in barrels])
+        for barrel in barrels:
+            export_map = build_barrel_export_map(project_root, barrel)
+            if export_map:
+                export_maps[barrel["alias"]] = export_map
+        if not export_maps:
+            emit("error", "debarrel_aborted", f"{RED}Aborting de-barrel: no exports could be resolved from any barrel file.{RESET}")
+            return
     else:
-        print(f"{CYAN}--- Starting Import Organization (alias: '{current_ui_alias}') ---{RESET}")
+        emit("info", "start_consolidate", f"{CYAN}--- Starting Import Organization (aliases: {aliases_label}) ---{RESET}")
         barrel_management_attempted = True
-        success, path = create_barrel_file(project_root, dry_run)
-        barrel_file_created_successfully = success
-        barrel_file_path_actual = path.resolve() # Ensure it's resolved
+        for barrel in barrels:
+            if not barrel["generate"]:
+                load_barrel_exports(project_root, barrel)
+                continue
+            if staged_mode and not barrel_structure_changed(barrel, staged_changes, project_root):
+                emit("debug", "barrel_unchanged", f"{CYAN}No files added, removed or renamed under {MAGENTA}{barrel['dir'].as_posix()}{RESET}; keeping barrel file as is.", alias=barrel['alias'])
+                continue
+            if patch_path:
+                barrel_content = build_barrel_content(barrel) if barrel["abs_dir"].is_dir() else None
+                if barrel_content is not None:
+                    existing_content = barrel["barrel_path"].read_text(encoding="utf-8") if barrel["barrel_path"].is_file() else None
+                    rel_path = Path(os.path.relpath(barrel["barrel_path"], project_root)).as_posix()
+                    barrel_diffs.append((barrel["barrel_path"], unified_diff_text(rel_path, existing_content, barrel_content)))
+                barrel_results[barrel["barrel_path"]] = barrel_content is not None
+                continue
+            success, path = create_barrel_file(project_root, barrel, dry_run)
+            barrel_results[path] = success
+    barrel_file_created_successfully = any(barrel_results.values())
 
     process_path_base = project_root
-    if target_arg:
+    if staged_mode:
+        emit("debug", "staged_mode", f"{CYAN}Processing staged .tsx files in: {MAGENTA}{project_root}{RESET}")
+    elif target_arg:
         target_path_obj = Path(target_arg)
         if not target_path_obj.is_absolute():
             process_path_base = (project_root / target_path_obj).resolve()
@@ -262,81 +1038,375 @@ def process_files(project_root: Path, target_arg: str, dry_run=False, revert_mod
             process_path_base = target_path_obj.resolve()
 
         if not process_path_base.exists():
-            print(f"{RED}Error: Target path '{MAGENTA}{process_path_base}{RESET}' does not exist.")
+            emit("error", "target_missing", f"{RED}Error: Target path '{MAGENTA}{process_path_base}{RESET}' does not exist.", target=str(process_path_base))
             return
-        print(f"{CYAN}Targeting specific path: {MAGENTA}{process_path_base}{RESET}")
+        emit("debug", "target", f"{CYAN}Targeting specific path: {MAGENTA}{process_path_base}{RESET}", target=str(process_path_base))
     else:
-        print(f"{CYAN}Processing all .tsx files in project root: {MAGENTA}{project_root.resolve()}{RESET}")
+        emit("debug", "target", f"{CYAN}Processing all .tsx files in project root: {MAGENTA}{project_root}{RESET}", target=str(project_root))
 
     files_to_process = []
-    if process_path_base.is_file() and process_path_base.name.endswith(".tsx"):
+    if staged_mode:
+        files_to_process = find_staged_tsx_files(project_root, staged_changes)
+    elif process_path_base.is_file() and process_path_base.name.endswith(".tsx"):
         files_to_process = [process_path_base]
     elif process_path_base.is_dir():
         files_to_process = find_tsx_files(process_path_base)
     else:
-        print(f"{RED}Error: Target '{MAGENTA}{process_path_base}{RESET}' is not a valid .tsx file or directory.")
+        emit("error", "target_invalid", f"{RED}Error: Target '{MAGENTA}{process_path_base}{RESET}' is not a valid .tsx file or directory.", target=str(process_path_base))
         return
 
-    if not files_to_process:
-        print(f"{YELLOW}No .tsx files to process in {MAGENTA}{process_path_base.resolve()}{RESET}.")
+    if not files_to_process and not staged_mode:
+        emit("warning", "nothing_to_process", f"{YELLOW}No .tsx files to process in {MAGENTA}{process_path_base}{RESET}.")
         return
 
-    modified_count = 0
+    cache = None
+    if cache_path and not revert_mode:
+        config_hash = compute_barrel_config_hash(barrels, "debarrel" if debarrel_mode else "consolidate", export_maps)
+        cache = load_normalized_cache(cache_path, config_hash)
+    # Parse results shared with check-unused.py: files without rewritable imports are skipped, unread if unchanged
+    scan_cache = project_scan.ParseCache(project_root, scan_cache_path) if scan_cache_path and not revert_mode else None
+
+    modified_files = []
     reverted_count = 0
+    skipped_count = 0
+    debarrel_tasks = []
+    patch_tasks = []           # (file_path, content) rendered into the patch after the scan
+    pending_cache_records = [] # (cache_key, file_path, stat, content) for de-barrel/patch tasks still running
 
     for tsx_file in files_to_process:
-        resolved_tsx_file = tsx_file.resolve() # Use resolved path consistently
-        if resolved_tsx_file == barrel_file_path_actual and not revert_mode:
-            print(f"  {CYAN}Skipping processing of barrel file itself: {MAGENTA}{resolved_tsx_file}{RESET}")
+        resolved_tsx_file = tsx_file if tsx_file.is_absolute() else tsx_file.resolve() # Files found under the resolved root are already absolute
+        if resolved_tsx_file in barrel_file_paths and not revert_mode:
+            emit("debug", "skip_barrel", f"  {CYAN}Skipping processing of barrel file itself: {MAGENTA}{resolved_tsx_file}{RESET}", path=str(resolved_tsx_file))
             continue
         if resolved_tsx_file.name.endswith(".bak"):
-            print(f"  {CYAN}Skipping backup file: {MAGENTA}{resolved_tsx_file}{RESET}")
+            emit("debug", "skip_backup", f"  {CYAN}Skipping backup file: {MAGENTA}{resolved_tsx_file}{RESET}", path=str(resolved_tsx_file))
             continue
 
         if revert_mode:
             if revert_file(resolved_tsx_file, dry_run):
                 reverted_count +=1
+            continue
+
+        content = None
+        parsed = None
+        if scan_cache is not None:
+            try:
+                parsed = scan_cache.lookup(resolved_tsx_file, resolved_tsx_file.stat(), SCAN_KINDS)
+            except OSError:
+                parsed = None
+            if parsed is not None and not may_need_rewrite(parsed, resolved_tsx_file.parent, barrels, export_maps, debarrel_mode):
+                skipped_count += 1
+                continue
+
+        if cache is not None:
+            cache_key = Path(os.path.relpath(resolved_tsx_file, project_root)).as_posix()
+            try:
+                is_normalized, content, stat = check_normalized_cache(cache, cache_key, resolved_tsx_file)
+            except (IOError, UnicodeDecodeError) as e:
+                emit("error", "read_failed", f"  {RED}Error reading file {MAGENTA}{resolved_tsx_file}{RESET}: {e}", path=str(resolved_tsx_file), error=str(e))
+                continue
+            if is_normalized:
+                skipped_count += 1
+                continue
+
+        if scan_cache is not None and parsed is None:
+            try:
+                if content is None:
+                    with open(resolved_tsx_file, "r", encoding="utf-8") as f:
+                        content = f.read()
+                parsed = scan_cache.parse(resolved_tsx_file, resolved_tsx_file.stat(), content, SCAN_KINDS)
+            except (IOError, UnicodeDecodeError) as e:
+                emit("error", "read_failed", f"  {RED}Error reading file {MAGENTA}{resolved_tsx_file}{RESET}: {e}", path=str(resolved_tsx_file), error=str(e))
+                continue
+            if not may_need_rewrite(parsed, resolved_tsx_file.parent, barrels, export_maps, debarrel_mode):
+                if cache is not None:
+                    record_normalized(cache, cache_key, stat, content)
+                skipped_count += 1
+                continue
+
+        if patch_path:
+            patch_tasks.append((resolved_tsx_file, content))
+            if cache is not None:
+                pending_cache_records.append((cache_key, resolved_tsx_file, stat, content))
+        elif debarrel_mode:
+            debarrel_tasks.append((resolved_tsx_file, export_maps, dry_run, content))
+            if cache is not None:
+                pending_cache_records.append((cache_key, resolved_tsx_file, stat, content))
         else:
-            if update_import_statements(
+            changed = update_import_statements(
                 resolved_tsx_file,
                 project_root,
-                current_ui_alias,
+                barrels,
                 barrel_management_attempted,
-                dry_run
-            ):
-                modified_count += 1
+                dry_run,
+                original_content=content
+            )
+            if changed:
+                modified_files.append(resolved_tsx_file)
+            if cache is not None:
+                update_cache_entry(cache, cache_key, resolved_tsx_file, stat, content, changed, dry_run)
+
+    if debarrel_tasks:
+        if len(debarrel_tasks) < PARALLEL_MIN_FILES or jobs <= 1:
+            results = [debarrel_import_statements(*task) for task in debarrel_tasks]
+        else:
+            # Each file is rewritten independently, so the work parallelizes cleanly across processes.
+            results = []
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for changed, events in executor.map(debarrel_worker, debarrel_tasks, chunksize=16):
+                    EVENT_LOG.replay(events)
+                    results.append(changed)
+        modified_files = [task[0] for task, changed in zip(debarrel_tasks, results) if changed]
+        for (cache_key, file_path, stat, content), changed in zip(pending_cache_records, results):
+            update_cache_entry(cache, cache_key, file_path, stat, content, changed, dry_run)
+
+    patch_stats = {}
+    if patch_path:
+        results, patch_stats = write_patch(Path(patch_path), project_root, patch_tasks, barrels, export_maps, barrel_diffs, jobs)
+        if results is None:
+            return
+        modified_files = [task[0] for task, changed in zip(patch_tasks, results) if changed]
+        for (cache_key, file_path, stat, content), changed in zip(pending_cache_records, results):
+            update_cache_entry(cache, cache_key, file_path, stat, content, changed, dry_run)
+
+    if scan_cache is not None:
+        scan_cache.save()
+    if cache is not None:
+        save_normalized_cache(cache_path, cache)
+        emit("debug", "cache_summary", f"{CYAN}Skipped {skipped_count} already-normalized file(s) using cache {MAGENTA}{cache_path}{RESET}", skipped=skipped_count)
+
+    modified_count = len(modified_files)
+    if staged_mode and not dry_run and not revert_mode:
+        restage_files(project_root, modified_files + [path for path, success in barrel_results.items() if success])
 
     # Summary
     if revert_mode:
-        print(f"\n{GREEN if reverted_count > 0 else YELLOW}--- Revert Summary ---{RESET}")
+        EVENT_LOG.summary(f"\n{GREEN if reverted_count > 0 else YELLOW}--- Revert Summary ---{RESET}")
         if dry_run:
-            print(f"{YELLOW}[DRY RUN] Would have attempted to revert {reverted_count} file(s).{RESET}")
+            EVENT_LOG.summary(f"{YELLOW}[DRY RUN] Would have attempted to revert {reverted_count} file(s).{RESET}")
         else:
-            print(f"{GREEN}{reverted_count} file(s) processed for reverting.{RESET}")
+            EVENT_LOG.summary(f"{GREEN}{reverted_count} file(s) processed for reverting.{RESET}")
     else:
-        print(f"\n{GREEN if modified_count > 0 or (barrel_management_attempted and barrel_file_created_successfully) else YELLOW}--- Processing Summary ---{RESET}")
+        EVENT_LOG.summary(f"\n{GREEN if modified_count > 0 or (barrel_management_attempted and barrel_file_created_successfully) else YELLOW}--- Processing Summary ---{RESET}")
+        EVENT_LOG.summary(f"{CYAN}{len(files_to_process)} .tsx file(s) considered, {skipped_count} skipped via cache.{RESET}")
         if dry_run:
-            print(f"{YELLOW}[DRY RUN] Preview of changes complete.{RESET}")
-            if barrel_management_attempted:
-                status_msg = "would be created/updated" if barrel_file_created_successfully else "creation/update would be attempted"
-                print(f"{YELLOW}[DRY RUN] Barrel file '{MAGENTA}{barrel_file_path_actual}{RESET}' {status_msg}.{RESET}")
-            print(f"{YELLOW}[DRY RUN] {modified_count} .tsx file(s) would be modified.{RESET}")
+            EVENT_LOG.summary(f"{YELLOW}[DRY RUN] Preview of changes complete.{RESET}")
+            for barrel_file_path_actual, success in barrel_results.items():
+                status_msg = "would be created/updated" if success else "creation/update would be attempted"
+                EVENT_LOG.summary(f"{YELLOW}[DRY RUN] Barrel file '{MAGENTA}{barrel_file_path_actual}{RESET}' {status_msg}.{RESET}")
+            EVENT_LOG.summary(f"{YELLOW}[DRY RUN] {modified_count} .tsx file(s) would be modified.{RESET}")
+            if patch_path:
+                for rel_dir, (file_count, added, removed) in sorted(patch_stats.items()):
+                    EVENT_LOG.summary(f"  {MAGENTA}{rel_dir}{RESET}: {file_count} file(s), {GREEN}+{added}{RESET} {RED}-{removed}{RESET}")
+                EVENT_LOG.summary(f"{CYAN}Patch written to {MAGENTA}{patch_path}{RESET}{CYAN}. Apply it with: {MAGENTA}git apply {patch_path}{RESET}")
         else:
-            if barrel_management_attempted:
-                status_msg = "created/updated successfully" if barrel_file_created_successfully else "management attempted (check logs for status)"
-                color = GREEN if barrel_file_created_successfully else YELLOW
-                print(f"{color}Barrel file '{MAGENTA}{barrel_file_path_actual}{RESET}' {status_msg}.{RESET}")
-            print(f"{GREEN}{modified_count} .tsx file(s) modified.{RESET}")
+            for barrel_file_path_actual, success in barrel_results.items():
+                status_msg = "created/updated successfully" if success else "management attempted (check logs for status)"
+                color = GREEN if success else YELLOW
+                EVENT_LOG.summary(f"{color}Barrel file '{MAGENTA}{barrel_file_path_actual}{RESET}' {status_msg}.{RESET}")
+            EVENT_LOG.summary(f"{GREEN}{modified_count} .tsx file(s) modified.{RESET}")
 
             if modified_count > 0 or (barrel_management_attempted and barrel_file_created_successfully):
                 revert_cmd_parts = [f"python3 {Path(__file__).name}", "--revert"]
                 if args.root: revert_cmd_parts.append(f"--root \"{args.root}\"") # args is global from main
                 if target_arg: revert_cmd_parts.append(f"--target \"{target_arg}\"")
+                if staged_mode: revert_cmd_parts.append("--staged")
                 # Add --ui-alias if it was non-default, for user's info, though revert doesn't use it
-                if current_ui_alias != DEFAULT_UI_IMPORT_ALIAS: # Check against initial default
-                    revert_cmd_parts.append(f"(original --ui-alias was \"{current_ui_alias}\")")
+                if args.ui_alias != DEFAULT_UI_IMPORT_ALIAS: # Check against initial default
+                    revert_cmd_parts.append(f"(original --ui-alias was \"{args.ui_alias}\")")
 
-                print(f"{CYAN}To revert changes, run: {MAGENTA}{' '.join(revert_cmd_parts)}{RESET}")
+                EVENT_LOG.summary(f"{CYAN}To revert changes, run: {MAGENTA}{' '.join(revert_cmd_parts)}{RESET}")
+
+    warning_count, error_count = EVENT_LOG.counts["warning"], EVENT_LOG.counts["error"]
+    hidden_note = "" if EVENT_LOG.console_threshold is not None and EVENT_LOG.console_threshold <= LOG_LEVELS["info"] else " (use --verbose for per-file details)"
+    color = RED if error_count else (YELLOW if warning_count else GREEN)
+    EVENT_LOG.summary(f"{color}Finished in {time.time() - EVENT_LOG.started_at:.2f}s with {warning_count} warning(s) and {error_count} error(s){hidden_note}.{RESET}")
+
+# --- Server Mode ---
+# A long-running process for editor-on-save integration. Barrels, export maps and compiled patterns
+# stay in memory between requests; only the barrel directories are checked for changes.
+# Protocol: one JSON object per line in, one per line out (stdin/stdout, or a Unix socket with --socket).
+#   {"id": 1, "path": "src/app/page.tsx", "content": "...", "edit": false}
+#   -> {"id": 1, "changed": true, "content": "..."}  (or "edit": {"start_line", "end_line", "text"} with "edit": true)
+#   {"command": "ping"} / {"command": "reload"} / {"command": "shutdown"}
+
+def barrel_dir_signature(barrel):
+    # Names, mtimes and sizes of the files directly inside the barrel directory
+    try:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in os.scandir(barrel["abs_dir"]) if entry.is_file()
+        ))
+    except OSError:
+        return None
+
+def minimal_line_edit(original_content: str, updated_content: str):
+    # A single replacement of lines [start_line, end_line) (0-based) that turns original into updated
+    old_lines = original_content.splitlines(keepends=True)
+    new_lines = updated_content.splitlines(keepends=True)
+    prefix = 0
+    while prefix < min(len(old_lines), len(new_lines)) and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(old_lines), len(new_lines)) - prefix
+           and old_lines[-1 - suffix] == new_lines[-1 - suffix]):
+        suffix += 1
+    return {
+        "start_line": prefix,
+        "end_line": len(old_lines) - suffix,
+        "text": "".join(new_lines[prefix:len(new_lines) - suffix]),
+    }
+
+class ImportServer:
+    def __init__(self, project_root: Path, barrels, debarrel_mode=False, watch_interval=SERVER_WATCH_INTERVAL, write_barrels=False):
+        self.project_root = project_root
+        self.barrels = barrels
+        self.debarrel_mode = debarrel_mode
+        self.watch_interval = watch_interval
+        self.write_barrels = write_barrels # Otherwise generated barrel content is only kept in memory
+        self.signatures = {} # barrel alias -> barrel_dir_signature
+        self.export_maps = {}
+        self.last_check = 0.0
+        self.refresh_barrels(force=True)
+
+    def refresh_barrels(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_check < self.watch_interval:
+            return
+        self.last_check = now
+        for barrel in self.barrels:
+            signature = barrel_dir_signature(barrel)
+            previous = self.signatures.get(barrel["alias"])
+            if not force and signature == previous:
+                continue
+            if self.debarrel_mode:
+                export_map = build_barrel_export_map(self.project_root, barrel)
+                if export_map:
+                    self.export_maps[barrel["alias"]] = export_map
+                else:
+                    self.export_maps.pop(barrel["alias"], None)
+            elif not barrel["generate"]:
+                load_barrel_exports(self.project_root, barrel)
+            elif signature is not None:
+                module_names = {name for name, _, _ in signature if name != barrel["barrel_file"]}
+                previous_names = {name for name, _, _ in previous or ()} - {barrel["barrel_file"]}
+                if force or module_names != previous_names:
+                    self.refresh_barrel_content(barrel)
+                    signature = barrel_dir_signature(barrel) # A write of our own must not look like a change next time
+            emit("info", "server_barrel_refreshed", f"{CYAN}Refreshed barrel '{barrel['alias']}'.{RESET}", alias=barrel['alias'])
+            self.signatures[barrel["alias"]] = signature
+
+    def refresh_barrel_content(self, barrel):
+        barrel_content = build_barrel_content(barrel)
+        barrel_path = barrel["barrel_path"]
+        existing_content = barrel_path.read_text(encoding="utf-8") if barrel_path.is_file() else None
+        if barrel_content is None or barrel_content == existing_content:
+            return
+        if self.write_barrels:
+            create_barrel_file(self.project_root, barrel)
+        else:
+            emit("warning", "server_barrel_stale", f"{YELLOW}Barrel file {MAGENTA}{barrel_path}{RESET}{YELLOW} is out of date; rerun without --server (or pass --write-barrels) to regenerate it.{RESET}", path=str(barrel_path), alias=barrel['alias'])
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True}
+        if command == "reload":
+            self.refresh_barrels(force=True)
+            return {"ok": True}
+        if command is not None:
+            return {"error": f"Unknown command '{command}'"}
+
+        content = request.get("content")
+        if not isinstance(content, str) or not request.get("path"):
+            return {"error": "Requests need a 'path' and a 'content' string"}
+        file_path = Path(request["path"])
+        if not file_path.is_absolute():
+            file_path = self.project_root / file_path
+        file_path = file_path.resolve()
+
+        self.refresh_barrels()
+        if self.debarrel_mode:
+            updated_content = debarrel_content(content, file_path, self.export_maps) if self.export_maps else None
+        else:
+            updated_content = consolidate_import_content(content, file_path, self.barrels)
+
+        if updated_content is None:
+            return {"changed": False}
+        if request.get("edit"):
+            return {"changed": True, "edit": minimal_line_edit(content, updated_content)}
+        return {"changed": True, "content": updated_content}
+
+    def handle_line(self, line: str):
+        # Returns (response line, keep running)
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return json.dumps({"error": f"Invalid JSON: {e}"}), True
+        if not isinstance(request, dict):
+            return json.dumps({"error": "Requests must be JSON objects"}), True
+        if request.get("command") == "shutdown":
+            return json.dumps({"id": request.get("id"), "ok": True}), False
+        try:
+            response = self.handle(request)
+        except Exception as e: # A bad buffer must never take the server down
+            emit("error", "server_request_failed", f"{RED}Request failed: {e}{RESET}", error=str(e))
+            response = {"error": str(e)}
+        return json.dumps({"id": request.get("id"), **response}), True
+
+def serve_stdio(server: ImportServer):
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response, keep_running = server.handle_line(line)
+        sys.stdout.write(response + "\n")
+        sys.stdout.flush()
+        EVENT_LOG.flush()
+        if not keep_running:
+            break
+
+def serve_socket(server: ImportServer, socket_path: Path):
+    import socketserver
+    if not hasattr(socketserver, "UnixStreamServer"):
+        emit("error", "server_socket_unsupported", f"{RED}Unix sockets are not supported on this platform; use the stdin/stdout transport.{RESET}")
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw_line in self.rfile:
+                line = raw_line.decode("utf-8")
+                if not line.strip():
+                    continue
+                response, keep_running = server.handle_line(line)
+                self.wfile.write((response + "\n").encode("utf-8"))
+                self.wfile.flush()
+                EVENT_LOG.flush()
+                if not keep_running:
+                    self.server.shutdown_requested = True
+                    return
+
+    if socket_path.exists():
+        socket_path.unlink() # Stale socket from a previous run
+    with socketserver.UnixStreamServer(str(socket_path), Handler) as socket_server:
+        socket_server.shutdown_requested = False
+        EVENT_LOG.announce("info", "server_listening", f"{GREEN}Listening on {MAGENTA}{socket_path}{RESET}", socket=str(socket_path))
+        EVENT_LOG.flush()
+        try:
+            while not socket_server.shutdown_requested:
+                socket_server.handle_request()
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+def run_server(project_root: Path, barrels, debarrel_mode=False, socket_path=None, write_barrels=False):
+    server = ImportServer(project_root, barrels, debarrel_mode, write_barrels=write_barrels)
+    EVENT_LOG.flush()
+    try:
+        if socket_path:
+            serve_socket(server, Path(socket_path))
+        else:
+            serve_stdio(server)
+    except KeyboardInterrupt:
+        pass
 
 args = None # To be populated by main()
 
@@ -363,11 +1433,45 @@ from the specific UI component structure (e.g., '.../{UI_COMPONENTS_REL_PATH.nam
   Use a custom alias for UI imports (ensure tsconfig.json is updated accordingly):
     python3 {script_name} --ui-alias @my-ui-lib
 
+  De-barrel: rewrite imports from '{DEFAULT_UI_IMPORT_ALIAS}' into direct per-component imports (faster dev compiles):
+    python3 {script_name} --debarrel --dry-run
+
+  Preview a large migration as a patch, review it, and apply it later:
+    python3 {script_name} --debarrel --patch debarrel.patch
+    git apply debarrel.patch
+
+  Pre-commit hook: only normalize (and re-stage) the files in the git index:
+    python3 {script_name} --staged
+
+  Editor integration: keep a server running and send buffers to it on save (JSON lines on stdin/stdout):
+    python3 {script_name} --server
+    {{"id": 1, "path": "src/app/page.tsx", "content": "...", "edit": true}}
+
+  Process every barrel aliased in tsconfig.json 'paths' (e.g. 'ui', 'utilities', 'modules/*') in one pass:
+    python3 {script_name} --from-tsconfig --dry-run
+
+Barrel configuration ({DEFAULT_CONFIG_FILE_NAME} in the project root, or --config PATH):
+  {{
+    "fromTsconfig": false,
+    "barrels": [
+      {{ "alias": "ui", "dir": "src/shared/components/ui" }},
+      {{ "alias": "utilities", "dir": "src/shared/utilities", "generate": false }}
+    ]
+  }}
+  Explicit entries override tsconfig-derived ones for the same directory. "generate" controls whether
+  the barrel file itself is (re)written; derived barrels are only regenerated if they carry the
+  '{AUTO_GENERATED_HEADER}' header.
+
 Important:
   - Backups: Original files are backed up with a '.bak' extension before modification (unless it's a dry run).
   - tsconfig.json: For the new import alias (e.g., '{DEFAULT_UI_IMPORT_ALIAS}') to work, ensure you have a corresponding path alias in your tsconfig.json.
-  - Verbosity: The script is verbose by default, printing actions as it performs them.
-  - Target UI folder name: The script specifically looks for an import path segment matching the last part of UI_COMPONENTS_REL_PATH (i.e., '{UI_COMPONENTS_REL_PATH.name}').
+  - Output: Only warnings, errors and a compact summary are printed by default. Use --verbose for per-file details,
+    and --json-log PATH to get every event as JSON lines (e.g. for CI).
+  - Barrel matching: An import is a candidate when its path points at a module directly inside a barrel directory
+    (e.g., '@/shared/components/ui/button' or '../ui/button'), or is the barrel alias itself.
+  - Cache: Files already normalized for the current barrel configuration are recorded in '{DEFAULT_CACHE_FILE_NAME}'
+    and skipped on the next run. Changing a barrel's exports, its alias or the mode invalidates the cache.
+  - De-barrel mode: Names are resolved through the barrel's exports; names that cannot be resolved stay on the alias import.
 """,
         formatter_class=argparse.RawTextHelpFormatter
     )
@@ -381,35 +1485,91 @@ Important:
         default=DEFAULT_UI_IMPORT_ALIAS,
         help=f"The import alias to use for the UI barrel file (default: '%(default)s'). Ensure this alias is configured in your tsconfig.json paths."
     )
+    parser.add_argument("--config", type=str, help=f"Path to a barrel configuration file (default: '{DEFAULT_CONFIG_FILE_NAME}' in the project root, if present).")
+    parser.add_argument("--from-tsconfig", action="store_true", help="Derive barrels and their aliases from the 'paths' in tsconfig.json.")
+    parser.add_argument("--debarrel", action="store_true", help="Rewrite imports from barrel aliases into direct per-component imports (the inverse of consolidation).")
+    parser.add_argument("--verbose", action="store_true", help="Print per-file details (same as --log-level debug).")
+    parser.add_argument("--log-level", choices=list(LOG_LEVELS), default="warning", help="Minimum level of events printed to the console (default: %(default)s). The summary is always printed.")
+    parser.add_argument("--json-log", type=str, metavar="PATH", help="Write all events as JSON lines to PATH ('-' for stdout) when the run finishes.")
+    parser.add_argument("--json-log-level", choices=list(LOG_LEVELS), default="info", help="Minimum level of events written by --json-log (default: %(default)s).")
+    parser.add_argument("--staged", action="store_true", help="Pre-commit mode: only process staged .tsx files and re-stage the results. Barrel files are regenerated only when a file in their directory was added, removed or renamed.")
+    parser.add_argument("--cache", type=str, help=f"Path of the normalized-file cache (default: '{DEFAULT_CACHE_FILE_NAME}' in the project root).")
+    parser.add_argument("--no-cache", action="store_true", help=f"Analyse every file, ignoring and not updating the normalized-file cache and the parse cache shared with check-unused.py ('{project_scan.DEFAULT_CACHE_FILE_NAME}').")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_PARALLEL_JOBS, help="Number of parallel worker processes used by --debarrel (default: number of CPU cores).")
+    parser.add_argument("--patch", type=str, metavar="PATH", help="Dry run that writes every pending change (including barrel files) to PATH as one unified diff for 'git apply'. Implies --dry-run.")
+    parser.add_argument("--server", action="store_true", help="Editor-on-save mode: keep running and rewrite buffers sent as JSON lines on stdin (or --socket). Combine with --debarrel for de-barrel rewrites.")
+    parser.add_argument("--socket", type=str, metavar="PATH", help="With --server, listen on this Unix socket instead of stdin/stdout.")
+    parser.add_argument("--write-barrels", action="store_true", help="With --server, regenerate out-of-date barrel files on disk (never with --dry-run). By default the server only warns about them.")
 
     args = parser.parse_args() # Populate global args
 
+    global EVENT_LOG
+    EVENT_LOG = EventLog(
+        console_level="debug" if args.verbose else args.log_level,
+        record_level=args.json_log_level if args.json_log else None,
+        stream=sys.stderr if args.server else None
+    )
+
     project_root_path = None
     if args.root:
         project_root_path = Path(args.root).resolve()
         if not project_root_path.is_dir():
-            print(f"{RED}Error: Provided project root '{args.root}' is not a valid directory.{RESET}")
+            emit("error", "root_invalid", f"{RED}Error: Provided project root '{args.root}' is not a valid directory.{RESET}")
             return
-        print(f"{GREEN}Using manually specified project root: {MAGENTA}{project_root_path}{RESET}")
+        emit("debug", "project_root_manual", f"{GREEN}Using manually specified project root: {MAGENTA}{project_root_path}{RESET}", root=str(project_root_path))
     else:
         project_root_path = find_project_root()
 
     if not project_root_path:
-        print(f"{RED}Aborting script as project root could not be determined.{RESET}")
+        emit("error", "aborted", f"{RED}Aborting script as project root could not be determined.{RESET}")
         return
 
-    # Update the effective UI import alias based on args
+    # Update the effective UI import alias based on args (used when no barrel configuration is present)
     effective_ui_alias = args.ui_alias
-    print(f"{CYAN}Using UI import alias: '{MAGENTA}{effective_ui_alias}{RESET}'")
+    emit("debug", "ui_alias", f"{CYAN}Using UI import alias: '{MAGENTA}{effective_ui_alias}{RESET}'", alias=effective_ui_alias)
+
+    barrels = load_barrel_config(project_root_path, args.config, args.from_tsconfig, effective_ui_alias)
+    cache_path = Path(args.cache) if args.cache else project_root_path / DEFAULT_CACHE_FILE_NAME
+    if barrels is None:
+        emit("error", "aborted", f"{RED}Aborting script as the barrel configuration could not be loaded.{RESET}")
+        return
 
     # Now that we have project_root_path, we can add the tsconfig.json example
-    tsconfig_example = f"""Example for alias '{DEFAULT_UI_IMPORT_ALIAS}':
+    tsconfig_paths_example = ",\n".join(
+        f"""    "{barrel['alias']}": ["./{barrel['dir'].as_posix()}/{barrel['barrel_file']}"]""" for barrel in barrels
+    )
+    tsconfig_example = f"""Example for the configured aliases:
   "paths": {{
-    "{DEFAULT_UI_IMPORT_ALIAS}": ["{(project_root_path/UI_COMPONENTS_REL_PATH).as_posix()}/index.ts"]
+{tsconfig_paths_example}
   }}"""
-    print(f"\n{CYAN}Add this to your tsconfig.json:{RESET}\n{tsconfig_example}\n")
+    emit("debug", "tsconfig_hint", f"\n{CYAN}Add this to your tsconfig.json:{RESET}\n{tsconfig_example}\n")
+
+    if args.server:
+        run_server(project_root_path, barrels, args.debarrel, args.socket, write_barrels=args.write_barrels and not args.dry_run)
+        return
 
-    process_files(project_root_path, args.target, args.dry_run, args.revert, current_ui_alias=effective_ui_alias)
+    process_files(
+        project_root_path,
+        args.target,
+        args.dry_run,
+        args.revert,
+        barrels=barrels,
+        cache_path=None if args.no_cache else cache_path,
+        scan_cache_path=None if args.no_cache else project_root_path / project_scan.DEFAULT_CACHE_FILE_NAME,
+        staged_mode=args.staged,
+        debarrel_mode=args.debarrel,
+        jobs=args.jobs,
+        patch_path=args.patch
+    )
+
+def finish_event_log():
+    EVENT_LOG.flush()
+    if args is not None and args.json_log:
+        EVENT_LOG.write_json_lines(args.json_log)
+        EVENT_LOG.flush()
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_event_log()
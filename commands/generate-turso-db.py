@@ -6,9 +6,29 @@ import os
 import sys
 import time
 import json
-from datetime import datetime
+import random
+import uuid
+import shutil
+import sqlite3
+import csv
+import base64
+import hashlib
+import fnmatch
+import getpass
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit, quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
+try:
+    import fcntl # POSIX only; on Windows the pool files are used without locking
+except ImportError:
+    fcntl = None
+
 # Script metadata (automatically updated by pre-commit hook)
 SCRIPT_VERSION = "0.99" # Initial value, will become 1.00 on first commit
 LAST_UPDATED_TIMESTAMP = "Pending first commit" # Placeholder
@@ -32,7 +52,52 @@ class Colors:
 
 # Define a standard width for the content of all boxes
 CONTENT_WIDTH = 60
-STATE_FILE = Path.home() / ".turso_gen_state.json"
+STATE_FILE = Path.home() / ".turso_gen_state.json" # Legacy single-entry state, imported into the registry
+REGISTRY_FILE = Path.home() / ".turso_gen_registry.json"
+REGISTRY_LOCK_FILE = Path.home() / ".turso_gen_registry.lock"
+DEFAULT_DELETE_CONCURRENCY = 8 # Parallel `turso db destroy` calls during bulk deletion
+POOL_FILE = Path.home() / ".turso_gen_pool.json"
+POOL_LOCK_FILE = Path.home() / ".turso_gen_pool.lock"
+POOL_FILL_LOCK_FILE = Path.home() / ".turso_gen_pool_fill.lock"
+POOL_LOG_FILE = Path.home() / ".turso_gen_pool.log"
+DEFAULT_POOL_SIZE = 3
+DEFAULT_POOL_TTL_HOURS = 24 # Leased databases older than this are destroyed on the next refill
+DEFAULT_BATCH_MANIFEST = ".turso-batch.json"
+LOCAL_DB_DIR_NAME = ".turso-local" # In the project root
+LOCAL_DB_PREFIX = "local-"
+DRIZZLE_CONFIG_FILES = ["drizzle.config.ts", "drizzle.analytics.config.ts"]
+SQLITE_DIALECTS = {"sqlite", "turso"}
+FICLONE = 0x40049409 # Linux ioctl that clones a file by reference (btrfs, XFS, ...)
+DEFAULT_API_URL = "https://api.turso.tech"
+DEFAULT_DB_GROUP = "default"
+DEFAULT_METRICS_FILE = Path.home() / ".turso_gen_metrics.jsonl"
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0 # Seconds; doubled per attempt, with full jitter
+RETRY_MAX_DELAY = 20.0
+RETRYABLE_ERROR_KINDS = {"timeout", "network", "rate_limit", "server", "conflict"} # Creates adopt a database an earlier attempt made
+LIBSQL_HTTP_TIMEOUT = 30
+SEED_FILE_SUFFIXES = {".json", ".csv"}
+SEED_MAX_VARIABLES = 32766 # SQLite's bound-parameter limit (since 3.32) caps the rows per INSERT
+SEED_ROWS_PER_TRANSACTION = 10000
+DEFAULT_PROBE_OPS = 200
+DEFAULT_PROBE_WRITE_RATIO = 0.2
+PROBE_WARMUP_OPS = 5 # Untimed, so connection setup and TLS don't skew the percentiles
+PROBE_SEED_ROWS = 100
+PROBE_PAYLOAD_BYTES = 256
+PROBE_TABLE = "__turso_gen_probe"
+PREFLIGHT_CACHE_FILE = Path.home() / ".turso_gen_preflight.json"
+PREFLIGHT_LOCK_FILE = Path.home() / ".turso_gen_preflight.lock"
+PREFLIGHT_TTL_SECONDS = 300
+LIST_CACHE_FILE = Path.home() / ".turso_gen_dblist.json"
+LIST_CACHE_LOCK_FILE = Path.home() / ".turso_gen_dblist.lock"
+LIST_CACHE_TTL_SECONDS = 120
+LIST_PAGE_SIZE = 40
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+GENERATED_NAME_DATE = re.compile(r"^(?:db|local)-(\d{8})(?:-(\d{6}))?-")
+TURSO_SETTINGS_FILES = [
+    Path.home() / ".config" / "turso" / "settings.json",
+    Path.home() / "Library" / "Application Support" / "turso" / "settings.json",
+]
 
 def print_ascii_header():
     """Print a beautiful ASCII header with version and update info."""
@@ -84,6 +149,7 @@ def print_ascii_header():
 
 def print_step(step_num, total_steps, message):
     """Print a formatted step with progress indicator."""
+    METRICS.start_step(message.rstrip(".").strip())
     progress = "█" * step_num + "░" * (total_steps - step_num)
     print(f"\n{Colors.BOLD}{Colors.OKBLUE}[{step_num}/{total_steps}]{Colors.ENDC} {Colors.CYAN}[{progress}]{Colors.ENDC} {Colors.BOLD}{message}{Colors.ENDC}")
 
@@ -209,186 +275,1576 @@ def print_footer(db_name):
 ╚{'═' * CONTENT_WIDTH}╝{Colors.ENDC}
 """)
 
+# --- Platform API client ---
+# Talks to the Turso Platform API with JSON over keep-alive HTTP connections (one per thread, reused
+# across calls) instead of spawning the CLI and parsing its text output. Used when TURSO_API_TOKEN and
+# TURSO_ORG are set (or with --backend api); the CLI remains the fallback.
+
+def http_exchange(connection_for, method, url, body, headers, label, timeout):
+    """
+    Send one request over a keep-alive connection from connection_for(fresh), reconnecting once if the
+    server closed it while idle. Returns (response, raw body); transport failures raise ProvisioningError.
+    """
+    for attempt in range(2):
+        connection = connection_for(fresh=attempt > 0)
+        try:
+            connection.request(method, url, body=body, headers=headers)
+            response = connection.getresponse()
+            return response, response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            connection.close() # The server closed the idle keep-alive connection; reconnect once
+            if attempt:
+                raise ProvisioningError(f"{label} failed: {e}", kind="network")
+        except TimeoutError:
+            connection.close()
+            raise ProvisioningError(f"{label} timed out after {timeout}s", kind="timeout")
+        except OSError as e:
+            connection.close()
+            raise ProvisioningError(f"{label} failed: {e}", kind="network")
+
+class TursoApiClient:
+    def __init__(self, api_token, organization, base_url=DEFAULT_API_URL, group=DEFAULT_DB_GROUP, timeout=60):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.base_path = parts.path.rstrip("/")
+        self.api_token = api_token
+        self.organization = organization
+        self.group = group
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @classmethod
+    def from_environment(cls):
+        """A client configured from TURSO_API_TOKEN / TURSO_ORG (and optional TURSO_API_URL), or None."""
+        api_token = os.environ.get("TURSO_API_TOKEN")
+        organization = os.environ.get("TURSO_ORG")
+        if not api_token or not organization:
+            return None
+        return cls(
+            api_token, organization,
+            base_url=os.environ.get("TURSO_API_URL", DEFAULT_API_URL),
+            group=os.environ.get("TURSO_GROUP", DEFAULT_DB_GROUP),
+        )
+
+    def connection(self, fresh=False):
+        if fresh or getattr(self.local, "connection", None) is None:
+            self.local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        return self.local.connection
+
+    def request(self, method, path, payload=None, organization_scoped=True):
+        body = json.dumps(payload).encode() if payload is not None else None # bytes, so headers and body go out in one send()
+        headers = {"Authorization": f"Bearer {self.api_token}", "Content-Type": "application/json"}
+        scope = f"/organizations/{quote(self.organization)}" if organization_scoped else ""
+        url = f"{self.base_path}/v1{scope}{path}"
+        response, raw = http_exchange(self.connection, method, url, body, headers, f"Turso API {method} {path}", self.timeout)
+        try:
+            data = json.loads(raw) if raw else {}
+        except json.JSONDecodeError:
+            data = {}
+        if response.status >= 400:
+            raise ProvisioningError(
+                f"Turso API {method} {path} failed ({response.status}): {data.get('error', raw.decode(errors='replace'))}",
+                kind=API_ERROR_KINDS.get(response.status, "server" if response.status >= 500 else "other"),
+            )
+        return data
+
+    def validate_token(self):
+        self.request("GET", "/auth/validate", organization_scoped=False)
+
+    def create_database(self, db_name):
+        data = self.request("POST", "/databases", {"name": db_name, "group": self.group})
+        return data.get("database", {}).get("Name", db_name)
+
+    def get_database_url(self, db_name):
+        hostname = self.request("GET", f"/databases/{quote(db_name)}").get("database", {}).get("Hostname")
+        if not hostname:
+            raise ProvisioningError(f"The Turso API returned no hostname for {db_name}.")
+        return f"libsql://{hostname}"
+
+    def create_auth_token(self, db_name):
+        auth_token = self.request("POST", f"/databases/{quote(db_name)}/auth/tokens").get("jwt", "")
+        if len(auth_token) < 10:
+            raise ProvisioningError("Generated token appears invalid or empty.")
+        return auth_token
+
+    def destroy_database(self, db_name):
+        self.request("DELETE", f"/databases/{quote(db_name)}")
+
+    def list_databases(self):
+        databases = self.request("GET", "/databases").get("databases", [])
+        for db in databases:
+            db.setdefault("Region", db.get("primaryRegion", "N/A"))
+        return databases
+
+API_CLIENT = None # Set by main() when the API backend is used
+API_ERROR_KINDS = {401: "auth", 403: "auth", 404: "not_found", 409: "conflict", 429: "rate_limit"}
+
 def run_command(command, timeout=30):
     """Run a shell command and return its output and error (if any)."""
     result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=timeout)
     return result.stdout.strip(), result.stderr.strip(), result.returncode
 
-def save_last_generated_db(db_name):
-    """Saves the last generated database name to a state file."""
-    try:
-        with open(STATE_FILE, "w") as f:
-            json.dump({"last_generated_db": db_name}, f)
-    except Exception as e:
-        print_warning(f"Could not save state file: {e}")
+@contextmanager
+def file_lock(lock_path, blocking=True):
+    """Hold an exclusive lock on lock_path. Yields False if blocking=False and the lock is taken."""
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-def read_last_generated_db():
-    """Reads the last generated database name from the state file."""
-    if not STATE_FILE.exists():
-        return None
+def read_json_file(path, default):
     try:
-        with open(STATE_FILE, "r") as f:
-            data = json.load(f)
-            return data.get("last_generated_db")
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
     except (json.JSONDecodeError, IOError) as e:
-        print_warning(f"Could not read state file: {e}")
-        # Optionally, delete corrupted state file
-        # STATE_FILE.unlink(missing_ok=True)
+        print_warning(f"Could not read {path}: {e}")
+    return default
+
+@contextmanager
+def json_transaction(path, lock_path, default):
+    """Read-modify-write a JSON file under an exclusive lock, replacing it atomically."""
+    with file_lock(lock_path):
+        data = read_json_file(path, default)
+        yield data
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        # Owner-only: the pool and the registry hold database URLs and live auth tokens
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path) # Readers never see a half-written file
+
+# --- Registry of generated databases ---
+# Every database this script creates is recorded with its URL, creation time, owner, tag (the git
+# branch by default) and optional TTL, so parallel runs don't clobber each other and nothing leaks.
+
+def registry_transaction():
+    return json_transaction(REGISTRY_FILE, REGISTRY_LOCK_FILE, {"databases": []})
+
+def import_legacy_state(registry):
+    """Move the name from the old single-entry state file into the registry."""
+    if not STATE_FILE.exists():
+        return
+    legacy_name = read_json_file(STATE_FILE, {}).get("last_generated_db")
+    if legacy_name and all(db["name"] != legacy_name for db in registry["databases"]):
+        registry["databases"].append({
+            "name": legacy_name, "url": None, "owner": None, "tag": None, "ttl_hours": None,
+            "created_at": datetime.fromtimestamp(STATE_FILE.stat().st_mtime).isoformat(timespec="seconds"),
+        })
+    STATE_FILE.unlink(missing_ok=True)
+
+def current_tag():
+    """The CI branch name, or the current git branch, used as the default registry tag."""
+    for variable in ("GITHUB_HEAD_REF", "GITHUB_REF_NAME", "CI_COMMIT_REF_NAME"):
+        if os.environ.get(variable):
+            return os.environ[variable]
+    try:
+        result = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
         return None
+    return result.stdout.strip() or None
 
-def delete_database(db_name):
-    """Deletes a Turso database."""
-    print_info(f"Attempting to delete database: {Colors.CYAN}{db_name}{Colors.ENDC}")
+def register_databases(databases, tag=None, ttl_hours=None):
+    """Record newly created databases ({'name', 'url', ...} dicts) in the registry."""
+    created_at = datetime.now().isoformat(timespec="seconds")
+    owner = getpass.getuser()
+    host = socket.gethostname()
+    try:
+        with registry_transaction() as registry:
+            import_legacy_state(registry)
+            registry["databases"].extend({
+                "name": db["name"], "url": db.get("url"), "owner": owner, "host": host, "tag": tag,
+                "ttl_hours": ttl_hours, "created_at": created_at,
+            } for db in databases)
+    except OSError as e:
+        print_warning(f"Could not update registry {REGISTRY_FILE}: {e}")
+
+def register_database(db_name, db_url=None, tag=None, ttl_hours=None):
+    register_databases([{"name": db_name, "url": db_url}], tag, ttl_hours)
+
+def record_database_url(db_name, db_url):
+    """Fill in the URL of a database registered before its URL was known."""
+    try:
+        with registry_transaction() as registry:
+            for db in registry["databases"]:
+                if db["name"] == db_name:
+                    db["url"] = db_url
+    except OSError as e:
+        print_warning(f"Could not update registry {REGISTRY_FILE}: {e}")
+
+def forget_databases(db_names):
+    """Drop deleted databases from the registry and the warm pool."""
+    db_names = set(db_names)
+    if not db_names:
+        return
+    with registry_transaction() as registry:
+        registry["databases"] = [db for db in registry["databases"] if db["name"] not in db_names]
+    if POOL_FILE.exists():
+        with pool_transaction() as pool:
+            pool["databases"] = [db for db in pool["databases"] if db["name"] not in db_names]
+    if LIST_CACHE_FILE.exists():
+        with json_transaction(LIST_CACHE_FILE, LIST_CACHE_LOCK_FILE, {}) as cache:
+            cache["databases"] = [db for db in cache.get("databases", []) if database_name(db) not in db_names]
+
+def registered_databases(tag=None):
+    """Registry entries, oldest first, optionally only those with the given tag."""
+    if STATE_FILE.exists(): # Only until the legacy state is imported; plain reads need no lock
+        try:
+            with registry_transaction() as registry:
+                import_legacy_state(registry)
+        except OSError as e:
+            print_warning(f"Could not update registry {REGISTRY_FILE}: {e}")
+    databases = read_json_file(REGISTRY_FILE, {"databases": []}).get("databases", [])
+    return sorted((db for db in databases if tag is None or db["tag"] == tag), key=lambda db: db["created_at"])
+
+def is_expired(db, now=None):
+    if db.get("ttl_hours") is None:
+        return False
+    return datetime.fromisoformat(db["created_at"]) + timedelta(hours=db["ttl_hours"]) < (now or datetime.now())
+
+def list_databases():
+    """Return the account's databases as dicts with the CLI's JSON keys ('Name', 'Region', ...)."""
+    if API_CLIENT:
+        return API_CLIENT.list_databases()
+    output, error, code = run_command("turso db list --json")
+    if code != 0:
+        raise ProvisioningError(f"Turso CLI Error: {error or 'Unknown error'}")
+    try:
+        data = json.loads(output)
+        # The key might be 'databases' or 'dbs' depending on CLI version or if it's empty
+        return data.get("databases", data.get("dbs", []))
+    except json.JSONDecodeError as e:
+        raise ProvisioningError(f"Could not parse the list of databases: {e}", output)
+
+def destroy_database(db_name, db_url=None):
+    """Destroy a Turso database without printing anything. Returns (success, error_detail).
+
+    Only a file: db_url (as recorded in the registry or a batch manifest) makes it a local database
+    file; everything else, including every database from the account listing, goes to the API or CLI.
+    """
+    if db_url and db_url.startswith("file:"):
+        try:
+            Path(db_url[len("file:"):]).unlink()
+            return True, None
+        except OSError as e:
+            return False, str(e)
+    if API_CLIENT:
+        try:
+            API_CLIENT.destroy_database(db_name)
+            return True, None
+        except ProvisioningError as e:
+            return False, str(e)
     command = f"turso db destroy {db_name} --yes" # --yes confirms deletion
-    
-    output, error, code = run_command(command, timeout=60)
-    
+    try:
+        output, error, code = run_command(command, timeout=60)
+    except subprocess.TimeoutExpired:
+        return False, "Timed out after 60s"
+
     # Turso CLI might change its output format slightly.
     # Check for common success indicators.
     if code == 0 and (f"Destroyed database {db_name}" in output or "successfully deleted" in output.lower()):
+        return True, None
+    return False, error or output or f"turso exited with code {code}"
+
+def delete_database(db_name, db_url=None):
+    """Deletes a Turso database."""
+    print_info(f"Attempting to delete database: {Colors.CYAN}{db_name}{Colors.ENDC}")
+    success, detail = destroy_database(db_name, db_url)
+    if success:
+        forget_databases([db_name])
         print_success(f"Successfully deleted database '{Colors.CYAN}{db_name}{Colors.ENDC}'")
         return True
+    print_error(f"Failed to delete database '{Colors.CYAN}{db_name}{Colors.ENDC}'")
+    print_error(f"Turso CLI Error: {detail}")
+    return False
+
+def delete_databases(db_names, concurrency=DEFAULT_DELETE_CONCURRENCY, db_urls=None):
+    """Delete several databases concurrently, printing each result as it completes.
+
+    db_urls maps names to their recorded URLs (see destroy_database). Returns a list of
+    (db_name, error_detail) for the databases that could not be deleted.
+    """
+    db_urls = db_urls or {}
+    total = len(db_names)
+    workers = max(1, min(concurrency, total))
+    print_info(f"Deleting {total} database(s), up to {workers} at a time...")
+    started_at = time.monotonic()
+    failures = []
+
+    # Each deletion is a separate `turso` process, so threads are enough to overlap them
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(destroy_database, db_name, db_urls.get(db_name)): db_name for db_name in db_names}
+        for done, future in enumerate(as_completed(futures), start=1):
+            db_name = futures[future]
+            try:
+                success, detail = future.result()
+            except Exception as e:
+                success, detail = False, str(e)
+            elapsed = time.monotonic() - started_at
+            progress = f"{Colors.BOLD}{Colors.WHITE}[{done}/{total}]{Colors.ENDC}"
+            if success:
+                print(f"  {progress} {Colors.OKGREEN}✅ {db_name}{Colors.ENDC} {Colors.GRAY}({elapsed:.1f}s){Colors.ENDC}")
+            else:
+                print(f"  {progress} {Colors.FAIL}❌ {db_name}{Colors.ENDC} {Colors.GRAY}({elapsed:.1f}s){Colors.ENDC}")
+                failures.append((db_name, detail))
+
+    failed_names = {db_name for db_name, _ in failures}
+    forget_databases([db_name for db_name in db_names if db_name not in failed_names])
+    print_info(f"Processed {total} database(s) in {time.monotonic() - started_at:.1f}s.")
+    if failures:
+        print_section_divider(f"❌ {len(failures)} DELETION(S) FAILED")
+        for db_name, detail in failures:
+            print(f"  - {Colors.BOLD}{Colors.FAIL}{db_name}{Colors.ENDC}: {detail}")
+    return failures
+
+def delete_last_generated_db(tag=None, concurrency=DEFAULT_DELETE_CONCURRENCY):
+    """
+    Handler for the --delete-generation flag: every generated database with `tag`, or else the newest one
+    created by this user on this host (the registry may be shared with other jobs).
+    """
+    if tag:
+        print_section_divider(f"🗑️ Delete Generated Databases Tagged '{tag}'")
+        databases = registered_databases(tag)
     else:
-        print_error(f"Failed to delete database '{Colors.CYAN}{db_name}{Colors.ENDC}'")
-        # Provide more detailed error output from Turso CLI
-        if error: print_error(f"Turso CLI Error: {error}")
-        if output: print_info(f"Turso CLI Output: {output}")
-        return False
-
-def delete_last_generated_db():
-    """Handler for the --delete-generation flag."""
-    print_section_divider("🗑️ Delete Last Generated Database")
-    db_name = read_last_generated_db()
-    if not db_name:
+        print_section_divider("🗑️ Delete Last Generated Database")
+        owner, host = getpass.getuser(), socket.gethostname()
+        databases = [db for db in registered_databases() if db.get("owner") == owner and db.get("host") == host][-1:]
+    db_names = [db["name"] for db in databases]
+    db_urls = {db["name"]: db.get("url") for db in databases}
+    if not db_names:
         print_error("No previously generated database found to delete.")
-        print_info(f"State file ({STATE_FILE}) not found, empty, or unreadable.")
+        print_info(f"Registry ({REGISTRY_FILE}) has no matching entries.")
         sys.exit(1)
-    
-    if delete_database(db_name):
-        try:
-            STATE_FILE.unlink() # Remove state file after successful deletion
-            print_info("Cleared state file for the deleted database.")
-        except OSError as e:
-            print_warning(f"Could not remove state file {STATE_FILE}: {e}")
-    else:
-        sys.exit(1) # Exit if deletion failed
 
-def interactive_delete():
-    """Provides an interactive UI to delete databases."""
-    print_section_divider("🗑️ Interactive Database Deletion")
-    print_info("Fetching list of databases...")
-
-    output, error, code = run_command("turso db list --json")
-    if code != 0:
-        print_error("Could not fetch database list.")
-        if error: print_error(f"Turso CLI Error: {error}")
+    if len(db_names) == 1:
+        if not delete_database(db_names[0], db_urls[db_names[0]]):
+            sys.exit(1) # Exit if deletion failed
+    elif delete_databases(db_names, concurrency, db_urls):
         sys.exit(1)
 
+def collect_expired_databases(concurrency=DEFAULT_DELETE_CONCURRENCY):
+    """Handler for --gc: delete every registered database whose TTL has passed, in parallel."""
+    print_section_divider("♻️ Garbage-Collect Expired Databases")
+    now = datetime.now()
+    expired = {db["name"]: db.get("url") for db in registered_databases() if is_expired(db, now)}
+    if not expired:
+        print_success("No expired databases in the registry. All clear! ✨")
+        return True
+    return not delete_databases(list(expired), concurrency, expired)
+
+def print_registry(tag=None):
+    """Handler for --list-generated."""
+    print_section_divider("📒 GENERATED DATABASES")
+    databases = registered_databases(tag)
+    if not databases:
+        print_info("The registry is empty.")
+        return
+    now = datetime.now()
+    for db in databases:
+        ttl = f", ttl {db['ttl_hours']:g}h" if db.get("ttl_hours") is not None else ""
+        expired = f" {Colors.FAIL}(expired){Colors.ENDC}" if is_expired(db, now) else ""
+        tag_label = f" [{db['tag']}]" if db.get("tag") else ""
+        print(f"  {Colors.CYAN}{db['name']}{Colors.ENDC}{Colors.YELLOW}{tag_label}{Colors.ENDC} {Colors.GRAY}(created {db['created_at']} by {db.get('owner') or '?'}{'@' + db['host'] if db.get('host') else ''}{ttl}){Colors.ENDC}{expired}")
+
+# --- Cached, filtered listing ---
+# The account's database list is cached for LIST_CACHE_TTL_SECONDS (--refresh refetches), so narrowing a
+# selection down over several invocations doesn't refetch hundreds of databases each time. Filters
+# combine a name pattern, creation age and registry tag; deletions prune the cache.
+
+def backend_fingerprint():
+    """What cached CLI/API results depend on: the backend, its credentials and the CLI login state."""
+    if API_CLIENT:
+        token_hash = hashlib.sha256(API_CLIENT.api_token.encode()).hexdigest()
+        return ["api", API_CLIENT.netloc, API_CLIENT.organization, token_hash]
+    turso_path = shutil.which("turso")
+    parts = ["cli", turso_path or ""]
+    # Logging in or out rewrites the CLI settings file, which invalidates the cache
+    for candidate in [turso_path] + [str(path) for path in TURSO_SETTINGS_FILES]:
+        if candidate and os.path.exists(candidate):
+            parts.append(f"{candidate}:{os.stat(candidate).st_mtime_ns}")
+    return parts
+
+def cached_list_databases(refresh=False):
+    """list_databases() through the listing cache. Returns (databases, age of the data in seconds)."""
+    cache_key = hashlib.sha256("\0".join(backend_fingerprint()).encode()).hexdigest()
+    cache = read_json_file(LIST_CACHE_FILE, {})
+    age = time.time() - cache.get("fetched_at", 0)
+    if not refresh and cache.get("key") == cache_key and age < LIST_CACHE_TTL_SECONDS:
+        return cache["databases"], age
+    databases = list_databases()
+    with json_transaction(LIST_CACHE_FILE, LIST_CACHE_LOCK_FILE, {}) as cache:
+        cache.clear()
+        cache.update({"key": cache_key, "fetched_at": time.time(), "databases": databases})
+    return databases, 0.0
+
+def database_name(db_info):
+    # Turso CLI output for db name can vary (e.g., 'Name' or 'name')
+    return db_info.get("Name", db_info.get("name", "N/A"))
+
+def parse_duration(text):
+    """argparse type for --older-than: '90m', '36h', '7d' or '2w'."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([mhdw])", text.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration '{text}' (use e.g. 90m, 36h, 7d or 2w)")
+    return timedelta(**{DURATION_UNITS[match.group(2)]: float(match.group(1))})
+
+def database_created_at(db_name, registry_entry=None):
+    """Creation time from the registry, else from a generated name (db-YYYYMMDD-..., local-YYYYMMDD-HHMMSS-...), else None."""
+    if registry_entry:
+        return datetime.fromisoformat(registry_entry["created_at"])
+    match = GENERATED_NAME_DATE.match(db_name)
+    if match:
+        return datetime.strptime(match.group(1) + (match.group(2) or "000000"), "%Y%m%d%H%M%S")
+    return None
+
+def filter_databases(databases, patterns=None, regex=False, older_than=None, tag=None):
+    """
+    Yield (db_info, registry_entry, created_at) for the databases matching every given filter.
+    Patterns are globs (or regexes with regex=True); any one of them may match. Databases of
+    unknown age never match older_than.
+    """
+    registry = {db["name"]: db for db in registered_databases()}
+    if regex:
+        matchers = [re.compile(pattern).search for pattern in patterns or []]
+    else:
+        matchers = [lambda name, pattern=pattern: fnmatch.fnmatchcase(name, pattern) for pattern in patterns or []]
+    cutoff = datetime.now() - older_than if older_than else None
+    for db_info in databases:
+        name = database_name(db_info)
+        registry_entry = registry.get(name)
+        if matchers and not any(match(name) for match in matchers):
+            continue
+        if tag is not None and (registry_entry is None or registry_entry.get("tag") != tag):
+            continue
+        created_at = database_created_at(name, registry_entry)
+        if cutoff and (created_at is None or created_at > cutoff):
+            continue
+        yield db_info, registry_entry, created_at
+
+def format_database_line(index, db_info, registry_entry, created_at):
+    db_region = db_info.get("Region", db_info.get("region", "N/A"))
+    created = f", created {created_at:%Y-%m-%d %H:%M}" if created_at else ""
+    tag_label = f" {Colors.YELLOW}[{registry_entry['tag']}]{Colors.ENDC}" if registry_entry and registry_entry.get("tag") else ""
+    return f"  {Colors.BOLD}{Colors.WHITE}[{index}]{Colors.ENDC} {Colors.CYAN}{database_name(db_info)}{Colors.ENDC}{tag_label} ({Colors.GRAY}Region: {db_region}{created}{Colors.ENDC})"
+
+def print_name_preview(db_names, limit=20):
+    for db_name in db_names[:limit]:
+        print(f"  - {Colors.BOLD}{Colors.FAIL}{db_name}{Colors.ENDC}")
+    if len(db_names) > limit:
+        print(f"  {Colors.GRAY}... and {len(db_names) - limit} more{Colors.ENDC}")
+
+def fetch_filtered(filters, refresh=False):
+    """Fetch (cached) and filter the account's databases, reporting where the list came from."""
+    print_info("Fetching list of databases...")
     try:
-        data = json.loads(output)
-        # The key might be 'databases' or 'dbs' depending on CLI version or if it's empty
-        databases = data.get("databases", data.get("dbs", [])) 
-    except (json.JSONDecodeError, KeyError) as e:
-        print_error("Could not parse the list of databases.")
-        print_info(f"Received output: {output}")
-        print_error(f"Parsing error: {e}")
+        databases, age = cached_list_databases(refresh)
+    except ProvisioningError as e:
+        print_error("Could not fetch database list.")
+        print_error(str(e))
+        if e.output: print_info(f"Received output: {e.output}")
         sys.exit(1)
+    source = f"cached {age:.0f}s ago, use --refresh to refetch" if age else "fetched just now"
+    print_info(f"{len(databases)} database(s) in the account ({source}).")
+    return filter_databases(databases, **filters)
+
+def print_database_list(filters, refresh=False, page_size=LIST_PAGE_SIZE):
+    """Handler for --list-databases: stream matching databases, a page at a time on a terminal."""
+    print_section_divider("📋 DATABASES")
+    paged = sys.stdin.isatty() and sys.stdout.isatty()
+    shown = 0
+    for shown, match in enumerate(fetch_filtered(filters, refresh), start=1):
+        print(format_database_line(shown, *match))
+        if paged and shown % page_size == 0:
+            if input(f"{Colors.GRAY}-- Enter for more, q to stop --{Colors.ENDC} ").strip().lower() == "q":
+                return
+    print_info(f"{shown} database(s) match.")
+
+def parse_selection(selection, count):
+    """Indices (0-based) for input like '1 3 5-9' or 'all'; invalid items are skipped with a warning."""
+    selected = []
+    for item in selection.split():
+        if item.lower() == "all":
+            selected.extend(range(count))
+            continue
+        bounds = item.split("-", 1)
+        try:
+            first, last = int(bounds[0]), int(bounds[-1])
+        except ValueError:
+            print_warning(f"Invalid input '{item}' skipped. Please enter numbers, ranges or 'all'.")
+            continue
+        for number in range(first, last + 1):
+            if 1 <= number <= count:
+                selected.append(number - 1)
+            else:
+                print_warning(f"Invalid selection number: {number}. Skipping.")
+    return list(dict.fromkeys(selected)) # Drop duplicates, keep order
+
+def confirm_and_delete(db_names, concurrency, assume_yes=False):
+    """Show what is about to go, ask for 'yes' (unless assume_yes) and bulk-delete. Returns True when all went."""
+    print_section_divider("🚨 CONFIRM DELETION")
+    print_warning(f"You are about to PERMANENTLY delete {len(db_names)} database(s):")
+    print_name_preview(db_names)
+    if not assume_yes:
+        confirm = input(f"\n{Colors.BOLD}{Colors.YELLOW}Are you absolutely sure? This action cannot be undone. (yes/N): {Colors.ENDC}").strip().lower()
+        if confirm != 'yes':
+            print_info("Deletion aborted by user.")
+            return True
+    print_info("Proceeding with deletion...")
+    failures = delete_databases(db_names, concurrency)
+    if failures:
+        print_warning(f"{len(failures)} of {len(db_names)} database(s) could not be deleted. See the list above.")
+        return False
+    print_success("Selected databases have been processed for deletion.")
+    return True
+
+def delete_matching(filters, concurrency=DEFAULT_DELETE_CONCURRENCY, refresh=False, assume_yes=False):
+    """Handler for --delete-matching: bulk-delete every database the filters select."""
+    print_section_divider("🗑️ Delete Matching Databases")
+    db_names = [database_name(db_info) for db_info, _, _ in fetch_filtered(filters, refresh)]
+    if not db_names:
+        print_info("No databases match the given filters.")
+        return True
+    if not assume_yes and not sys.stdin.isatty():
+        print_name_preview(db_names)
+        print_error("Refusing to delete without confirmation; pass --yes to run non-interactively.")
+        return False
+    return confirm_and_delete(db_names, concurrency, assume_yes)
 
-    if not databases:
+def interactive_delete(concurrency=DEFAULT_DELETE_CONCURRENCY, filters=None, refresh=False, page_size=LIST_PAGE_SIZE):
+    """Provides an interactive UI to delete databases."""
+    print_section_divider("🗑️ Interactive Database Deletion")
+    matches = list(fetch_filtered(filters or {}, refresh))
+
+    if not matches:
         print_success("You have no databases to delete. All clear! ✨")
         sys.exit(0)
 
-    print_info("Select databases to delete by typing their numbers, separated by spaces.")
-    print_info(f"Example: '{Colors.YELLOW}1 3 4{Colors.ENDC}' to select databases 1, 3, and 4.")
-    print("")
-
-    for i, db_info in enumerate(databases):
-        # Turso CLI output for db name can vary (e.g., 'Name' or 'name')
-        db_name = db_info.get("Name", db_info.get("name", "N/A"))
-        db_region = db_info.get("Region", db_info.get("region", "N/A"))
-        print(f"  {Colors.BOLD}{Colors.WHITE}[{i+1}]{Colors.ENDC} {Colors.CYAN}{db_name}{Colors.ENDC} ({Colors.GRAY}Region: {db_region}{Colors.ENDC})")
-
-    print("") 
+    print_info("Select databases to delete by typing their numbers or ranges, separated by spaces.")
+    print_info(f"Example: '{Colors.YELLOW}1 3 5-9{Colors.ENDC}' selects databases 1, 3 and 5 to 9; '{Colors.YELLOW}all{Colors.ENDC}' selects every listed database.")
 
     try:
-        selection_str = input(f"{Colors.BOLD}{Colors.YELLOW}Enter numbers to delete (or press Enter to cancel): {Colors.ENDC}")
-        if not selection_str.strip():
-            print_info("Deletion cancelled by user.")
-            sys.exit(0)
-
-        selected_indices = []
-        for item in selection_str.split():
-            try:
-                selected_indices.append(int(item) - 1)
-            except ValueError:
-                print_warning(f"Invalid input '{item}' skipped. Please enter numbers only.")
-        
-        dbs_to_delete_names = []
-        valid_selections = False
-        for i in selected_indices:
-            if 0 <= i < len(databases):
-                db_name_key = "Name" if "Name" in databases[i] else "name"
-                dbs_to_delete_names.append(databases[i][db_name_key])
-                valid_selections = True
-            else:
-                print_warning(f"Invalid selection number: {i+1}. Skipping.")
-        
-        if not valid_selections or not dbs_to_delete_names:
+        page_start = 0
+        while True:
+            print("")
+            page_end = min(page_start + page_size, len(matches))
+            for i in range(page_start, page_end):
+                print(format_database_line(i + 1, *matches[i]))
+            print("")
+            more = page_end < len(matches)
+            hint = f"Enter for the next page ({page_end}/{len(matches)} shown)" if more else "press Enter to cancel"
+            selection_str = input(f"{Colors.BOLD}{Colors.YELLOW}Enter numbers to delete (or {hint}): {Colors.ENDC}")
+            if selection_str.strip():
+                break
+            if not more:
+                print_info("Deletion cancelled by user.")
+                sys.exit(0)
+            page_start = page_end
+
+        dbs_to_delete_names = [database_name(matches[i][0]) for i in parse_selection(selection_str, len(matches))]
+        if not dbs_to_delete_names:
             print_error("No valid databases selected for deletion. Aborting.")
             sys.exit(1)
 
-        print_section_divider("🚨 CONFIRM DELETION")
-        print_warning("You are about to PERMANENTLY delete the following databases:")
-        for db_name_to_delete in dbs_to_delete_names:
-            print(f"  - {Colors.BOLD}{Colors.FAIL}{db_name_to_delete}{Colors.ENDC}")
-        
-        confirm = input(f"\n{Colors.BOLD}{Colors.YELLOW}Are you absolutely sure? This action cannot be undone. (yes/N): {Colors.ENDC}").strip().lower()
-
-        if confirm == 'yes':
-            print_info("Proceeding with deletion...")
-            all_successful = True
-            for db_name_to_delete in dbs_to_delete_names:
-                if not delete_database(db_name_to_delete):
-                    all_successful = False # Mark if any deletion fails
-            if all_successful:
-                print_success("Selected databases have been processed for deletion.")
-            else:
-                print_warning("Some databases could not be deleted. Check messages above.")
-        else:
-            print_info("Deletion aborted by user.")
+        if not confirm_and_delete(dbs_to_delete_names, concurrency):
+            sys.exit(1)
 
-    except ValueError: # Handles non-integer input if not caught by the loop
-        print_error("Invalid input. Please enter numbers separated by spaces.")
-        sys.exit(1)
     except KeyboardInterrupt:
         print_error("\nOperation cancelled by user.")
         sys.exit(1)
 
 
-def check_dependencies():
-    """Check if required dependencies are installed."""
-    print_step(1, 6, "Checking system dependencies...")
-    turso_output, turso_error, turso_code = run_command("turso --version")
-    if turso_code != 0:
-        print_error("Turso CLI is not installed or not in PATH!")
-        print_info("Please install Turso CLI from: https://docs.turso.tech/reference/turso-cli")
-        sys.exit(1)
-    
-    turso_version = turso_output.split('\n')[0] if turso_output else "Unknown version"
-    print_success(f"Turso CLI found: {Colors.CYAN}{turso_version}{Colors.ENDC}")
+ERROR_KIND_PATTERNS = [
+    ("timeout", re.compile(r"timed? ?out|deadline exceeded", re.IGNORECASE)),
+    ("auth", re.compile(r"\b40[13]\b|unauthori[sz]ed|forbidden|not logged in|not authenticated|invalid token", re.IGNORECASE)),
+    ("conflict", re.compile(r"\b409\b|already exists|conflict", re.IGNORECASE)),
+    ("rate_limit", re.compile(r"\b429\b|rate.?limit|too many requests", re.IGNORECASE)),
+    ("server", re.compile(r"\b50[0234]\b|internal server error|service unavailable|bad gateway", re.IGNORECASE)),
+    ("network", re.compile(r"connection (?:refused|reset)|network|temporar(?:y|ily)|could not resolve|no such host|\bEOF\b", re.IGNORECASE)),
+]
+
+def classify_error(text):
+    """Map an error message to a kind: timeout, auth, conflict, rate_limit, server, network or other."""
+    for kind, pattern in ERROR_KIND_PATTERNS:
+        if pattern.search(text or ""):
+            return kind
+    return "other"
+
+class ProvisioningError(Exception):
+    """A Turso CLI or API call failed; `output` holds the response worth showing, if any."""
+    def __init__(self, message, output=None, kind=None):
+        super().__init__(message)
+        self.output = output
+        self.kind = kind or classify_error(f"{message} {output or ''}")
+
+class RunMetrics:
+    """Per-step timings and retries of one run, appended as a JSON line to a metrics file."""
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.steps = []
+        self.retries = []
+        self.current_step = None
+        self.metrics_path = None # Set by main() when --metrics is given
+        self.fields = {}
+
+    def start_step(self, name):
+        self.end_step()
+        self.current_step = (name, time.monotonic())
+
+    def end_step(self):
+        if self.current_step:
+            name, started_at = self.current_step
+            self.steps.append({"step": name, "seconds": round(time.monotonic() - started_at, 3)})
+            self.current_step = None
+
+    def record_retry(self, operation, attempt, kind, delay):
+        self.retries.append({"operation": operation, "attempt": attempt, "kind": kind, "delay": round(delay, 3)})
+
+    def finish(self, outcome):
+        self.end_step()
+        if not self.metrics_path:
+            return
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "outcome": outcome,
+            "total_seconds": round(time.monotonic() - self.started_at, 3),
+            **self.fields,
+            "steps": self.steps,
+            "retries": self.retries,
+        }
+        try:
+            with open(self.metrics_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except IOError as e:
+            print_warning(f"Could not write metrics to {self.metrics_path}: {e}")
+
+METRICS = RunMetrics()
+
+def retry_operation(operation, description, attempts=RETRY_ATTEMPTS, retry_on=RETRYABLE_ERROR_KINDS):
+    """Run operation(), retrying transient failures with exponential backoff and full jitter.
+
+    Errors whose kind is not in `retry_on` (e.g. auth) fail immediately.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except ProvisioningError as e:
+            if e.kind not in retry_on or attempt == attempts:
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+            METRICS.record_retry(description, attempt, e.kind, delay)
+            print_warning(f"Could not {description} ({e.kind}): {e}. Retrying in {delay:.1f}s ({attempt}/{attempts - 1})...")
+            time.sleep(delay)
+
+def run_cli_step(command, timeout):
+    """run_command() for provisioning steps: a timeout becomes a ProvisioningError that can be retried."""
+    try:
+        return run_command(command, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise ProvisioningError(f"`{command}` timed out after {timeout}s", kind="timeout")
+
+def generate_db_name():
+    return f"db-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+
+def create_database():
+    """
+    Create a database with a generated name and return that name.
+
+    A create that timed out or lost its connection may still have gone through, so before each retry the
+    names tried so far are looked up and an existing one is adopted instead of creating a second database.
+    """
+    attempted_names = []
+    def attempt():
+        if attempted_names:
+            existing = {database_name(db) for db in list_databases()}
+            adopted = next((name for name in attempted_names if name in existing), None)
+            if adopted:
+                print_info(f"An earlier attempt created '{adopted}' after all; using it.")
+                return adopted
+        db_name = generate_db_name()
+        attempted_names.append(db_name)
+        return create_database_once(db_name)
+    return retry_operation(attempt, "create the database")
+
+def create_database_once(db_name):
+    if API_CLIENT:
+        return API_CLIENT.create_database(db_name)
+    create_output, create_error, create_code = run_cli_step(f"turso db create {db_name}", timeout=90) # Increased timeout
+    if create_code != 0:
+        raise ProvisioningError(f"Database creation failed: {create_error or 'Unknown error'}")
+
+    db_name_match = re.search(r'(?:Created database|Database)\s+([\w-]+)', create_output) # More flexible regex
+    return db_name_match.group(1) if db_name_match else db_name
+
+def get_database_url(db_name):
+    """Return the libsql:// URL of a database."""
+    return retry_operation(lambda: get_database_url_once(db_name), "retrieve the database URL")
+
+def get_database_url_once(db_name):
+    if API_CLIENT:
+        return API_CLIENT.get_database_url(db_name)
+    show_output, show_error, show_code = run_cli_step(f"turso db show {db_name}", timeout=60)
+    if show_code != 0:
+        raise ProvisioningError(f"Failed to get database details for {db_name}: {show_error}")
+
+    url_match = re.search(r'URL:\s+(libsql://[\w.-]+)', show_output)
+    if not url_match:
+        raise ProvisioningError("Could not extract database URL from Turso output.", show_output, kind="other")
+    return url_match.group(1)
+
+def create_auth_token(db_name):
+    """Create an authentication token for a database."""
+    return retry_operation(lambda: create_auth_token_once(db_name), "create the auth token")
+
+def create_auth_token_once(db_name):
+    if API_CLIENT:
+        return API_CLIENT.create_auth_token(db_name)
+    token_output, token_error, token_code = run_cli_step(f"turso db tokens create {db_name}", timeout=60)
+    if token_code != 0:
+        raise ProvisioningError(f"Token creation failed for {db_name}: {token_error}")
+    auth_token = token_output.strip() # Token is the direct output
+    if not auth_token or len(auth_token) < 10: # Basic sanity check for token
+        raise ProvisioningError("Generated token appears invalid or empty.", token_output, kind="other")
+    return auth_token
+
+def provision_database():
+    """Create a database and return its connection details without printing anything."""
+    db_name = create_database()
+    try:
+        return {"name": db_name, "url": get_database_url(db_name), "token": create_auth_token(db_name)}
+    except ProvisioningError:
+        destroy_database(db_name) # Don't leak a half-provisioned database
+        raise
+
+def find_project_root():
+    """The closest parent directory containing .git, or the current directory."""
+    current_dir_check = Path.cwd()
+    while current_dir_check != current_dir_check.parent: # Stop at system root
+        if (current_dir_check / ".git").is_dir():
+            return current_dir_check
+        current_dir_check = current_dir_check.parent
+    return Path.cwd()
+
+# --- Local backend ---
+# File-backed SQLite databases for dev and tests. The Drizzle migrations are applied once into a
+# template; every new database is a clone of that template (a reflink where the filesystem supports it).
+
+def find_sqlite_migration_dirs(project_root):
+    """Migration directories of the Drizzle configs that target SQLite/Turso."""
+    migration_dirs = []
+    for config_name in DRIZZLE_CONFIG_FILES:
+        config_path = project_root / config_name
+        if not config_path.exists():
+            continue
+        config = config_path.read_text()
+        dialect_match = re.search(r"dialect:\s*['\"](\w+)['\"]", config)
+        out_match = re.search(r"out:\s*['\"]([^'\"]+)['\"]", config)
+        if not dialect_match or not out_match:
+            print_warning(f"Could not read dialect/out from {config_name}; skipping it.")
+        elif dialect_match.group(1) not in SQLITE_DIALECTS:
+            print_info(f"Skipping {config_name} ({dialect_match.group(1)} migrations do not apply to SQLite).")
+        elif (project_root / out_match.group(1)).is_dir():
+            migration_dirs.append(project_root / out_match.group(1))
+    return migration_dirs
+
+def list_migration_files(migration_dir):
+    """SQL files in the order of Drizzle's journal, with the journal's timestamp for each."""
+    journal_path = migration_dir / "meta" / "_journal.json"
+    if journal_path.exists():
+        with open(journal_path, "r") as f:
+            entries = json.load(f).get("entries", [])
+        return [(migration_dir / f"{entry['tag']}.sql", entry["when"]) for entry in entries]
+    return [(sql_file, 0) for sql_file in sorted(migration_dir.glob("*.sql"))]
+
+def apply_migrations(connection, migration_files):
+    """Apply migrations and record them in Drizzle's own bookkeeping table, so drizzle-kit sees them as applied."""
+    connection.execute('CREATE TABLE IF NOT EXISTS "__drizzle_migrations" (id INTEGER PRIMARY KEY AUTOINCREMENT, hash text NOT NULL, created_at numeric)')
+    for sql_file, created_at in migration_files:
+        sql = sql_file.read_text()
+        connection.executescript(sql.replace("--> statement-breakpoint", ""))
+        connection.execute(
+            'INSERT INTO "__drizzle_migrations" (hash, created_at) VALUES (?, ?)',
+            (hashlib.sha256(sql.encode()).hexdigest(), created_at),
+        )
+    connection.commit()
+
+def project_migration_files(project_root):
+    return [
+        migration for migration_dir in find_sqlite_migration_dirs(project_root)
+        for migration in list_migration_files(migration_dir)
+    ]
+
+def ensure_local_template(project_root):
+    """Return the migrated template database, building it if the migrations changed since the last build."""
+    migration_files = project_migration_files(project_root)
+    digest = hashlib.sha1()
+    for sql_file, _ in migration_files:
+        digest.update(sql_file.read_bytes())
+    local_dir = project_root / LOCAL_DB_DIR_NAME
+    local_dir.mkdir(exist_ok=True)
+    template_path = local_dir / f"template-{digest.hexdigest()[:12]}.db"
+
+    with file_lock(local_dir / "template.lock"):
+        if template_path.exists():
+            return template_path, False
+        tmp_path = template_path.with_suffix(".tmp")
+        tmp_path.unlink(missing_ok=True)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            apply_migrations(connection, migration_files)
+        finally:
+            connection.close()
+        os.replace(tmp_path, template_path)
+        for stale_template in local_dir.glob("template-*.db"):
+            if stale_template != template_path:
+                stale_template.unlink()
+    return template_path, True
+
+def clone_file(source, destination):
+    """Copy a file, as a reflink when the filesystem supports it. Returns 'reflink' or 'copy'."""
+    if fcntl and sys.platform.startswith("linux"):
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            pass # Not supported here (e.g. ext4, tmpfs): fall back to a regular copy
+    shutil.copyfile(source, destination)
+    return "copy"
+
+def local_database_path(db_name):
+    return find_project_root() / LOCAL_DB_DIR_NAME / f"{db_name}.db"
+
+def provision_local_database(template_path=None):
+    """Clone the migrated template into a new local database. Same shape as provision_database()."""
+    if template_path is None:
+        template_path, _ = ensure_local_template(find_project_root())
+    db_name = f"{LOCAL_DB_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    db_path = local_database_path(db_name)
+    clone_file(template_path, db_path)
+    # libSQL clients accept file: URLs and ignore the token for them
+    return {"name": db_name, "url": f"file:{db_path}", "token": ""}
+
+# --- Database connections ---
+# file: URLs open with sqlite3. libsql://, https:// and http:// URLs speak libSQL's HTTP protocol
+# (Hrana pipelines over a keep-alive connection), so no libSQL client package is needed.
+# LibsqlHttpConnection mirrors the parts of sqlite3.Connection used here, so apply_migrations()
+# and the seed loader run unchanged against both.
+
+def encode_libsql_value(value):
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return {"type": "integer", "value": str(value)} # Sent as a string so 64-bit values survive JSON
+    if isinstance(value, float):
+        return {"type": "float", "value": value}
+    if isinstance(value, (bytes, bytearray)):
+        return {"type": "blob", "base64": base64.b64encode(value).decode()}
+    return {"type": "text", "value": str(value)}
+
+def decode_libsql_value(value):
+    kind = value.get("type")
+    if kind == "integer":
+        return int(value["value"])
+    if kind == "float":
+        return float(value["value"])
+    if kind == "text":
+        return value["value"]
+    if kind == "blob":
+        return base64.b64decode(value.get("base64", ""))
+    return None
+
+def libsql_statement(sql, params=()):
+    return {"sql": sql, "args": [encode_libsql_value(param) for param in params]}
+
+class LibsqlResult:
+    """The rows of one executed statement, with the cursor methods callers use."""
+    def __init__(self, result):
+        self.rows = [tuple(decode_libsql_value(value) for value in row) for row in result.get("rows", [])]
+        self.rowcount = result.get("affected_row_count", 0)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+class LibsqlHttpConnection:
+    def __init__(self, db_url, auth_token=None, timeout=LIBSQL_HTTP_TIMEOUT):
+        parts = urlsplit(db_url)
+        self.connection_class = http.client.HTTPConnection if parts.scheme == "http" else http.client.HTTPSConnection
+        self.netloc = parts.netloc
+        self.base_path = parts.path.rstrip("/")
+        self.headers = {"Content-Type": "application/json"}
+        if auth_token:
+            self.headers["Authorization"] = f"Bearer {auth_token}"
+        self.timeout = timeout
+        self.http_connection = None
+
+    def connection(self, fresh=False):
+        if fresh or self.http_connection is None:
+            self.http_connection = self.connection_class(self.netloc, timeout=self.timeout)
+        return self.http_connection
+
+    def pipeline(self, requests):
+        """Run requests on a fresh stream and return their responses; the first failed request raises."""
+        body = json.dumps({"baton": None, "requests": requests + [{"type": "close"}]}).encode()
+        response, raw = http_exchange(self.connection, "POST", f"{self.base_path}/v2/pipeline", body, self.headers, f"libSQL request to {self.netloc}", self.timeout)
+        if response.status >= 400:
+            raise ProvisioningError(
+                f"libSQL request to {self.netloc} failed ({response.status}): {raw.decode(errors='replace')[:200]}",
+                kind=API_ERROR_KINDS.get(response.status, "server" if response.status >= 500 else "other"),
+            )
+        results = json.loads(raw)["results"][:len(requests)]
+        for result in results:
+            if result.get("type") == "error":
+                raise ProvisioningError(f"libSQL error: {result['error'].get('message')}", kind="other")
+        return [result["response"] for result in results]
+
+    def execute(self, sql, params=()):
+        return LibsqlResult(self.pipeline([{"type": "execute", "stmt": libsql_statement(sql, params)}])[0]["result"])
+
+    def executescript(self, sql):
+        self.pipeline([{"type": "sequence", "sql": sql}])
+
+    def execute_transaction(self, statements):
+        """Run (sql, params) pairs atomically in one round trip: each step runs only if the previous one succeeded."""
+        steps = [{"stmt": libsql_statement("BEGIN")}]
+        for sql, params in statements:
+            steps.append({"stmt": libsql_statement(sql, params), "condition": {"type": "ok", "step": len(steps) - 1}})
+        commit_step = len(steps)
+        steps.append({"stmt": libsql_statement("COMMIT"), "condition": {"type": "ok", "step": commit_step - 1}})
+        steps.append({"stmt": libsql_statement("ROLLBACK"), "condition": {"type": "not", "cond": {"type": "ok", "step": commit_step}}})
+        result = self.pipeline([{"type": "batch", "batch": {"steps": steps}}])[0]["result"]
+        errors = [error for error in result.get("step_errors", []) if error]
+        if errors:
+            raise ProvisioningError(f"libSQL error: {errors[0].get('message')}", kind="other")
+
+    def commit(self):
+        pass # Every pipeline commits on its own; transactions go through execute_transaction()
+
+    def close(self):
+        if self.http_connection is not None:
+            self.http_connection.close()
+            self.http_connection = None
+
+def open_database(db_url, auth_token=None):
+    """Connect to a DB_URL as printed by this script: file: for local databases, libsql:// for Turso."""
+    if db_url.startswith("file:"):
+        return sqlite3.connect(db_url, uri=True)
+    if urlsplit(db_url).scheme in ("libsql", "https", "http"):
+        return LibsqlHttpConnection(db_url, auth_token)
+    raise ProvisioningError(f"Unsupported database URL: {db_url} (expected file:, libsql://, https:// or http://)")
+
+def execute_transaction(connection, statements):
+    if isinstance(connection, LibsqlHttpConnection):
+        connection.execute_transaction(statements)
+        return
+    with connection: # sqlite3 commits on success and rolls back on error
+        for sql, params in statements:
+            connection.execute(sql, params)
+
+# --- Migrations and seed data ---
+# After provisioning, --migrate applies the project's pending Drizzle migrations and --seed bulk-loads
+# JSON/CSV fixtures as multi-row INSERTs, SEED_ROWS_PER_TRANSACTION rows per transaction.
+
+def migrate_database(connection, project_root):
+    """Apply the migrations not yet recorded in __drizzle_migrations. Returns (applied, total)."""
+    migration_files = project_migration_files(project_root)
+    applied_hashes = set()
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '__drizzle_migrations'").fetchone():
+        applied_hashes = {row[0] for row in connection.execute('SELECT hash FROM "__drizzle_migrations"').fetchall()}
+    pending = [
+        (sql_file, created_at) for sql_file, created_at in migration_files
+        if hashlib.sha256(sql_file.read_text().encode()).hexdigest() not in applied_hashes
+    ]
+    if pending:
+        apply_migrations(connection, pending)
+    return len(pending), len(migration_files)
+
+def read_seed_files(paths):
+    """
+    Yield (table, rows) from seed files; directories are read in name order. A CSV file seeds the table
+    named after the file (streamed row by row). A JSON file holds either a list of rows for the table
+    named after the file, or an object mapping table names to lists of rows.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            seed_files = sorted(p for p in path.iterdir() if p.suffix.lower() in SEED_FILE_SUFFIXES)
+        else:
+            seed_files = [path]
+        for seed_file in seed_files:
+            suffix = seed_file.suffix.lower()
+            if suffix == ".csv":
+                with open(seed_file, newline="") as f:
+                    yield seed_file.stem, csv.DictReader(f)
+            elif suffix == ".json":
+                with open(seed_file, "r") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    yield seed_file.stem, data
+                elif isinstance(data, dict) and all(isinstance(rows, list) for rows in data.values()):
+                    yield from data.items()
+                else:
+                    raise ProvisioningError(f"{seed_file} must hold a list of rows or an object of table -> rows.", kind="other")
+            else:
+                raise ProvisioningError(f"Unsupported seed file {seed_file} (expected .json or .csv).", kind="other")
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def seed_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value) # Drizzle's text({ mode: 'json' }) columns
+    return value
+
+def insert_statements(table, rows):
+    """
+    Yield (sql, params, row_count) multi-row INSERTs. Consecutive rows with the same columns share a
+    statement, up to SEED_MAX_VARIABLES bound parameters.
+    """
+    columns, params, row_count = None, [], 0
+
+    def statement():
+        column_list = ", ".join(map(quote_identifier, columns))
+        placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+        return f"INSERT INTO {quote_identifier(table)} ({column_list}) VALUES " + ", ".join([placeholders] * row_count), params, row_count
+
+    for row_number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ProvisioningError(f"Seed row {row_number} of {table} is not an object of column -> value: {row!r}", kind="other")
+        if None in row: # csv.DictReader files the extra fields of a ragged row under None
+            raise ProvisioningError(f"Seed row {row_number} of {table} has more fields than the CSV header.", kind="other")
+        row_columns = tuple(row)
+        if row_count and (row_columns != columns or len(params) + len(row_columns) > SEED_MAX_VARIABLES):
+            yield statement() # Before an empty row too, so rows are inserted in file order
+            params, row_count = [], 0
+        if not row_columns:
+            yield f"INSERT INTO {quote_identifier(table)} DEFAULT VALUES", [], 1
+            continue
+        columns = row_columns
+        params.extend(seed_value(row[column]) for column in columns)
+        row_count += 1
+    if row_count:
+        yield statement()
+
+def seed_database(connection, paths):
+    """Bulk-load seed files. Returns (rows, seconds)."""
+    total_rows, started_at = 0, time.monotonic()
+    for table, rows in read_seed_files(paths):
+        table_rows, table_started_at = 0, time.monotonic()
+        transaction, transaction_rows = [], 0
+        for sql, params, row_count in insert_statements(table, rows):
+            transaction.append((sql, params))
+            transaction_rows += row_count
+            if transaction_rows >= SEED_ROWS_PER_TRANSACTION:
+                execute_transaction(connection, transaction)
+                table_rows += transaction_rows
+                transaction, transaction_rows = [], 0
+        if transaction:
+            execute_transaction(connection, transaction)
+            table_rows += transaction_rows
+        elapsed = time.monotonic() - table_started_at
+        print_success(f"Seeded {table_rows} row(s) into {Colors.CYAN}{table}{Colors.ENDC} ({table_rows / max(elapsed, 1e-9):,.0f} rows/s).")
+        total_rows += table_rows
+    return total_rows, time.monotonic() - started_at
+
+def prepare_database(db_url, auth_token, migrate=False, seed_paths=None):
+    """Migrate and/or seed a freshly provisioned database. Failures raise ProvisioningError."""
+    connection = open_database(db_url, auth_token)
+    try:
+        if migrate:
+            started_at = time.monotonic()
+            applied, total = migrate_database(connection, find_project_root())
+            print_success(f"Applied {applied} of {total} migration(s) in {(time.monotonic() - started_at) * 1000:.0f}ms.")
+        if seed_paths:
+            rows, seconds = seed_database(connection, seed_paths)
+            rate = rows / max(seconds, 1e-9)
+            METRICS.fields.update({"seed_rows": rows, "seed_rows_per_second": round(rate)})
+            print_success(f"Seeded {rows} row(s) in {seconds:.2f}s ({rate:,.0f} rows/s).")
+    except sqlite3.Error as e:
+        raise ProvisioningError(f"SQLite error: {e}", kind="other")
+    except (OSError, json.JSONDecodeError, csv.Error) as e:
+        raise ProvisioningError(f"Could not read seed data: {e}", kind="other")
+    finally:
+        connection.close()
+
+# --- Latency probe ---
+# --probe runs a small read/write workload against a DB_URL over the same connection types the app
+# would use, and reports latency percentiles and throughput as JSON. The probe table is dropped afterwards.
+
+def percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def latency_summary(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50": round(percentile(samples, 0.50), 3),
+        "p95": round(percentile(samples, 0.95), 3),
+        "p99": round(percentile(samples, 0.99), 3),
+        "mean": round(sum(samples) / len(samples), 3),
+        "max": round(samples[-1], 3),
+    }
+
+def run_probe_worker(db_url, auth_token, operations, payload):
+    """Connect, warm up, then time each operation. Returns (connect_ms, [(kind, ms)], started, finished)."""
+    connect_started = time.perf_counter()
+    connection = open_database(db_url, auth_token)
+    try:
+        connection.execute("SELECT 1").fetchone()
+        connect_ms = (time.perf_counter() - connect_started) * 1000
+        for _ in range(PROBE_WARMUP_OPS):
+            connection.execute(f"SELECT payload FROM {PROBE_TABLE} WHERE id = ?", (1,)).fetchone()
+        samples = []
+        started = time.perf_counter()
+        for kind, row_id in operations:
+            op_started = time.perf_counter()
+            if kind == "read":
+                connection.execute(f"SELECT payload FROM {PROBE_TABLE} WHERE id = ?", (row_id,)).fetchone()
+            else:
+                connection.execute(f"INSERT INTO {PROBE_TABLE} (payload) VALUES (?)", (payload,))
+                connection.commit() # Each write is its own durable transaction, like a typical request
+            samples.append((kind, (time.perf_counter() - op_started) * 1000))
+        return connect_ms, samples, started, time.perf_counter()
+    finally:
+        connection.close()
+
+def probe_database(db_url, auth_token, operations=DEFAULT_PROBE_OPS, write_ratio=DEFAULT_PROBE_WRITE_RATIO, concurrency=1):
+    """Run the probe workload against db_url and return the JSON-ready report."""
+    payload = "x" * PROBE_PAYLOAD_BYTES
+    setup = open_database(db_url, auth_token)
+    try:
+        setup.execute(f"CREATE TABLE IF NOT EXISTS {PROBE_TABLE} (id INTEGER PRIMARY KEY, payload TEXT NOT NULL)")
+        setup.commit()
+        seed_rows = [{"payload": payload}] * PROBE_SEED_ROWS
+        execute_transaction(setup, [(sql, params) for sql, params, _ in insert_statements(PROBE_TABLE, seed_rows)])
+
+        rng = random.Random()
+        plan = [("write" if rng.random() < write_ratio else "read", rng.randint(1, PROBE_SEED_ROWS)) for _ in range(operations)]
+        concurrency = max(1, min(concurrency, operations))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda worker_plan: run_probe_worker(db_url, auth_token, worker_plan, payload),
+                [plan[worker::concurrency] for worker in range(concurrency)],
+            ))
+    except sqlite3.Error as e:
+        raise ProvisioningError(f"SQLite error: {e}", kind="other")
+    finally:
+        try:
+            setup.execute(f"DROP TABLE IF EXISTS {PROBE_TABLE}")
+            setup.commit()
+        except (sqlite3.Error, ProvisioningError) as e:
+            print_warning(f"Could not drop the probe table {PROBE_TABLE}: {e}")
+        setup.close()
+
+    samples = [sample for _, worker_samples, _, _ in results for sample in worker_samples]
+    seconds = max(finished for *_, finished in results) - min(started for _, _, started, _ in results)
+    return {
+        "url": db_url,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "operations": len(samples),
+        "write_ratio": write_ratio,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "ops_per_second": round(len(samples) / max(seconds, 1e-9), 1),
+        "connect_ms": latency_summary([connect_ms for connect_ms, *_ in results]),
+        "latency_ms": {
+            "all": latency_summary([ms for _, ms in samples]),
+            "read": latency_summary([ms for kind, ms in samples if kind == "read"]),
+            "write": latency_summary([ms for kind, ms in samples if kind == "write"]),
+        },
+    }
+
+def run_probes(db_urls, auth_token, args):
+    """Probe each URL, print a summary line per URL and emit the reports as a JSON list."""
+    reports = []
+    for db_url in db_urls:
+        report = probe_database(db_url, auth_token, args.probe_ops, args.probe_write_ratio, args.probe_concurrency)
+        latency = report["latency_ms"]["all"]
+        print_success(
+            f"Probe {Colors.CYAN}{db_url}{Colors.ENDC}: p50 {latency['p50']:.2f}ms, p95 {latency['p95']:.2f}ms, "
+            f"p99 {latency['p99']:.2f}ms, {report['ops_per_second']:,.0f} ops/s."
+        )
+        reports.append(report)
+    if len(reports) > 1:
+        fastest = min(reports, key=lambda report: report["latency_ms"]["all"]["p50"])
+        print_info(f"Lowest p50 latency: {Colors.CYAN}{fastest['url']}{Colors.ENDC}")
+    if args.probe_output:
+        with open(args.probe_output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print_info(f"Probe report written to {Colors.CYAN}{args.probe_output}{Colors.ENDC}")
+    else:
+        print(json.dumps(reports, indent=2))
+    return reports
+
+# --- Warm pool ---
+# Databases are created ahead of time and recorded (with URL and token) in POOL_FILE, so handing
+# one out is a local file operation. Every handout starts a background refill.
+
+def pool_transaction():
+    """Read-modify-write the pool registry under an exclusive lock."""
+    return json_transaction(POOL_FILE, POOL_LOCK_FILE, {"databases": []})
+
+def load_pool():
+    """Read the pool registry without locking (for display)."""
+    return read_json_file(POOL_FILE, {"databases": []})
+
+def take_from_pool():
+    """Lease the oldest ready database from the pool, or return None if the pool is empty."""
+    with pool_transaction() as pool:
+        ready = [db for db in pool["databases"] if db["status"] == "ready"]
+        if not ready:
+            return None
+        entry = min(ready, key=lambda db: db["created_at"])
+        entry["status"] = "leased"
+        entry["leased_at"] = datetime.now().isoformat(timespec="seconds")
+        return dict(entry)
+
+def recycle_pool(ttl_hours=DEFAULT_POOL_TTL_HOURS, concurrency=DEFAULT_DELETE_CONCURRENCY):
+    """Destroy leased databases whose lease is older than the TTL and drop them from the pool."""
+    cutoff = datetime.now() - timedelta(hours=ttl_hours)
+    with pool_transaction() as pool:
+        expired = [
+            db["name"] for db in pool["databases"]
+            if db["status"] == "leased" and datetime.fromisoformat(db["leased_at"]) < cutoff
+        ]
+    if not expired:
+        return
+    print_info(f"Recycling {len(expired)} leased database(s) older than {ttl_hours}h...")
+    destroyed = set(expired) - {db_name for db_name, _ in delete_databases(expired, concurrency)}
+    with pool_transaction() as pool:
+        pool["databases"] = [db for db in pool["databases"] if db["name"] not in destroyed]
+
+def fill_pool(size=DEFAULT_POOL_SIZE, concurrency=DEFAULT_DELETE_CONCURRENCY, ttl_hours=DEFAULT_POOL_TTL_HOURS):
+    """Recycle expired leases, then create databases until `size` of them are ready."""
+    with file_lock(POOL_FILL_LOCK_FILE, blocking=False) as acquired:
+        if not acquired:
+            print_info("Another pool refill is already running.")
+            return
+        recycle_pool(ttl_hours, concurrency)
+        with pool_transaction() as pool:
+            missing = size - sum(1 for db in pool["databases"] if db["status"] == "ready")
+        if missing <= 0:
+            print_success(f"Pool already holds {size} ready database(s).")
+            return
+
+        print_info(f"Provisioning {missing} database(s) for the pool...")
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, missing))) as executor:
+            futures = [executor.submit(provision_database) for _ in range(missing)]
+            for future in as_completed(futures):
+                try:
+                    db = future.result()
+                except ProvisioningError as e:
+                    print_error(f"Pool provisioning failed: {e}")
+                    continue
+                with pool_transaction() as pool:
+                    pool["databases"].append({
+                        **db,
+                        "status": "ready",
+                        "created_at": datetime.now().isoformat(timespec="seconds"),
+                    })
+                print_success(f"Added '{Colors.CYAN}{db['name']}{Colors.ENDC}' to the pool.")
+
+def start_background_refill(size=DEFAULT_POOL_SIZE, ttl_hours=DEFAULT_POOL_TTL_HOURS, concurrency=DEFAULT_DELETE_CONCURRENCY):
+    """Refill the pool in a detached process so the current command can return immediately."""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--pool-fill", "--pool-size", str(size), "--pool-ttl", str(ttl_hours),
+        "--concurrency", str(concurrency), "--backend", "api" if API_CLIENT else "cli", # The backend this run resolved to
+    ]
+    with open(POOL_LOG_FILE, "a") as log_file:
+        subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log_file, stderr=log_file, start_new_session=True)
+    print_info(f"Refilling the pool in the background (log: {Colors.CYAN}{POOL_LOG_FILE}{Colors.ENDC}).")
+
+def print_pool_status():
+    """Print every database tracked by the pool."""
+    print_section_divider("🏊 DATABASE POOL")
+    databases = load_pool()["databases"]
+    if not databases:
+        print_info(f"The pool is empty. Fill it with: {Colors.BOLD}--pool-fill{Colors.ENDC}")
+        return
+    for db in sorted(databases, key=lambda db: db["created_at"]):
+        status_color = Colors.OKGREEN if db["status"] == "ready" else Colors.YELLOW
+        leased = f", leased {db['leased_at']}" if db.get("leased_at") else ""
+        print(f"  {status_color}{db['status']:<7}{Colors.ENDC} {Colors.CYAN}{db['name']}{Colors.ENDC} {Colors.GRAY}(created {db['created_at']}{leased}){Colors.ENDC}")
+
+# --- Batch provisioning (one database per vitest worker) ---
+
+def write_worker_env_file(env_dir, worker, db):
+    """Write `.env.worker-<n>` for one worker; n matches vitest's VITEST_POOL_ID (1-based)."""
+    env_file_path = Path(env_dir) / f".env.worker-{worker}"
+    with open(env_file_path, "w") as f:
+        f.write(f"# Turso Credentials for test worker {worker} (generated by script)\n")
+        f.write(f"DB_URL={db['url']}\n")
+        f.write(f"AUTH_TOKEN={db['token']}\n")
+        # The names src/api/env.ts reads
+        f.write(f"TURSO_DATABASE_URL={db['url']}\n")
+        f.write(f"TURSO_AUTH_TOKEN={db['token']}\n")
+    return env_file_path
+
+def provision_batch(count, manifest_path, env_dir=None, concurrency=DEFAULT_DELETE_CONCURRENCY, local=False, tag=None, ttl_hours=None):
+    """Provision `count` databases concurrently and record them in a JSON manifest.
+
+    Returns True if every database was provisioned.
+    """
+    print_section_divider(f"🧪 PROVISIONING {count} TEST DATABASE(S)")
+    started_at = time.monotonic()
+    workers = max(1, min(concurrency, count))
+    print_info(f"Creating {count} database(s), up to {workers} at a time...")
+
+    databases = []
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if local:
+            template_path, _ = ensure_local_template(find_project_root()) # Build it once, before the clones start
+            futures = [executor.submit(provision_local_database, template_path) for _ in range(count)]
+        else:
+            futures = [executor.submit(provision_database) for _ in range(count)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            progress = f"{Colors.BOLD}{Colors.WHITE}[{done}/{count}]{Colors.ENDC}"
+            try:
+                db = future.result()
+            except ProvisioningError as e:
+                print(f"  {progress} {Colors.FAIL}❌ {e}{Colors.ENDC}")
+                failures.append(str(e))
+                continue
+            databases.append(db)
+            print(f"  {progress} {Colors.OKGREEN}✅ {db['name']}{Colors.ENDC} {Colors.GRAY}({time.monotonic() - started_at:.1f}s){Colors.ENDC}")
+
+    register_databases(databases, tag, ttl_hours) # Safety net: --gc finds them even if the teardown never runs
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "databases": [{"worker": worker, **db} for worker, db in enumerate(databases, start=1)],
+    }
+    if env_dir:
+        Path(env_dir).mkdir(parents=True, exist_ok=True)
+        manifest["env_files"] = [
+            str(write_worker_env_file(env_dir, entry["worker"], entry)) for entry in manifest["databases"]
+        ]
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print_info(f"Provisioned {len(databases)} of {count} database(s) in {time.monotonic() - started_at:.1f}s.")
+    print_success(f"Connection details written to {Colors.CYAN}{manifest_path}{Colors.ENDC}")
+    if env_dir:
+        print_success(f"Per-worker env files written to {Colors.CYAN}{env_dir}{Colors.ENDC} (.env.worker-1 ... .env.worker-{len(databases)})")
+    if failures:
+        print_warning(f"{len(failures)} database(s) could not be provisioned. Tear the rest down with --batch-teardown {manifest_path}")
+    return not failures
+
+def teardown_batch(manifest_path, concurrency=DEFAULT_DELETE_CONCURRENCY):
+    """Delete every database in a batch manifest in parallel, then remove the manifest and env files."""
+    print_section_divider("🧹 TEARING DOWN TEST DATABASES")
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print_error(f"Could not read batch manifest {manifest_path}: {e}")
+        return False
+
+    db_names = [entry["name"] for entry in manifest.get("databases", [])]
+    db_urls = {entry["name"]: entry.get("url") for entry in manifest.get("databases", [])}
+    failures = delete_databases(db_names, concurrency, db_urls) if db_names else []
+    if failures:
+        # Keep only what is left, so the teardown can simply be run again
+        failed = {db_name for db_name, _ in failures}
+        manifest["databases"] = [entry for entry in manifest["databases"] if entry["name"] in failed]
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return False
+
+    for env_file in manifest.get("env_files", []):
+        Path(env_file).unlink(missing_ok=True)
+    Path(manifest_path).unlink(missing_ok=True)
+    print_success(f"Removed {len(db_names)} test database(s) and {Colors.CYAN}{manifest_path}{Colors.ENDC}.")
+    return True
+
+def deliver_credentials(db_name, db_url, auth_token, args, step):
+    """Show the credentials, then write them to the env file and clipboard as requested."""
+    env_vars_string_for_clipboard = f"DB_URL={db_url}\nAUTH_TOKEN={auth_token}"
+
+    print_env_vars_box(db_url, auth_token, db_name)
+
+    print_step(*step, "Finalizing setup...")
+    prepared = True
+    if args.migrate or args.seed:
+        try:
+            prepare_database(db_url, auth_token, args.migrate, args.seed)
+        except ProvisioningError as e:
+            print_error(str(e))
+            print_warning("The database was created, but migrating/seeding it did not finish.")
+            prepared = False
+    if args.probe and prepared:
+        try:
+            run_probes([db_url], auth_token, args)
+        except ProvisioningError as e:
+            print_error(f"Probe failed: {e}")
+            prepared = False
+
+    if args.overwrite:
+        project_root = find_project_root()
+        print_info(f"Project root identified at: {Colors.CYAN}{project_root}{Colors.ENDC}")
+        env_file_path = project_root / args.overwrite
+        
+        # Simplified update/append logic (original script's update_env_file is more robust)
+        try:
+            # Ensure directory exists
+            env_file_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            mode = 'a' if env_file_path.exists() else 'w'
+            with open(env_file_path, mode) as f:
+                if mode == 'a': f.write("\n\n# Turso Credentials (added by script)\n")
+                else: f.write("# Turso Credentials (generated by script)\n")
+                f.write(f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"DB_URL={db_url}\n")
+                f.write(f"AUTH_TOKEN={auth_token}\n")
+            print_success(f"Environment variables {'appended to' if mode == 'a' else 'written to'} {Colors.CYAN}{env_file_path}{Colors.ENDC}")
+        except IOError as e:
+            print_error(f"Could not write to {env_file_path}: {e}")
+    else:
+        print_info(f"To save credentials to a file, use: {Colors.BOLD}--overwrite FILENAME{Colors.ENDC}")
+
+    if not args.no_clipboard:
+        try:
+            pyperclip.copy(env_vars_string_for_clipboard)
+            print_success("Environment variables copied to clipboard!")
+        except Exception as e: # Catch broader pyperclip errors
+            print_warning(f"Could not copy to clipboard: {e}")
+            print_info("You can manually copy the credentials from the box above.")
     
+    print_footer(db_name)
+    return prepared
+
+def clipboard_available():
+    """Round-trip a marker through the clipboard; returns (ok, error)."""
     try:
         pyperclip.copy("test_clipboard_turso_gen") # Test with a unique string
-        if pyperclip.paste() == "test_clipboard_turso_gen":
-             print_success("Clipboard functionality available.")
-        else:
+        if pyperclip.paste() != "test_clipboard_turso_gen":
             raise pyperclip.PyperclipException("Paste check failed")
+        return True, None
     except Exception as e: # Catch broader exceptions for clipboard
-        print_warning(f"Clipboard functionality might be limited or unavailable: {e}")
+        return False, str(e)
+
+
+def cli_authenticated():
+    """Ask the CLI whether it is logged in; returns (ok, error)."""
+    auth_output, auth_error, auth_code = run_command("turso auth status")
+    if auth_code != 0 or "You are not logged in" in auth_output or "not authenticated" in auth_output.lower():
+        return False, auth_error or auth_output
+    return True, None
+
+
+def api_token_valid():
+    try:
+        API_CLIENT.validate_token()
+        return True, None
+    except ProvisioningError as e:
+        return False, str(e)
+
+
+def preflight_cache_key(check_clipboard):
+    """Fingerprint everything a cached preflight result depends on."""
+    parts = [f"clipboard={check_clipboard}", os.environ.get("DISPLAY", ""), os.environ.get("WAYLAND_DISPLAY", "")]
+    parts += backend_fingerprint()
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def run_preflight_checks(check_clipboard):
+    """Run the CLI/API and clipboard checks concurrently."""
+    checks = {}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        if API_CLIENT:
+            checks["auth"] = executor.submit(api_token_valid)
+        else:
+            checks["version"] = executor.submit(run_command, "turso --version")
+            checks["auth"] = executor.submit(cli_authenticated)
+            checks["whoami"] = executor.submit(run_command, "turso auth whoami")
+        if check_clipboard:
+            checks["clipboard"] = executor.submit(clipboard_available)
+        outcomes = {name: future.result() for name, future in checks.items()}
+
+    result = {"checked_at": time.time(), "clipboard": None, "clipboard_error": None}
+    if "clipboard" in outcomes:
+        result["clipboard"], result["clipboard_error"] = outcomes["clipboard"]
+    result["authenticated"], result["auth_error"] = outcomes["auth"]
+    if API_CLIENT:
+        result["identity"] = API_CLIENT.organization
+        result["cli_version"] = None
+    else:
+        version_output, _, version_code = outcomes["version"]
+        result["cli_version"] = (version_output.split('\n')[0] or "Unknown version") if version_code == 0 else None
+        whoami_output, _, whoami_code = outcomes["whoami"]
+        result["identity"] = whoami_output if whoami_code == 0 and whoami_output else "user"
+    return result
+
+
+def preflight(check_clipboard=True, use_cache=True):
+    """
+    Check the Turso CLI (or API token), authentication and the clipboard.
+    Passing results are cached for PREFLIGHT_TTL_SECONDS, so back-to-back runs skip the checks.
+    """
+    print_step(1, 6, "Checking system dependencies...")
+    cache_key = preflight_cache_key(check_clipboard)
+    cached = read_json_file(PREFLIGHT_CACHE_FILE, {}) if use_cache else {}
+    result = cached.get("result") if cached.get("key") == cache_key else None
+    if result and time.time() - result.get("checked_at", 0) < PREFLIGHT_TTL_SECONDS:
+        print_info(f"Using preflight results from {time.time() - result['checked_at']:.0f}s ago.")
+    else:
+        result = run_preflight_checks(check_clipboard)
+        if result["authenticated"] and (API_CLIENT or result["cli_version"]):
+            # Only passing results are cached, so a fixed setup is re-checked straight away
+            with json_transaction(PREFLIGHT_CACHE_FILE, PREFLIGHT_LOCK_FILE, {}) as cache:
+                cache.clear()
+                cache.update({"key": cache_key, "result": result})
+
+    if API_CLIENT:
+        print_success(f"Using the Turso Platform API for organization {Colors.CYAN}{API_CLIENT.organization}{Colors.ENDC} (CLI not needed).")
+    elif not result["cli_version"]:
+        print_error("Turso CLI is not installed or not in PATH!")
+        print_info("Please install Turso CLI from: https://docs.turso.tech/reference/turso-cli")
+        sys.exit(1)
+    else:
+        print_success(f"Turso CLI found: {Colors.CYAN}{result['cli_version']}{Colors.ENDC}")
+
+    if result["clipboard"]:
+        print_success("Clipboard functionality available.")
+    elif check_clipboard:
+        print_warning(f"Clipboard functionality might be limited or unavailable: {result['clipboard_error']}")
         print_info("For Linux, try: sudo apt-get install xclip or sudo apt-get install xsel")
         print_info("For macOS, clipboard access should be default.")
         print_info("For Windows, clipboard access should be default.")
 
+    if API_CLIENT:
+        print_step(2, 6, "Verifying Turso API token...")
+        if not result["authenticated"]:
+            raise ProvisioningError(result["auth_error"], kind="auth")
+        print_success("Turso API token verified.")
+    else:
+        print_step(2, 6, "Verifying Turso CLI authentication...")
+        if not result["authenticated"]:
+            print_error("Turso CLI authentication failed or you are not logged in.")
+            print_info(f"Please run: {Colors.BOLD}turso auth login{Colors.ENDC}")
+            sys.exit(1)
+        print_success(f"Turso CLI authentication verified (Logged in as: {Colors.CYAN}{result['identity']}{Colors.ENDC}).")
+
 
 def main():
     script_name = os.path.basename(sys.argv[0])
@@ -406,147 +1862,273 @@ def main():
   {Colors.CYAN}python {script_name} --no-clipboard{Colors.ENDC}
     {Colors.GRAY}# Generate a new database but do not copy credentials to clipboard.{Colors.ENDC}
 
+  {Colors.CYAN}python {script_name} --local --overwrite .env.local{Colors.ENDC}
+    {Colors.GRAY}# Create a migrated local SQLite database in milliseconds (no Turso account needed).{Colors.ENDC}
+
+{Colors.BOLD}{Colors.OKBLUE}Migrations & Seed Data:{Colors.ENDC}
+  {Colors.CYAN}python {script_name} --migrate --seed fixtures/{Colors.ENDC}
+    {Colors.GRAY}# Create a database, apply the Drizzle migrations, then bulk-load every .json/.csv file in fixtures/.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --db-url file:local.db --migrate --seed fixtures/users.csv{Colors.ENDC}
+    {Colors.GRAY}# Migrate and seed an existing database instead of creating one.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --db-url libsql://a.turso.io libsql://b.turso.io --probe --probe-output probe.json{Colors.ENDC}
+    {Colors.GRAY}# Compare read/write latency (p50/p95/p99) and ops/s of candidate databases.{Colors.ENDC}
+
+{Colors.BOLD}{Colors.OKGREEN}Warm Pool:{Colors.ENDC}
+  {Colors.CYAN}python {script_name} --pool-fill --pool-size 5{Colors.ENDC}
+    {Colors.GRAY}# Pre-create 5 databases (with URLs and tokens) for instant handout.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --from-pool --overwrite .env.local{Colors.ENDC}
+    {Colors.GRAY}# Take a ready database from the pool and refill the pool in the background.{Colors.ENDC}
+
+{Colors.BOLD}{Colors.CYAN}Test Databases:{Colors.ENDC}
+  {Colors.CYAN}python {script_name} --batch 4 --batch-env-dir .env-workers{Colors.ENDC}
+    {Colors.GRAY}# Create 4 databases in parallel; worker N loads .env-workers/.env.worker-N (N = VITEST_POOL_ID).{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --batch-teardown{Colors.ENDC}
+    {Colors.GRAY}# Delete every database of the last batch in one parallel call.{Colors.ENDC}
+
 {Colors.BOLD}{Colors.FAIL}Deletion Commands:{Colors.ENDC}
   {Colors.CYAN}python {script_name} --delete-generation{Colors.ENDC}
-    {Colors.GRAY}# Delete the last database specifically created by this script (if tracked).{Colors.ENDC}
+    {Colors.GRAY}# Delete the last database this script created for you on this machine (if tracked).{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --delete-generation --tag feature/login{Colors.ENDC}
+    {Colors.GRAY}# Delete every database generated for the 'feature/login' branch, in parallel.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --ttl 12 && python {script_name} --gc{Colors.ENDC}
+    {Colors.GRAY}# Record a 12h TTL on creation; --gc later deletes everything past its TTL.{Colors.ENDC}
 
   {Colors.CYAN}python {script_name} --delete-interactive{Colors.ENDC}
     {Colors.GRAY}# Show an interactive menu to select and delete any of your Turso databases.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --delete-matching --match "preview-*" --older-than 7d --yes{Colors.ENDC}
+    {Colors.GRAY}# Non-interactively delete every preview database older than a week, in parallel.{Colors.ENDC}
+
+  {Colors.CYAN}python {script_name} --list-databases --match "db-2026*"{Colors.ENDC}
+    {Colors.GRAY}# List matching databases from a short-lived cache, a page at a time.{Colors.ENDC}
         """
     )
     parser.add_argument('--overwrite', metavar='FILENAME', 
                        help='Filename (e.g., .env or .env.production) to update/create in project root.')
     parser.add_argument('--no-clipboard', action='store_true',
                        help='Skip copying credentials to the clipboard.')
+    parser.add_argument('--no-preflight', action='store_true',
+                       help=f'Skip the CLI, authentication and clipboard checks (for CI). Passing checks are otherwise cached for {PREFLIGHT_TTL_SECONDS // 60} minutes.')
+    parser.add_argument('--backend', choices=['auto', 'api', 'cli'], default='auto',
+                       help='How to talk to Turso: the Platform API (needs TURSO_API_TOKEN and TURSO_ORG), the turso CLI, or auto (API when configured, default).')
+    parser.add_argument('--tag', default=None, metavar='TAG',
+                       help='Label recorded with created databases and used to select them for deletion (default: the git branch).')
+    parser.add_argument('--ttl', type=float, metavar='HOURS',
+                       help='Record a time-to-live for created databases; --gc deletes them once it has passed.')
+    parser.add_argument('--metrics', nargs='?', const=str(DEFAULT_METRICS_FILE), metavar='PATH',
+                       help=f'Append per-step timings and retries of this run as a JSON line to PATH (default: {DEFAULT_METRICS_FILE}).')
+    parser.add_argument('--local', action='store_true',
+                       help=f'Create a local SQLite database (cloned from a migrated template in {LOCAL_DB_DIR_NAME}/) instead of a Turso database. Also applies to --batch.')
     
+    seed_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.OKBLUE}Migration & Seed Options{Colors.ENDC}')
+    seed_group.add_argument('--migrate', action='store_true',
+                            help='After provisioning, apply the pending Drizzle migrations of the SQLite/Turso configs.')
+    seed_group.add_argument('--seed', nargs='+', metavar='PATH',
+                            help=f'After provisioning (and migrating), bulk-load seed data from .json/.csv files or directories of them ({SEED_ROWS_PER_TRANSACTION} rows per transaction).')
+    seed_group.add_argument('--db-url', nargs='+', metavar='URL',
+                            help='Run --migrate/--seed/--probe against these existing databases (file:, libsql:// or https://) instead of creating one.')
+    seed_group.add_argument('--auth-token', metavar='TOKEN', default=os.environ.get("AUTH_TOKEN"),
+                            help='Auth token for --db-url (default: $AUTH_TOKEN).')
+
+    probe_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.OKBLUE}Probe Options{Colors.ENDC}')
+    probe_group.add_argument('--probe', action='store_true',
+                             help='After provisioning (or for each --db-url), time a read/write workload and report p50/p95/p99 latency and ops/s as JSON.')
+    probe_group.add_argument('--probe-ops', type=int, default=DEFAULT_PROBE_OPS, metavar='N',
+                             help=f'Number of timed operations (default: {DEFAULT_PROBE_OPS}).')
+    probe_group.add_argument('--probe-write-ratio', type=float, default=DEFAULT_PROBE_WRITE_RATIO, metavar='RATIO',
+                             help=f'Fraction of operations that are single-row INSERTs; the rest are primary-key SELECTs (default: {DEFAULT_PROBE_WRITE_RATIO}).')
+    probe_group.add_argument('--probe-concurrency', type=int, default=1, metavar='N',
+                             help='Connections running the workload in parallel (default: 1).')
+    probe_group.add_argument('--probe-output', metavar='PATH',
+                             help='Write the JSON report to PATH instead of printing it.')
+
+    pool_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.OKGREEN}Warm Pool Options{Colors.ENDC}')
+    pool_group.add_argument('--from-pool', action='store_true',
+                            help='Hand out a pre-provisioned database instantly (falls back to creating one if the pool is empty).')
+    pool_group.add_argument('--pool-fill', action='store_true',
+                            help='Create databases until the pool holds --pool-size ready ones, recycling expired leases first.')
+    pool_group.add_argument('--pool-status', action='store_true',
+                            help='Show the databases tracked by the pool.')
+    pool_group.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, metavar='N',
+                            help=f'Number of ready databases to keep in the pool (default: {DEFAULT_POOL_SIZE}).')
+    pool_group.add_argument('--pool-ttl', type=float, default=DEFAULT_POOL_TTL_HOURS, metavar='HOURS',
+                            help=f'Destroy leased pool databases after this many hours (default: {DEFAULT_POOL_TTL_HOURS}).')
+
+    batch_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.CYAN}Batch Options{Colors.ENDC} (test databases, non-interactive)')
+    batch_group.add_argument('--batch', type=int, metavar='N',
+                             help='Provision N databases concurrently (e.g. one per vitest worker) and write their details to --batch-output.')
+    batch_group.add_argument('--batch-output', default=DEFAULT_BATCH_MANIFEST, metavar='PATH',
+                             help=f'JSON manifest with the connection details of a batch (default: {DEFAULT_BATCH_MANIFEST}).')
+    batch_group.add_argument('--batch-env-dir', metavar='DIR',
+                             help='Also write one env file per database to DIR (.env.worker-1, .env.worker-2, ...).')
+    batch_group.add_argument('--batch-teardown', nargs='?', const=DEFAULT_BATCH_MANIFEST, metavar='PATH',
+                             help=f'Delete every database listed in a batch manifest in parallel (default: {DEFAULT_BATCH_MANIFEST}).')
+
+    filter_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.FAIL}Selection Options{Colors.ENDC} (for --list-databases, --delete-matching and --delete-interactive)')
+    filter_group.add_argument('--match', action='append', metavar='PATTERN',
+                              help='Only databases whose name matches this glob (e.g. "preview-*"); repeat to allow several.')
+    filter_group.add_argument('--regex', action='store_true',
+                              help='Treat --match patterns as regular expressions instead of globs.')
+    filter_group.add_argument('--older-than', type=parse_duration, metavar='AGE',
+                              help='Only databases created more than AGE ago (e.g. 90m, 36h, 7d, 2w); the age comes from the registry or a generated name.')
+    filter_group.add_argument('--refresh', action='store_true',
+                              help=f'Refetch the database list instead of using the cached one (kept for {LIST_CACHE_TTL_SECONDS}s).')
+
     delete_group = parser.add_argument_group(f'{Colors.BOLD}{Colors.FAIL}Deletion Options{Colors.ENDC} (use one at a time)')
     delete_group.add_argument('--delete-generation', action='store_true',
-                              help='Delete the last database created by THIS script (uses state file).')
+                              help='Delete the last database this script created for you on this host, or all of them with --tag (uses the registry).')
+    delete_group.add_argument('--gc', action='store_true',
+                              help='Delete every generated database whose --ttl has passed, in parallel.')
+    delete_group.add_argument('--list-generated', action='store_true',
+                              help='List the databases recorded in the registry (filter with --tag).')
     delete_group.add_argument('--delete-interactive', action='store_true',
                               help='Interactively select and delete any of your Turso databases.')
+    delete_group.add_argument('--list-databases', action='store_true',
+                              help='List your Turso databases (cached, filterable, paged on a terminal).')
+    delete_group.add_argument('--delete-matching', action='store_true',
+                              help='Delete every database selected by --match/--older-than/--tag, in parallel (asks first unless --yes).')
+    delete_group.add_argument('--yes', action='store_true',
+                              help='Do not ask for confirmation with --delete-matching.')
+    delete_group.add_argument('--concurrency', type=int, default=DEFAULT_DELETE_CONCURRENCY, metavar='N',
+                              help=f'Maximum number of Turso operations run in parallel, e.g. deletions and pool refills (default: {DEFAULT_DELETE_CONCURRENCY}).')
 
     args = parser.parse_args()
+    METRICS.metrics_path = args.metrics
+    if args.probe_ops < 1 or args.probe_concurrency < 1 or not 0 <= args.probe_write_ratio <= 1:
+        parser.error("--probe-ops and --probe-concurrency must be at least 1, and --probe-write-ratio between 0 and 1.")
+
+    global API_CLIENT
+    if args.backend != 'cli':
+        API_CLIENT = TursoApiClient.from_environment()
+        if args.backend == 'api' and not API_CLIENT:
+            print_error("The API backend needs TURSO_API_TOKEN and TURSO_ORG to be set.")
+            print_info(f"Create a platform token with: {Colors.BOLD}turso auth api-tokens mint generate-turso-db{Colors.ENDC}")
+            sys.exit(1)
+    METRICS.fields["backend"] = "local" if args.local else ("api" if API_CLIENT else "cli")
+
+    if args.list_generated:
+        print_registry(args.tag)
+        sys.exit(0)
+
+    if args.gc:
+        sys.exit(0 if collect_expired_databases(args.concurrency) else 1)
 
     if args.delete_generation:
         os.system('clear' if os.name == 'posix' else 'cls') # Clear screen for focused output
-        delete_last_generated_db()
+        delete_last_generated_db(args.tag, args.concurrency)
         sys.exit(0)
 
+    filters = {"patterns": args.match, "regex": args.regex, "older_than": args.older_than, "tag": args.tag}
+    if args.regex:
+        for pattern in args.match or []:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                parser.error(f"invalid --match regex '{pattern}': {e}")
+
+    if args.list_databases:
+        print_database_list(filters, args.refresh)
+        sys.exit(0)
+
+    if args.delete_matching:
+        if not (args.match or args.older_than or args.tag):
+            parser.error("--delete-matching needs at least one of --match, --older-than or --tag.")
+        sys.exit(0 if delete_matching(filters, args.concurrency, args.refresh, args.yes) else 1)
+
     if args.delete_interactive:
         os.system('clear' if os.name == 'posix' else 'cls')
-        interactive_delete()
+        interactive_delete(args.concurrency, filters, args.refresh)
+        sys.exit(0)
+
+    args.tag = args.tag or current_tag() # Commands below create databases; tag them with the branch by default
+
+    if args.db_url:
+        if not (args.migrate or args.seed or args.probe):
+            parser.error("--db-url needs --migrate, --seed and/or --probe.")
+        try:
+            if args.migrate or args.seed:
+                print_section_divider("🌱 MIGRATE & SEED")
+                for db_url in args.db_url:
+                    prepare_database(db_url, args.auth_token, args.migrate, args.seed)
+            if args.probe:
+                print_section_divider("⏱️ LATENCY PROBE")
+                run_probes(args.db_url, args.auth_token, args)
+        except ProvisioningError as e:
+            print_error(str(e))
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.pool_status:
+        print_pool_status()
+        sys.exit(0)
+
+    if args.batch:
+        sys.exit(0 if provision_batch(args.batch, args.batch_output, args.batch_env_dir, args.concurrency, args.local, args.tag, args.ttl) else 1)
+
+    if args.batch_teardown:
+        sys.exit(0 if teardown_batch(args.batch_teardown, args.concurrency) else 1)
+
+    if args.pool_fill:
+        fill_pool(args.pool_size, args.concurrency, args.pool_ttl)
         sys.exit(0)
 
     os.system('clear' if os.name == 'posix' else 'cls')
     print_ascii_header()
 
-    try:
-        check_dependencies() # Checks Turso CLI and pyperclip
-
-        # (Original script's find_project_root() and check_turso_auth() can be integrated here if needed)
-        # For simplicity, assuming Turso auth is handled externally by user for now.
-        # A basic auth check:
-        print_step(2, 6, "Verifying Turso CLI authentication...")
-        auth_output, auth_error, auth_code = run_command("turso auth status")
-        if auth_code != 0 or "You are not logged in" in auth_output or "not authenticated" in auth_output.lower():
-            print_error("Turso CLI authentication failed or you are not logged in.")
-            print_info(f"Please run: {Colors.BOLD}turso auth login{Colors.ENDC}")
-            sys.exit(1)
-        whoami_output, _, _ = run_command("turso auth whoami")
-        print_success(f"Turso CLI authentication verified (Logged in as: {Colors.CYAN}{whoami_output or 'user'}{Colors.ENDC}).")
+    if args.local:
+        print_step(1, 2, "Creating local database from the migrated template...")
+        started_at = time.monotonic()
+        template_path, built = ensure_local_template(find_project_root())
+        if built:
+            print_success(f"Built migrated template {Colors.CYAN}{template_path.name}{Colors.ENDC}.")
+        local_db = provision_local_database(template_path)
+        register_database(local_db["name"], local_db["url"], args.tag, args.ttl)
+        print_success(f"Local database '{Colors.CYAN}{local_db['name']}{Colors.ENDC}' created in {(time.monotonic() - started_at) * 1000:.0f}ms.")
+        sys.exit(0 if deliver_credentials(local_db["name"], local_db["url"], local_db["token"], args, step=(2, 2)) else 1)
+
+    if args.from_pool:
+        print_step(1, 2, "Taking a database from the warm pool...")
+        pooled_db = take_from_pool()
+        start_background_refill(args.pool_size, args.pool_ttl, args.concurrency)
+        if pooled_db:
+            print_success(f"Leased '{Colors.CYAN}{pooled_db['name']}{Colors.ENDC}' from the pool.")
+            register_database(pooled_db["name"], pooled_db["url"], args.tag, args.ttl)
+            sys.exit(0 if deliver_credentials(pooled_db["name"], pooled_db["url"], pooled_db["token"], args, step=(2, 2)) else 1)
+        print_warning("The pool is empty; creating a database the regular way.")
 
+    try:
+        if args.no_preflight:
+            print_info("Skipping preflight checks (--no-preflight).")
+        else:
+            preflight(check_clipboard=not args.no_clipboard) # Checks Turso CLI, auth and pyperclip
 
         print_step(3, 6, "Creating new Turso database...")
-        # Using retry_operation for robustness, assuming it's defined as in the original script
-        # For now, direct call:
-        create_output, create_error, create_code = run_command("turso db create", timeout=90) # Increased timeout
-        if create_code != 0:
-            print_error(f"Database creation failed: {create_error or 'Unknown error'}")
-            sys.exit(1)
-        
-        db_name_match = re.search(r'(?:Created database|Database)\s+([\w-]+)', create_output) # More flexible regex
-        if not db_name_match:
-            print_error("Could not extract database name from Turso output.")
-            print_info(f"Output: {create_output}")
-            sys.exit(1)
-        db_name = db_name_match.group(1)
+        db_name = create_database()
         print_success(f"Database '{Colors.CYAN}{db_name}{Colors.ENDC}' created successfully!")
-        save_last_generated_db(db_name)
+        register_database(db_name, tag=args.tag, ttl_hours=args.ttl) # Right away, so it is cleaned up even if the next steps fail
 
         print_step(4, 6, "Retrieving database connection details...")
-        show_output, show_error, show_code = run_command(f"turso db show {db_name}", timeout=60)
-        if show_code != 0:
-            print_error(f"Failed to get database details for {db_name}: {show_error}")
-            sys.exit(1)
-
-        url_match = re.search(r'URL:\s+(libsql://[\w.-]+)', show_output)
-        if not url_match:
-            print_error("Could not extract database URL from Turso output.")
-            print_info(f"Output: {show_output}")
-            sys.exit(1)
-        db_url = url_match.group(1)
+        db_url = get_database_url(db_name)
+        record_database_url(db_name, db_url)
         print_success("Database URL retrieved.")
 
         print_step(5, 6, "Generating authentication token...")
-        token_output, token_error, token_code = run_command(f"turso db tokens create {db_name}", timeout=60)
-        if token_code != 0:
-            print_error(f"Token creation failed for {db_name}: {token_error}")
-            sys.exit(1)
-        auth_token = token_output.strip() # Token is the direct output
-        if not auth_token or len(auth_token) < 10: # Basic sanity check for token
-            print_error("Generated token appears invalid or empty.")
-            print_info(f"Output: {token_output}")
-            sys.exit(1)
+        auth_token = create_auth_token(db_name)
         print_success("Authentication token generated.")
-        
-        new_vars = {"DB_URL": db_url, "AUTH_TOKEN": auth_token}
-        env_vars_string_for_clipboard = f"DB_URL={db_url}\nAUTH_TOKEN={auth_token}"
-
-        print_env_vars_box(db_url, auth_token, db_name)
-
-        print_step(6, 6, "Finalizing setup...")
-        if args.overwrite:
-            # Using a simplified version of original script's project root detection
-            project_root = Path.cwd() # Default to current directory
-            # Try to find a .git directory to define project root
-            current_dir_check = Path.cwd()
-            while current_dir_check != current_dir_check.parent: # Stop at system root
-                if (current_dir_check / ".git").is_dir():
-                    project_root = current_dir_check
-                    print_info(f"Project root identified at: {Colors.CYAN}{project_root}{Colors.ENDC}")
-                    break
-                current_dir_check = current_dir_check.parent
-            
-            env_file_path = project_root / args.overwrite
-            
-            # Simplified update/append logic (original script's update_env_file is more robust)
-            try:
-                # Ensure directory exists
-                env_file_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                mode = 'a' if env_file_path.exists() else 'w'
-                with open(env_file_path, mode) as f:
-                    if mode == 'a': f.write("\n\n# Turso Credentials (added by script)\n")
-                    else: f.write("# Turso Credentials (generated by script)\n")
-                    f.write(f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"DB_URL={db_url}\n")
-                    f.write(f"AUTH_TOKEN={auth_token}\n")
-                print_success(f"Environment variables {'appended to' if mode == 'a' else 'written to'} {Colors.CYAN}{env_file_path}{Colors.ENDC}")
-            except IOError as e:
-                print_error(f"Could not write to {env_file_path}: {e}")
-        else:
-            print_info(f"To save credentials to a file, use: {Colors.BOLD}--overwrite FILENAME{Colors.ENDC}")
 
-        if not args.no_clipboard:
-            try:
-                pyperclip.copy(env_vars_string_for_clipboard)
-                print_success("Environment variables copied to clipboard!")
-            except Exception as e: # Catch broader pyperclip errors
-                print_warning(f"Could not copy to clipboard: {e}")
-                print_info("You can manually copy the credentials from the box above.")
-        
-        print_footer(db_name)
+        if not deliver_credentials(db_name, db_url, auth_token, args, step=(6, 6)):
+            sys.exit(1)
 
+    except ProvisioningError as e:
+        print_error(str(e))
+        if e.output: print_info(f"Output: {e.output}")
+        sys.exit(1)
     except KeyboardInterrupt:
         print_error("\nOperation cancelled by user.")
         sys.exit(1)
@@ -558,4 +2140,12 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except SystemExit as e:
+        METRICS.finish("success" if not e.code else "failed")
+        raise
+    except BaseException:
+        METRICS.finish("failed")
+        raise
+    METRICS.finish("success")
@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+"""
+Shared scanning core for the project maintenance scripts (check-unused.py, cleanup-ui-imports.py).
+
+- walk_source_files(): the one directory walker, with the same exclusion rules for every tool.
+- tokenize_imports(): the one import tokenizer (static, side-effect, re-export, dynamic and require).
+- tokenize_asset_refs(): static asset references (url(), public/ paths, imported stylesheets and images).
+- tokenize_drizzle(): Drizzle table definitions and the table.column references in where/orderBy/join clauses.
+- tokenize_async(): calls made inside loops and iteration callbacks, and runs of independent awaits.
+- tokenize_fingerprint(): content fingerprints (exact hash and rolling-hash shingles) for duplicate detection.
+- ParseCache: an on-disk cache of per-file parse results keyed by size + mtime (and a content hash),
+  shared by the tools, so running them back to back in CI costs roughly one scan of the tree.
+  Each caller names the parsers it needs; results are cached per parser and the rest never run.
+
+The scripts have hyphenated file names, so they import this module from their own directory.
+"""
+
+import os
+import re
+import json
+import hashlib
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_EXCLUDE_DIRS = ["node_modules", ".next", ".git", "dist", "build"]
+DEFAULT_CACHE_FILE_NAME = ".project-scan-cache.json"
+PARSE_FORMAT_VERSION = 9 # Bump whenever a parser's output changes, so cached results are re-parsed
+PARALLEL_MIN_FILES = 32 # Below this, process start-up costs more than the parsing itself
+
+# --- Walker ---
+
+def is_test_path(file_path: str) -> bool:
+    """Files under __tests__ (or *.test / *.spec directories) are not meant to be imported."""
+    return any(part.startswith('__tests__') or part.endswith('.test') or part.endswith('.spec')
+               for part in file_path.split(os.sep))
+
+def walk_source_files(root_dir, extensions, exclude_dirs=DEFAULT_EXCLUDE_DIRS, skip_tests=False) -> List[Path]:
+    """All files under root_dir with one of the extensions (without dot), pruning excluded directories."""
+    extensions = {ext.lstrip('.') for ext in extensions}
+    exclude_dirs = set(exclude_dirs)
+    source_files = []
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        for file in files:
+            if file.rsplit('.', 1)[-1] in extensions:
+                file_path = os.path.join(root, file)
+                if not (skip_tests and is_test_path(file_path)):
+                    source_files.append(Path(file_path))
+    return source_files
+
+# --- Import tokenizer ---
+
+ImportRef = namedtuple("ImportRef", "kind specifier line names")
+
+# One pass over the whole file. Clauses may span lines (multi-line named imports). `import` is not
+# anchored to a word boundary so the tokenizer finds at least everything the scripts' rewrite regexes do.
+IMPORT_TOKEN_REGEX = re.compile(r"""
+    import\s+(?:type\s+)?(?P<clause>(?:[\w$*\s,]|\{[^}]*\})+?)\s*from\s*(?P<q1>['"])(?P<from_spec>[^'"\n]+)(?P=q1)
+  | import\s*(?P<q2>['"])(?P<side_spec>[^'"\n]+)(?P=q2)
+  | export\s+(?:type\s+)?(?P<export_clause>\*(?:\s+as\s+[\w$]+)?|\{[^}]*\})\s*from\s*(?P<q3>['"])(?P<export_spec>[^'"\n]+)(?P=q3)
+  | import\s*\(\s*(?P<q4>['"`])(?P<dynamic_spec>[^'"`\n]+)(?P=q4)\s*\)
+  | \brequire\s*\(\s*(?P<q5>['"])(?P<require_spec>[^'"\n]+)(?P=q5)\s*\)
+""", re.VERBOSE)
+
+def parse_import_clause(clause: str) -> List[str]:
+    """Imported names of an import/export clause: 'default', '*' or the exported name of each specifier."""
+    names = []
+    braces = re.search(r"\{([^}]*)\}", clause)
+    outside = re.sub(r"\{[^}]*\}", "", clause)
+    for part in outside.split(','):
+        part = part.strip()
+        if part.startswith('*'):
+            names.append('*')
+        elif part:
+            names.append('default')
+    if braces:
+        for spec in braces.group(1).split(','):
+            spec = spec.strip()
+            if spec.startswith("type "):
+                spec = spec[len("type "):].strip()
+            imported = spec.split(" as ")[0].strip()
+            if imported:
+                names.append(imported)
+    return names
+
+def tokenize_imports(content: str) -> List[ImportRef]:
+    """Every module reference in a file, in order, with its 1-based line number."""
+    refs = []
+    line, position = 1, 0
+    for match in IMPORT_TOKEN_REGEX.finditer(content):
+        line += content.count('\n', position, match.start())
+        position = match.start()
+        if match.group("from_spec"):
+            refs.append(ImportRef("import", match.group("from_spec"), line, parse_import_clause(match.group("clause"))))
+        elif match.group("side_spec"):
+            refs.append(ImportRef("side_effect", match.group("side_spec"), line, []))
+        elif match.group("export_spec"):
+            refs.append(ImportRef("export", match.group("export_spec"), line, parse_import_clause(match.group("export_clause"))))
+        elif match.group("dynamic_spec"):
+            refs.append(ImportRef("dynamic", match.group("dynamic_spec"), line, []))
+        else:
+            refs.append(ImportRef("require", match.group("require_spec"), line, []))
+    return refs
+
+def import_refs(parsed: Dict) -> List[ImportRef]:
+    """ImportRefs from a parse result (cached results hold them as plain lists)."""
+    return [ImportRef(*ref) for ref in parsed["imports"]]
+
+# --- Asset reference tokenizer ---
+
+AssetRef = namedtuple("AssetRef", "kind reference line")
+
+# Files that are bundled when a source file imports them (or a stylesheet url()s them)
+SOURCE_ASSET_EXTENSIONS = {
+    "css", "scss", "sass", "less",
+    "svg", "png", "jpg", "jpeg", "gif", "webp", "avif", "ico", "bmp",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3", "wav", "ogg",
+}
+
+# Stylesheet @imports (which may leave out the extension), url(...) in stylesheets and inline styles,
+# template literals that build a path from a root-relative prefix (`/images/${name}.png`), and quoted
+# strings that look like a file path. Overlapping forms are taken by the first alternative, so
+# url("/a.png") is one reference.
+ASSET_TOKEN_REGEX = re.compile(r"""
+    @import\s+(?:url\(\s*)?(?P<q0>['"])(?P<css_import>[^'"\s]+)(?P=q0)
+  | \burl\(\s*(?P<q1>['"]?)(?P<url>[^'"()\s]+)(?P=q1)\s*\)
+  | `(?P<prefix>/(?!/)[^`$\s?#]*/)\$\{
+  | (?P<q2>['"`])(?P<string>[^'"`\s$]+\.[A-Za-z0-9]+)(?:[?#][^'"`\s]*)?(?P=q2)
+""", re.VERBOSE)
+
+def is_asset_string(reference: str) -> bool:
+    """Root-relative paths with an extension (served from public/) or paths to a bundled asset type."""
+    if reference.startswith('/'):
+        return not reference.startswith('//')
+    return '://' not in reference and reference.rsplit('.', 1)[-1].lower() in SOURCE_ASSET_EXTENSIONS
+
+def tokenize_asset_refs(content: str) -> List[AssetRef]:
+    """Every static asset reference in a file (@import, url(), path prefixes and path strings) with its line number."""
+    refs = []
+    line, position = 1, 0
+    for match in ASSET_TOKEN_REGEX.finditer(content):
+        line += content.count('\n', position, match.start())
+        position = match.start()
+        if match.group("css_import"):
+            if '://' not in match.group("css_import"):
+                refs.append(AssetRef("css_import", match.group("css_import"), line))
+        elif match.group("url"):
+            url = match.group("url")
+            if not url.startswith(('#', 'data:', '$')) and '://' not in url:
+                refs.append(AssetRef("url", url, line))
+        elif match.group("prefix"):
+            refs.append(AssetRef("prefix", match.group("prefix"), line))
+        elif is_asset_string(match.group("string")):
+            refs.append(AssetRef("string", match.group("string"), line))
+    return refs
+
+def asset_refs(parsed: Dict) -> List[AssetRef]:
+    """AssetRefs from a parse result (cached results hold them as plain lists)."""
+    return [AssetRef(*ref) for ref in parsed["assets"]]
+
+# --- Drizzle tokenizer ---
+
+ColumnRef = namedtuple("ColumnRef", "table column context line statement")
+
+TABLE_DEFINITION_REGEX = re.compile(
+    r"""\bconst\s+(?P<var>[\w$]+)\s*=\s*(?P<builder>\w*Table)\s*\(\s*(?P<q>['"`])(?P<name>[^'"`]+)(?P=q)\s*,\s*\{""")
+LEADING_TRIVIA_REGEX = re.compile(r"(?:\s+|//[^\n]*|/\*.*?\*/)*", re.DOTALL)
+COLUMN_ENTRY_REGEX = re.compile(
+    r"""(?P<q1>['"]?)(?P<prop>[\w$]+)(?P=q1)\s*:\s*[\w$]+\s*\(\s*(?:(?P<q2>['"`])(?P<name>[^'"`]+)(?P=q2))?""")
+# index('x').on(t.a, t.b), uniqueIndex(...).on(...), unique().on(...), primaryKey({ columns: [t.a, t.b] })
+TABLE_INDEX_REGEX = re.compile(
+    r"""\b(?P<kind>uniqueIndex|index|unique|primaryKey)\s*\((?P<args>[^()]*)\)(?:\s*\.on\s*\((?P<on>[^()]*)\))?""")
+MEMBER_REGEX = re.compile(r"[\w$]+\.([\w$]+)")
+
+FILTER_OPERATORS = {
+    'eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'notLike', 'notIlike',
+    'inArray', 'notInArray', 'isNull', 'isNotNull', 'between', 'notBetween',
+}
+JOIN_METHODS = {'innerJoin', 'leftJoin', 'rightJoin', 'fullJoin'}
+ORDER_FUNCTIONS = {'asc', 'desc'}
+
+# Brackets are tracked so every table.column reference knows the query clause it sits in: .where()
+# and filter operators are "where", .orderBy()/asc()/desc() "order", and conditions inside a join "join".
+# Semicolons and closing block braces end a statement, which groups the references of one query.
+QUERY_TOKEN_REGEX = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")
+  | (?P<call>\.\s*(?:where|orderBy|innerJoin|leftJoin|rightJoin|fullJoin)\s*\(|\b(?:FILTERS|asc|desc)\s*\()
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<semicolon>;)
+  | \b(?P<member>[A-Za-z_$][\w$]*\.[A-Za-z_$][\w$]*)
+""".replace("FILTERS", "|".join(sorted(FILTER_OPERATORS))), re.VERBOSE | re.DOTALL)
+# Files that run queries, whose identifiers count as uses of the tables and columns they name
+QUERY_FILE_REGEX = re.compile(r"drizzle-orm|\b\w*[dD]b\s*\.")
+IDENTIFIER_REGEX = re.compile(r"[A-Za-z_$][\w$]*")
+
+def matching_bracket(content: str, open_index: int) -> int:
+    """Index of the bracket closing the one at open_index (skipping strings and comments), or -1."""
+    depth = 0
+    for match in QUERY_TOKEN_REGEX.finditer(content, open_index):
+        if match.group("open") or match.group("call"):
+            depth += 1
+        elif match.group("close"):
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    return -1
+
+def split_top_level(body: str) -> List[tuple]:
+    """(offset, text) of the comma-separated entries of an object or argument list body."""
+    entries, depth, start = [], 0, 0
+    for match in re.finditer(r"""//[^\n]*|/\*.*?\*/|'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`|[(\[{]|[)\]}]|,""", body, re.DOTALL):
+        token = match.group()
+        if token in '([{':
+            depth += 1
+        elif token in ')]}':
+            depth -= 1
+        elif token == ',' and depth == 0:
+            entries.append((start, body[start:match.start()]))
+            start = match.end()
+    entries.append((start, body[start:]))
+    return [(offset, text) for offset, text in entries if text.strip()]
+
+def tokenize_tables(content: str) -> List[Dict]:
+    """Drizzle table definitions: variable, table name, columns (with key flags) and declared indexes."""
+    tables = []
+    for match in TABLE_DEFINITION_REGEX.finditer(content):
+        columns_open = match.end() - 1
+        columns_close = matching_bracket(content, columns_open)
+        call_close = matching_bracket(content, content.index('(', match.start("builder")))
+        if columns_close < 0 or call_close < 0:
+            continue
+        columns = []
+        for offset, entry in split_top_level(content[columns_open + 1:columns_close]):
+            trivia = LEADING_TRIVIA_REGEX.match(entry).end() # Comments after the previous entry's comma
+            offset, entry = offset + trivia, entry[trivia:]
+            column = COLUMN_ENTRY_REGEX.match(entry)
+            if not column:
+                continue
+            flags = [flag for flag, call in (("primary", ".primaryKey("), ("unique", ".unique("), ("references", ".references("))
+                     if call in entry]
+            line = content.count('\n', 0, columns_open + 1 + offset) + 1
+            columns.append([column.group("prop"), column.group("name") or column.group("prop"), line, flags])
+        indexes = []
+        for index in TABLE_INDEX_REGEX.finditer(content, columns_close, call_close):
+            props = MEMBER_REGEX.findall(index.group("on") or index.group("args"))
+            if props:
+                indexes.append([index.group("kind"), props])
+        tables.append({
+            "var": match.group("var"), "name": match.group("name"), "builder": match.group("builder"),
+            "line": content.count('\n', 0, match.start()) + 1, "columns": columns, "indexes": indexes,
+        })
+    return tables
+
+def tokenize_column_refs(content: str) -> List[ColumnRef]:
+    """
+    table.column references inside where/orderBy/join clauses, with the clause, line number and the
+    index of the statement they are in (so the columns one query filters on can be grouped).
+    """
+    refs, stack = [], []
+    line, position, statement = 1, 0, 0
+    for match in QUERY_TOKEN_REGEX.finditer(content):
+        if match.group("call"):
+            callee = match.group("call").lstrip('.').strip().rstrip('(').strip()
+            if callee in ORDER_FUNCTIONS or callee == 'orderBy':
+                stack.append("order")
+            elif callee in JOIN_METHODS or (stack and stack[-1] == "join"):
+                stack.append("join")
+            else:
+                stack.append("where")
+        elif match.group("open"):
+            stack.append(stack[-1] if stack else None)
+        elif match.group("close"):
+            context = stack.pop() if stack else None
+            if match.group() == '}' and context is None:
+                statement += 1 # End of a block (or of an object literal outside any clause)
+        elif match.group("semicolon"):
+            statement += 1
+        elif match.group("member") and stack and stack[-1]:
+            line += content.count('\n', position, match.start())
+            position = match.start()
+            table, column = match.group("member").split('.')
+            refs.append(ColumnRef(table, column, stack[-1], line, statement))
+    return refs
+
+def tokenize_drizzle(content: str) -> Dict:
+    """Table definitions, clause-tagged column references and, for query files, every identifier used."""
+    is_query_file = QUERY_FILE_REGEX.search(content) is not None
+    return {
+        "tables": tokenize_tables(content) if 'Table(' in content else [],
+        "column_refs": tokenize_column_refs(content) if is_query_file else [],
+        "identifiers": sorted(set(IDENTIFIER_REGEX.findall(content))) if is_query_file else [],
+    }
+
+def column_refs(parsed: Dict) -> List[ColumnRef]:
+    """ColumnRefs from a parse result (cached results hold them as plain lists)."""
+    return [ColumnRef(*ref) for ref in parsed["drizzle"]["column_refs"]]
+
+# --- Async tokenizer (N+1 queries and await waterfalls) ---
+
+LoopCall = namedtuple("LoopCall", "line callee direct awaited loop loop_line depth")
+AwaitStep = namedtuple("AwaitStep", "line callee direct")
+
+# Receivers and methods of a database call: db.select(), tx.insert(), analyticsDb.query.x.findMany(), pool.query()
+DB_RECEIVER_REGEX = re.compile(r"^(?:db|tx|trx|pool|[\w$]*(?:Db|Pool))$")
+DB_METHODS = {'select', 'selectDistinct', 'insert', 'update', 'delete', 'query', 'execute', 'transaction', 'batch'}
+ITERATION_METHODS = {'map', 'flatMap', 'forEach', 'filter', 'reduce', 'some', 'every', 'find'}
+# Files without awaits or loops have nothing to report but their database call count, which a search finds
+ASYNC_HINT_REGEX = re.compile(r"\bawait\b|\b(?:for|while)\s*\(|\bdo\s*\{|\.\s*(?:%s)\s*\(" % "|".join(sorted(ITERATION_METHODS)))
+DB_CALL_REGEX = re.compile(r"(?<![\w$.])(?:db|tx|trx|pool|[\w$]*(?:Db|Pool))\s*\.\s*(?:%s)\s*[(.]" % "|".join(sorted(DB_METHODS)))
+NOT_CALLEES = {
+    'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'typeof', 'await', 'async', 'new', 'super', 'import',
+    'console', 'Math', 'JSON', 'Object', 'Array', 'Promise', 'String', 'Number', 'Boolean', 'Date', 'Error',
+    'Set', 'Map', 'parseInt', 'parseFloat', 'setTimeout', 'clearTimeout',
+}
+
+# Identifier chains are consumed whole (a.b?.c), with a flag group when they are called, and
+# .method( after a call or bracket is its own token, so `.map(` is found wherever it is chained.
+ASYNC_TOKEN_REGEX = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`)
+  | (?P<loop>\b(?:for|while)\s*(?:await\s*)?\()
+  | (?P<do>\bdo\s*\{)
+  | (?P<await>\bawait\b)
+  | (?P<chain>[A-Za-z_$][\w$]*(?:\s*\??\.\s*[A-Za-z_$][\w$]*)*)(?:\s*(?P<call>\())?
+  | (?P<member>\.\s*(?P<method>[A-Za-z_$][\w$]*))(?:\s*(?P<member_call>\())?
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<semicolon>;)
+""", re.VERBOSE | re.DOTALL)
+EXPRESSION_TOKEN_REGEX = re.compile(r"""//[^\n]*|/\*.*?\*/|'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`|[(\[{]|[)\]}]|;|\n""", re.DOTALL)
+CONTINUATION_CHARS = set('.?:+-*/&|,=)]}')
+NEXT_CHAR_REGEX = re.compile(r"\s*(\S)")
+DECLARATION_REGEX = re.compile(r"^\s*(?:export\s+)?(?:(?:const|let|var)\s+(?P<decl>.+?)|(?P<assign>[\w$.]+))\s*=\s*$")
+REFERENCE_REGEX = re.compile(r"(?<![\w$.])[A-Za-z_$][\w$]*") # Identifiers, not property names
+
+def call_chain(call_text: str) -> List[str]:
+    return [part.strip() for part in call_text.rstrip('(').replace('?', '').split('.')]
+
+def is_db_call(chain: List[str]) -> bool:
+    return len(chain) > 1 and DB_RECEIVER_REGEX.match(chain[0]) is not None and chain[1] in DB_METHODS
+
+def expression_end(content: str, start: int) -> int:
+    """End of the expression starting at start: a `;`, a line break that does not continue it, or its enclosing bracket."""
+    depth = 0
+    for match in EXPRESSION_TOKEN_REGEX.finditer(content, start):
+        token = match.group()
+        if token in '([{':
+            depth += 1
+        elif token in ')]}':
+            if depth == 0:
+                return match.start()
+            depth -= 1
+        elif depth == 0 and token == ';':
+            return match.start()
+        elif depth == 0 and token == '\n':
+            following = NEXT_CHAR_REGEX.match(content, match.end())
+            if not following or following.group(1) not in CONTINUATION_CHARS:
+                return match.start()
+    return len(content)
+
+def statement_start(content: str, position: int) -> int:
+    return max(content.rfind('\n', 0, position), content.rfind(';', 0, position)) + 1
+
+def find_waterfalls(content: str, awaits: List[Dict]) -> List[List[AwaitStep]]:
+    """
+    Runs of two or more awaited calls in the same block where no call, and no code between them,
+    uses a value an earlier call in the run produced, so they could run concurrently.
+    """
+    waterfalls, run, declared, previous = [], [], set(), None
+    for step in awaits:
+        prefix = content[statement_start(content, step["position"]):step["position"]]
+        declaration = DECLARATION_REGEX.match(prefix)
+        names = set()
+        if declaration:
+            names = set(REFERENCE_REGEX.findall(declaration.group("decl") or declaration.group("assign").split('.')[0]))
+        end = expression_end(content, step["position"] + len("await"))
+        references = set(REFERENCE_REGEX.findall(content, step["position"] + len("await"), end))
+        between = set(REFERENCE_REGEX.findall(content, previous["end"], statement_start(content, step["position"]))) if previous else set()
+        independent = (previous is not None and previous["block"] == step["block"]
+                       and not (references | between) & declared)
+        if not independent:
+            if len(run) > 1:
+                waterfalls.append(run)
+            run, declared = [], set()
+        run.append(AwaitStep(step["line"], step["callee"], step["direct"]))
+        declared |= names
+        previous = dict(step, end=end)
+    if len(run) > 1:
+        waterfalls.append(run)
+    return waterfalls
+
+def tokenize_async(content: str) -> Dict:
+    """Calls made inside loops and iteration callbacks, database call count, and sequential await runs."""
+    if not ASYNC_HINT_REGEX.search(content):
+        return {"db_calls": len(DB_CALL_REGEX.findall(content)), "loop_calls": [], "waterfalls": []}
+    loop_calls, awaits = [], []
+    db_calls = 0
+    stack = [{"loops": (), "brace": True, "start": -1}] # One frame per open bracket
+    pending_loop = None # (kind, line) of a loop whose body has not been opened yet
+    await_start = None # Position of an `await` that the next token belongs to
+    line, position = 1, 0
+    for match in ASYNC_TOKEN_REGEX.finditer(content):
+        kind = match.lastgroup
+        if kind in ("comment", "string"):
+            continue
+        line += content.count('\n', position, match.start())
+        position = match.start()
+        awaited_at, await_start = await_start, None
+        frame = stack[-1]
+        loops = frame["loops"] + ((pending_loop,) if pending_loop else ())
+        if kind == "loop":
+            loop = 'for' if match.group().startswith('for') else 'while'
+            stack.append({"loops": loops, "brace": False, "start": match.end(), "header": (loop, line)})
+        elif kind == "do":
+            stack.append({"loops": loops + (('do', line),), "brace": True, "start": match.end()})
+        elif kind == "await":
+            await_start = match.start()
+        elif kind == "call":
+            chain = call_chain(match.group("chain"))
+            awaited = awaited_at is not None
+            direct = is_db_call(chain)
+            db_calls += direct
+            if chain[0] not in NOT_CALLEES:
+                if loops:
+                    loop_calls.append(LoopCall(line, chain[0], direct, awaited, loops[-1][0], loops[-1][1], len(loops)))
+                if awaited and frame["brace"] and not loops:
+                    awaits.append({"position": awaited_at, "line": line, "callee": chain[0],
+                                   "direct": direct, "block": frame["start"]})
+            if chain[-1] in ITERATION_METHODS and len(chain) > 1:
+                loops = loops + ((chain[-1], line),)
+            stack.append({"loops": loops, "brace": False, "start": match.end()})
+        elif kind == "member_call":
+            if match.group("method") in ITERATION_METHODS:
+                loops = loops + ((match.group("method"), line),)
+            stack.append({"loops": loops, "brace": False, "start": match.end()})
+        elif kind == "open":
+            if match.group() == '{' and pending_loop:
+                stack.append({"loops": loops, "brace": True, "start": match.end()})
+                pending_loop = None
+            else:
+                stack.append({"loops": frame["loops"], "brace": match.group() == '{', "start": match.end()})
+        elif kind == "close":
+            if len(stack) > 1:
+                closed = stack.pop()
+                if "header" in closed:
+                    pending_loop = closed["header"]
+        elif kind == "semicolon" and frame["brace"]:
+            pending_loop = None
+    return {
+        "db_calls": db_calls,
+        "loop_calls": list(dict.fromkeys(loop_calls)),
+        "waterfalls": find_waterfalls(content, awaits),
+    }
+
+def loop_calls(parsed: Dict) -> List[LoopCall]:
+    """LoopCalls from a parse result (cached results hold them as plain lists)."""
+    return [LoopCall(*call) for call in parsed["async"]["loop_calls"]]
+
+def waterfalls(parsed: Dict) -> List[List[AwaitStep]]:
+    """Await runs from a parse result (cached results hold them as plain lists)."""
+    return [[AwaitStep(*step) for step in run] for run in parsed["async"]["waterfalls"]]
+
+# --- Fingerprint tokenizer (duplicate modules) ---
+
+SHINGLE_TOKENS = 10 # Tokens per shingle: about one line of code
+SHINGLE_SAMPLE = 4 # Keep shingles whose hash is 0 mod this; sampling by hash value keeps Jaccard estimates unbiased
+ROLLING_BASE = 1000003
+ROLLING_MODULUS = (1 << 61) - 1
+
+# Comments are dropped; strings are kept whole (with their quotes unified), everything else is a word or a punctuator
+FINGERPRINT_TOKEN_REGEX = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | '(?P<single>(?:\\.|[^'\\\n])*)'|"(?P<double>(?:\\.|[^"\\\n])*)"|(?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<word>[\w$]+)
+  | (?P<punct>[^\s\w$])
+""", re.VERBOSE | re.DOTALL)
+BINDING_NAME = r"[A-Za-z_$][\w$]*"
+# const/let/var declarations (names or destructuring patterns), named declarations and parameter lists
+VARIABLE_DECLARATION_REGEX = re.compile(rf"\b(?:const|let|var)\s+(?P<pattern>{BINDING_NAME}|\{{[^{{}}]*\}}|\[[^\[\]]*\])")
+NAMED_DECLARATION_REGEX = re.compile(rf"\b(?:function\s*\*?|class|interface|type|enum)\s+(?P<name>{BINDING_NAME})")
+PARAMETERS_REGEX = re.compile(rf"""
+    \b(?:function\s*\*?\s*(?:{BINDING_NAME})?\s*(?:<[^<>()]*>)?|catch)\s*\((?P<params>[^()]*)\)
+  | \((?P<arrow_params>[^()]*)\)\s*(?::\s*[^=;{{}}()]+)?=>
+  | (?<![\w$.])(?P<arrow_param>{BINDING_NAME})\s*=>
+""", re.VERBOSE)
+PATTERN_BINDING_REGEX = re.compile(rf"(?<![\w$.])({BINDING_NAME})(?![\w$])(?!\s*:)") # Not the keys of { key: name }
+PARAMETER_REGEX = re.compile(rf"^\s*(?:\.\.\.)?\s*(?:(?P<pattern>\{{[^{{}}]*\}}|\[[^\[\]]*\])|(?P<name>{BINDING_NAME}))")
+# Never taken for a binding of the file's own
+JS_KEYWORDS = {
+    "abstract", "as", "async", "await", "break", "case", "catch", "class", "const", "continue", "debugger",
+    "declare", "default", "delete", "do", "else", "enum", "export", "extends", "false", "finally", "for",
+    "from", "function", "if", "implements", "import", "in", "instanceof", "interface", "let", "new", "null",
+    "of", "private", "protected", "public", "readonly", "return", "static", "super", "switch", "this",
+    "throw", "true", "try", "type", "typeof", "undefined", "var", "void", "while", "with", "yield",
+}
+
+def rolling_shingles(token_hashes: List[int], size: int) -> List[int]:
+    """Rabin-Karp hash of every run of `size` consecutive tokens, each computed from the previous one in O(1)."""
+    if len(token_hashes) < size:
+        return []
+    high = pow(ROLLING_BASE, size - 1, ROLLING_MODULUS)
+    h = 0
+    for token in token_hashes[:size]:
+        h = (h * ROLLING_BASE + token) % ROLLING_MODULUS
+    hashes = [h]
+    for outgoing, incoming in zip(token_hashes, token_hashes[size:]):
+        h = ((h - outgoing * high) * ROLLING_BASE + incoming) % ROLLING_MODULUS
+        hashes.append(h)
+    return hashes
+
+def blank_literals(match) -> str:
+    if match.group("comment"):
+        return ' '
+    return '""' if match.lastgroup in ("single", "double", "template") else match.group()
+
+def pattern_bindings(pattern: str) -> List[str]:
+    """Names bound by a name or a destructuring pattern ({ a, b: c, ...rest } binds a, c and rest)."""
+    return PATTERN_BINDING_REGEX.findall(pattern.replace('...', ' '))
+
+def local_bindings(content: str) -> set:
+    """
+    Names a file declares itself (variables, functions, classes, types and parameters), including
+    any it imports under the same name. Approximate: parameter lists with nested parentheses are skipped.
+    """
+    code = FINGERPRINT_TOKEN_REGEX.sub(blank_literals, content) # No brackets or keywords from strings and comments
+    bindings = set()
+    for match in VARIABLE_DECLARATION_REGEX.finditer(code):
+        bindings.update(pattern_bindings(match.group("pattern")))
+    bindings.update(NAMED_DECLARATION_REGEX.findall(code))
+    for match in PARAMETERS_REGEX.finditer(code):
+        if match.group("arrow_param"):
+            bindings.add(match.group("arrow_param"))
+            continue
+        for _, parameter in split_top_level(match.group("params") or match.group("arrow_params") or ""):
+            binding = PARAMETER_REGEX.match(parameter)
+            if binding and binding.group("pattern"):
+                bindings.update(pattern_bindings(binding.group("pattern")))
+            elif binding:
+                bindings.add(binding.group("name"))
+    return bindings - JS_KEYWORDS
+
+def tokenize_fingerprint(content: str) -> Dict:
+    """
+    A hash of the code ignoring formatting and comments (exact duplicates), and sampled shingle hashes
+    of the token stream with the file's own bindings renamed to one placeholder (near duplicates).
+    Imported names, JSX tags, property names and literals stay as they are, so only copies that differ
+    in what they name locally match, not unrelated files that happen to have the same shape.
+    """
+    tokens = []
+    for match in FINGERPRINT_TOKEN_REGEX.finditer(content):
+        kind = match.lastgroup
+        if kind in ("single", "double"):
+            tokens.append('"' + match.group(kind) + '"') # 'a' and "a" are the same literal
+        elif kind == "comment" or match.group() == ';': # Semicolons are optional (automatic semicolon insertion)
+            continue
+        else:
+            tokens.append(match.group())
+    exact = hashlib.sha1("\0".join(tokens).encode("utf-8")).hexdigest()
+
+    imported = {name for match in IMPORT_TOKEN_REGEX.finditer(content) if match.group("clause")
+                for name in IDENTIFIER_REGEX.findall(match.group("clause"))}
+    bindings = local_bindings(content) - imported
+    def normalized(index, token):
+        previous, before = tokens[max(index - 1, 0)], tokens[max(index - 2, 0)]
+        is_member = index > 0 and previous == '.' and before != '.' # obj.name, but not ...name
+        is_tag = index > 0 and (previous == '<' or (previous == '/' and before == '<'))
+        return 'x' if token in bindings and not (is_member or is_tag) else token
+    token_hashes = [zlib.crc32(normalized(index, token).encode("utf-8")) for index, token in enumerate(tokens)]
+    shingles = {h // SHINGLE_SAMPLE & 0xFFFFFFFF for h in rolling_shingles(token_hashes, SHINGLE_TOKENS) if h % SHINGLE_SAMPLE == 0}
+    return {"exact": exact, "tokens": len(tokens), "shingles": sorted(shingles)}
+
+# What can be extracted from a file in its single read. Each parser takes the content and returns
+# JSON-serializable data; add new ones here (and bump PARSE_FORMAT_VERSION). Callers pass the names
+# they need as `kinds`, so e.g. the pre-commit import rewrite never runs the Drizzle or async scans.
+PARSERS = {
+    "imports": tokenize_imports,
+    "assets": tokenize_asset_refs,
+    "drizzle": tokenize_drizzle,
+    "async": tokenize_async,
+    "fingerprint": tokenize_fingerprint,
+}
+
+def parse_source(content: str, kinds=None) -> Dict:
+    """Results of the parsers named in kinds (all of them by default), keyed by parser name."""
+    return {name: PARSERS[name](content) for name in (kinds or PARSERS)}
+
+# --- Parse cache ---
+
+def content_digest(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+class ParseCache:
+    """
+    Parse results per file, relative to a root directory. An entry is reused when the file's size and
+    mtime match, or, after reading it, when its content hash matches (e.g. after a checkout). Entries
+    hold the results of whichever parsers have been requested for that content so far.
+    """
+    def __init__(self, root_dir, cache_path=None):
+        self.root_dir = Path(root_dir).resolve()
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.files = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.cache_path:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+                if cache.get("version") == PARSE_FORMAT_VERSION and cache.get("parsers") == sorted(PARSERS):
+                    self.files = cache.get("files", {})
+            except (IOError, ValueError):
+                pass # Missing or unreadable: start empty, it is only a cache
+
+    def key(self, file_path) -> str:
+        return Path(os.path.relpath(os.path.abspath(file_path), self.root_dir)).as_posix()
+
+    def missing(self, file_path, stat, kinds) -> List[str]:
+        """The parsers in kinds with no cached result for the file as it is now (all of them if it changed)."""
+        entry = self.files.get(self.key(file_path))
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return [kind for kind in kinds if kind not in entry["parse"]]
+        return list(kinds)
+
+    def lookup(self, file_path, stat, kinds=None) -> Optional[Dict]:
+        """Cached parse result if the file is unchanged since those parsers ran, else None (without reading it)."""
+        if self.missing(file_path, stat, kinds or PARSERS):
+            return None
+        self.hits += 1
+        return self.files[self.key(file_path)]["parse"]
+
+    def parse(self, file_path, stat, content: str, kinds=None) -> Dict:
+        """Parse result for content just read from file_path, reusing cached parser results if the content matches."""
+        kinds = kinds or PARSERS
+        digest = content_digest(content)
+        entry = self.files.get(self.key(file_path))
+        cached = entry["parse"] if entry and entry["sha1"] == digest else {}
+        missing = [kind for kind in kinds if kind not in cached]
+        if missing:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return self.store(file_path, stat, digest, parse_source(content, missing) if missing else {})
+
+    def store(self, file_path, stat, digest: str, parsed: Dict) -> Dict:
+        """Record parser results for a file; those of other parsers are kept if the content is the same. Returns all of them."""
+        key = self.key(file_path)
+        entry = self.files.get(key)
+        if entry and entry["sha1"] == digest:
+            parsed = {**entry["parse"], **parsed}
+        self.files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest, "parse": parsed}
+        self.dirty = True
+        return parsed
+
+    def save(self, prune=False):
+        """Write the cache atomically; with prune=True, entries of deleted files are dropped first."""
+        if not self.cache_path or not (self.dirty or prune):
+            return
+        if prune:
+            self.files = {key: entry for key, entry in self.files.items() if (self.root_dir / key).is_file()}
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # dumps() encodes in one C call; dump() streams through the pure-Python encoder
+                f.write(json.dumps({"version": PARSE_FORMAT_VERSION, "parsers": sorted(PARSERS), "files": self.files}, separators=(",", ":")))
+            os.replace(tmp_path, self.cache_path) # Another tool reading concurrently never sees a half-written file
+        except IOError:
+            pass
+        self.dirty = False
+
+# --- Scanning ---
+
+def parse_file(file_path: str, kinds=None):
+    """Read and parse one file (ProcessPoolExecutor worker). Returns (path, stat, sha1, parse) or (path, None, error, None)."""
+    try:
+        stat = os.stat(file_path) # Before reading: a later edit then still invalidates the entry
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except (IOError, UnicodeDecodeError) as e:
+        return file_path, None, str(e), None
+    return file_path, stat, content_digest(content), parse_source(content, kinds)
+
+def scan_files(root_dir, files, jobs=None, cache_path=None, prune=False, kinds=None):
+    """
+    Results of the parsers named in kinds (default: all) for files ({path: parse}), taken from the
+    cache where a file is unchanged. The rest are read and parsed in parallel (only the parsers the
+    cache lacks for an unchanged file), then written back to the cache.
+    Returns (results, cache, errors) where errors is {path: message} for unreadable files.
+    """
+    kinds = list(kinds or PARSERS)
+    cache = ParseCache(root_dir, cache_path)
+    results, misses, missing_kinds, errors = {}, [], [], {}
+    for file_path in files:
+        file_path = str(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            errors[file_path] = str(e)
+            continue
+        parsed = cache.lookup(file_path, stat, kinds)
+        if parsed is not None:
+            results[file_path] = parsed
+        else:
+            misses.append(file_path)
+            missing_kinds.append(cache.missing(file_path, stat, kinds))
+
+    if len(misses) >= PARALLEL_MIN_FILES and (jobs or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed_misses = list(executor.map(parse_file, misses, missing_kinds, chunksize=16))
+    else:
+        parsed_misses = [parse_file(file_path, missing) for file_path, missing in zip(misses, missing_kinds)]
+    for file_path, stat, digest, parsed in parsed_misses:
+        if stat is None:
+            errors[file_path] = digest
+            continue
+        cache.misses += 1
+        parsed = cache.store(file_path, stat, digest, parsed)
+        if any(kind not in parsed for kind in kinds): # Edited since it was stat'ed: parse it in full
+            file_path, stat, digest, parsed = parse_file(file_path, kinds)
+            if stat is None:
+                errors[file_path] = digest
+                continue
+            parsed = cache.store(file_path, stat, digest, parsed)
+        results[file_path] = parsed
+
+    cache.save(prune)
+    return results, cache, errors
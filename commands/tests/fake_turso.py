@@ -0,0 +1,62 @@
+"""
+Stand-in for the `turso` CLI used by the tests: keeps databases as files under $FAKE_TURSO_DIR.
+
+Supports the commands generate-turso-db.py runs (db create/show/list/destroy, db tokens create).
+Names listed in $FAKE_TURSO_FAIL (comma-separated) fail to be destroyed, and every destroy records
+how many destroys were running at the same time in destroy.log.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ORGANIZATION = "acme"
+DESTROY_SECONDS = 0.3 # Long enough for parallel destroys to overlap
+
+def main(argv):
+    state_dir = Path(os.environ["FAKE_TURSO_DIR"])
+    databases_dir = state_dir / "databases"
+    active_dir = state_dir / "active"
+    databases_dir.mkdir(parents=True, exist_ok=True)
+    active_dir.mkdir(exist_ok=True)
+    failing = set(filter(None, os.environ.get("FAKE_TURSO_FAIL", "").split(",")))
+
+    if argv[:2] == ["db", "create"]:
+        name = argv[2]
+        if (databases_dir / name).exists():
+            print(f"Error: database {name} already exists", file=sys.stderr)
+            return 1
+        (databases_dir / name).touch()
+        print(f"Created database {name} at group default in 0.42s.")
+    elif argv[:2] == ["db", "show"]:
+        name = argv[2]
+        if not (databases_dir / name).exists():
+            print(f"Error: database {name} not found", file=sys.stderr)
+            return 1
+        print(f"Name:           {name}\nURL:            libsql://{name}-{ORGANIZATION}.turso.io\nLocations:      ams")
+    elif argv[:3] == ["db", "tokens", "create"]:
+        print(f"jwt-{argv[3]}-" + "x" * 32)
+    elif argv[:2] == ["db", "list"]:
+        print(json.dumps({"databases": [{"Name": path.name, "Region": "ams"} for path in sorted(databases_dir.iterdir())]}))
+    elif argv[:2] == ["db", "destroy"]:
+        name = argv[2]
+        marker = active_dir / name
+        marker.touch()
+        time.sleep(DESTROY_SECONDS)
+        with open(state_dir / "destroy.log", "a") as log:
+            log.write(f"{name} {len(list(active_dir.iterdir()))}\n")
+        marker.unlink()
+        if name in failing or not (databases_dir / name).exists():
+            print(f"Error: could not destroy database {name}", file=sys.stderr)
+            return 1
+        (databases_dir / name).unlink()
+        print(f"Destroyed database {name}.")
+    else:
+        print(f"Error: unsupported command: {' '.join(argv)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""
+Tests for check-unused.py --duplicates on small temporary source trees.
+
+Run from the repository root with: python -m pytest commands/tests
+"""
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "check-unused.py"
+
+AVATAR = """'use client';
+
+import * as React from 'react';
+import * as AvatarPrimitive from '@radix-ui/react-avatar';
+
+import { cn } from '@/shared/utilities';
+
+function Avatar({ className, ...props }: React.ComponentProps<typeof AvatarPrimitive.Root>) {
+  return (
+    <AvatarPrimitive.Root
+      data-slot="avatar"
+      className={cn('relative flex size-8 shrink-0 overflow-hidden rounded-full', className)}
+      {...props}
+    />
+  );
+}
+
+function AvatarImage({ className, ...props }: React.ComponentProps<typeof AvatarPrimitive.Image>) {
+  return (
+    <AvatarPrimitive.Image data-slot="avatar-image" className={cn('aspect-square size-full', className)} {...props} />
+  );
+}
+
+export { Avatar, AvatarImage };
+"""
+
+# Same shape, different library, parts, slots and classes
+TABS = """"use client"
+
+import * as React from "react"
+import * as TabsPrimitive from "@radix-ui/react-tabs"
+
+import { cn } from "@/shared/utilities"
+
+function Tabs({ className, ...props }: React.ComponentProps<typeof TabsPrimitive.Root>) {
+  return (
+    <TabsPrimitive.Root
+      data-slot="tabs"
+      className={cn("flex flex-col gap-2", className)}
+      {...props}
+    />
+  )
+}
+
+function TabsList({ className, ...props }: React.ComponentProps<typeof TabsPrimitive.List>) {
+  return (
+    <TabsPrimitive.List data-slot="tabs-list" className={cn("bg-muted inline-flex h-9 rounded-lg", className)} {...props} />
+  )
+}
+
+export { Tabs, TabsList }
+"""
+
+# AVATAR with only its own names changed
+RENAMED_AVATAR = (AVATAR.replace("AvatarImage", "ProfilePicture").replace("Avatar(", "UserBadge(").replace("Avatar,", "UserBadge,")
+                  .replace("props", "rest"))
+
+class DuplicateModulesTest(unittest.TestCase):
+    def find_duplicates(self, files):
+        with tempfile.TemporaryDirectory() as root:
+            for name, content in files.items():
+                (Path(root) / name).write_text(content)
+            result = subprocess.run([sys.executable, str(SCRIPT), "--duplicates", "--dir", root, "--no-cache", "--no-history"],
+                                    capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_unrelated_components_with_the_same_shape_are_not_flagged(self):
+        output = self.find_duplicates({"avatar.tsx": AVATAR, "tabs.tsx": TABS})
+        self.assertIn("Near-duplicate clusters: 0", output)
+        self.assertIn("Exact duplicate groups: 0", output)
+
+    def test_copy_with_renamed_local_names_is_flagged(self):
+        output = self.find_duplicates({"avatar.tsx": AVATAR, "user-badge.tsx": RENAMED_AVATAR})
+        self.assertIn("Near-duplicate clusters: 1", output)
+        self.assertIn("100%", output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Tests for the Turso Platform API client of generate-turso-db.py, against a local stand-in HTTP server.
+
+Run from the repository root with: python -m pytest commands/tests
+"""
+
+import importlib.util
+import json
+import re
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "generate-turso-db.py"
+spec = importlib.util.spec_from_file_location("generate_turso_db", SCRIPT)
+turso = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(turso)
+
+API_TOKEN = "test-token"
+ORGANIZATION = "acme"
+DATABASE_PATH = re.compile(rf"^/v1/organizations/{ORGANIZATION}/databases(?:/(?P<name>[\w-]+))?(?P<tokens>/auth/tokens)?$")
+
+class FakeTursoApi(ThreadingHTTPServer):
+    """Keeps databases in memory. `failures` holds (method, status, apply) to answer the next matching request with."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeTursoHandler)
+        self.databases = {}
+        self.failures = []
+        self.connections = 0
+        self.close_after_response = False # Close keep-alive connections as soon as a response is sent
+
+class FakeTursoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.server.close_after_response:
+            self.close_connection = True # Without a 'Connection: close' header, like an idle timeout
+
+    def handle_api(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length)) if length else {}
+        if self.headers.get("Authorization") != f"Bearer {API_TOKEN}":
+            return self.respond(401, {"error": "unauthorized"})
+        match = DATABASE_PATH.match(self.path)
+        if not match:
+            return self.respond(404, {"error": "not found"})
+
+        failure = next((f for f in self.server.failures if f[0] == method), None)
+        if failure:
+            self.server.failures.remove(failure)
+            _, status, apply = failure
+            if not apply:
+                return self.respond(status, {"error": "unavailable"})
+
+        name, databases = match.group("name"), self.server.databases
+        if method == "POST" and not name:
+            if payload["name"] in databases:
+                return self.respond(409, {"error": "database already exists"})
+            databases[payload["name"]] = {"Name": payload["name"], "Hostname": f"{payload['name']}-{ORGANIZATION}.turso.io",
+                                          "group": payload["group"], "primaryRegion": "ams"}
+            result = (200, {"database": databases[payload["name"]]})
+        elif method == "GET" and not name:
+            result = (200, {"databases": list(databases.values())})
+        elif name not in databases:
+            result = (404, {"error": "database not found"})
+        elif method == "GET":
+            result = (200, {"database": databases[name]})
+        elif method == "POST" and match.group("tokens"):
+            result = (200, {"jwt": f"jwt-{name}-" + "x" * 32})
+        elif method == "DELETE":
+            result = (200, {"database": databases.pop(name)})
+        else:
+            result = (405, {"error": "method not allowed"})
+        if failure: # The request went through, but the client only sees the failure
+            result = (failure[1], {"error": "unavailable"})
+        self.respond(*result)
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def do_DELETE(self):
+        self.handle_api("DELETE")
+
+class TursoApiClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeTursoApi()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = turso.TursoApiClient(API_TOKEN, ORGANIZATION, base_url=f"http://127.0.0.1:{self.server.server_port}", timeout=5)
+        self.saved = (turso.API_CLIENT, turso.RETRY_BASE_DELAY)
+        turso.API_CLIENT, turso.RETRY_BASE_DELAY = self.client, 0 # Retry without sleeping
+
+    def tearDown(self):
+        turso.API_CLIENT, turso.RETRY_BASE_DELAY = self.saved
+        self.client.connection().close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_create_show_token_list_destroy(self):
+        self.client.create_database("db-test")
+        self.assertEqual(self.client.get_database_url("db-test"), f"libsql://db-test-{ORGANIZATION}.turso.io")
+        self.assertTrue(self.client.create_auth_token("db-test").startswith("jwt-db-test-"))
+        self.assertEqual([db["Name"] for db in self.client.list_databases()], ["db-test"])
+        self.assertEqual(self.client.list_databases()[0]["Region"], "ams")
+        self.client.destroy_database("db-test")
+        self.assertEqual(self.client.list_databases(), [])
+        self.assertEqual(self.server.connections, 1) # Every request reused the keep-alive connection
+
+    def test_error_kinds(self):
+        with self.assertRaises(turso.ProvisioningError) as missing:
+            self.client.get_database_url("db-missing")
+        self.assertEqual(missing.exception.kind, "not_found")
+        self.client.api_token = "wrong"
+        with self.assertRaises(turso.ProvisioningError) as unauthorized:
+            self.client.list_databases()
+        self.assertEqual(unauthorized.exception.kind, "auth")
+
+    def test_reconnects_when_the_server_closed_the_connection(self):
+        self.server.close_after_response = True
+        self.client.create_database("db-test")
+        self.assertEqual(self.client.get_database_url("db-test"), f"libsql://db-test-{ORGANIZATION}.turso.io")
+        self.assertEqual(self.server.connections, 2)
+
+    def test_create_retries_on_503(self):
+        self.server.failures.append(("POST", 503, False))
+        db_name = turso.create_database()
+        self.assertEqual(list(self.server.databases), [db_name])
+
+    def test_create_adopts_a_database_created_before_a_failed_response(self):
+        self.server.failures.append(("POST", 503, True))
+        db_name = turso.create_database()
+        self.assertEqual(list(self.server.databases), [db_name]) # No second database for the retry
+
+if __name__ == "__main__":
+    unittest.main()
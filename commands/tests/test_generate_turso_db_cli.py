@@ -0,0 +1,129 @@
+"""
+End-to-end tests of generate-turso-db.py's CLI backend, with fake_turso.py as `turso` on PATH and HOME
+pointing at a temporary directory (for the registry, pool and listing cache).
+
+Run from the repository root with: python -m pytest commands/tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent
+SCRIPT = TESTS_DIR.parent / "generate-turso-db.py"
+FAKE_TURSO = TESTS_DIR / "fake_turso.py"
+
+class FakeTursoCliTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.home = self.root / "home"
+        self.state_dir = self.root / "turso"
+        bin_dir = self.root / "bin"
+        for directory in (self.home, self.state_dir / "databases", bin_dir):
+            directory.mkdir(parents=True)
+        turso = bin_dir / "turso"
+        turso.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TURSO}" "$@"\n')
+        turso.chmod(0o755)
+
+        self.env = {key: value for key, value in os.environ.items() if key not in ("TURSO_API_TOKEN", "TURSO_ORG")}
+        self.env.update(HOME=str(self.home), PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}", FAKE_TURSO_DIR=str(self.state_dir))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_script(self, *args, fail=()):
+        env = dict(self.env, FAKE_TURSO_FAIL=",".join(fail))
+        return subprocess.run([sys.executable, str(SCRIPT), "--backend", "cli", *args], cwd=self.root, env=env,
+                              capture_output=True, text=True, timeout=120)
+
+    def remote_databases(self):
+        return sorted(path.name for path in (self.state_dir / "databases").iterdir())
+
+    def registry_names(self):
+        registry = json.loads((self.home / ".turso_gen_registry.json").read_text())
+        return sorted(db["name"] for db in registry["databases"])
+
+    def destroy_log(self):
+        lines = (self.state_dir / "destroy.log").read_text().split()
+        return dict(zip(lines[::2], map(int, lines[1::2]))) # name -> destroys running at the same time
+
+    def add_databases(self, names, registered=True):
+        for name in names:
+            (self.state_dir / "databases" / name).touch()
+        if registered:
+            registry_path = self.home / ".turso_gen_registry.json"
+            registry = json.loads(registry_path.read_text()) if registry_path.exists() else {"databases": []}
+            registry["databases"].extend({
+                "name": name, "url": f"libsql://{name}-acme.turso.io", "owner": "tester", "host": "ci", "tag": None,
+                "ttl_hours": None, "created_at": "2026-01-01T00:00:00",
+            } for name in names)
+            registry_path.write_text(json.dumps(registry))
+
+class DeleteDatabasesTest(FakeTursoCliTest):
+    def test_parallel_deletion_with_failures(self):
+        names = [f"db-test-{i}" for i in range(1, 7)]
+        self.add_databases(names + ["db-other"])
+        result = self.run_script("--delete-matching", "--match", "db-test-*", "--yes", "--concurrency", "2",
+                                 fail=("db-test-2", "db-test-5"))
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("2 DELETION(S) FAILED", result.stdout)
+        self.assertIn("db-test-2", result.stdout.split("DELETION(S) FAILED")[1])
+        self.assertIn("db-test-5", result.stdout.split("DELETION(S) FAILED")[1])
+        self.assertEqual(self.remote_databases(), ["db-other", "db-test-2", "db-test-5"])
+        # Only the databases that were actually destroyed leave the registry
+        self.assertEqual(self.registry_names(), ["db-other", "db-test-2", "db-test-5"])
+        running = self.destroy_log()
+        self.assertEqual(sorted(running), names)
+        self.assertEqual(max(running.values()), 2) # Overlapping, but never more than --concurrency
+
+    def test_listed_local_prefix_goes_to_the_cli(self):
+        # A remote database that merely looks like a local one must still be destroyed remotely
+        self.add_databases(["local-remote-x"], registered=False)
+        result = self.run_script("--delete-matching", "--match", "local-remote-*", "--yes")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertEqual(self.remote_databases(), [])
+
+class BatchProvisioningTest(FakeTursoCliTest):
+    def test_batch_and_teardown(self):
+        manifest_path, env_dir = self.root / "batch.json", self.root / "env"
+        result = self.run_script("--batch", "3", "--batch-output", str(manifest_path), "--batch-env-dir", str(env_dir))
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+        manifest = json.loads(manifest_path.read_text())
+        databases = manifest["databases"]
+        names = sorted(db["name"] for db in databases)
+        self.assertEqual([db["worker"] for db in databases], [1, 2, 3])
+        self.assertEqual(self.remote_databases(), names)
+        for db in databases:
+            self.assertEqual(db["url"], f"libsql://{db['name']}-acme.turso.io")
+            self.assertTrue(db["token"].startswith(f"jwt-{db['name']}-"))
+        self.assertEqual(manifest["env_files"], [str(env_dir / f".env.worker-{worker}") for worker in (1, 2, 3)])
+        env_file = Path(manifest["env_files"][0]).read_text()
+        self.assertIn(f"DB_URL={databases[0]['url']}\n", env_file)
+        self.assertIn(f"TURSO_AUTH_TOKEN={databases[0]['token']}\n", env_file)
+        registry = json.loads((self.home / ".turso_gen_registry.json").read_text())
+        self.assertEqual({db["name"]: db["url"] for db in registry["databases"]}, {db["name"]: db["url"] for db in databases})
+
+        # A partial failure keeps only what is left, so the teardown can be rerun
+        failed = databases[0]["name"]
+        result = self.run_script("--batch-teardown", str(manifest_path), fail=(failed,))
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual([db["name"] for db in json.loads(manifest_path.read_text())["databases"]], [failed])
+        self.assertEqual(self.remote_databases(), [failed])
+        self.assertEqual(self.registry_names(), [failed])
+
+        result = self.run_script("--batch-teardown", str(manifest_path))
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertFalse(manifest_path.exists())
+        self.assertEqual(list(env_dir.iterdir()), [])
+        self.assertEqual(self.remote_databases(), [])
+        self.assertEqual(self.registry_names(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Tests for the migrate/seed pipeline of generate-turso-db.py, against local SQLite files.
+
+Run from the repository root with: python -m pytest commands/tests
+"""
+
+import importlib.util
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "generate-turso-db.py"
+spec = importlib.util.spec_from_file_location("generate_turso_db", SCRIPT)
+turso = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(turso)
+
+DRIZZLE_CONFIG = "export default defineConfig({ out: './migrations', schema: './schema.ts', dialect: 'turso' });\n"
+
+class LocalDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.db_url = f"file:{self.root / 'test.db'}"
+        self.connection = sqlite3.connect(self.db_url, uri=True)
+
+    def tearDown(self):
+        self.connection.close()
+        self.temp_dir.cleanup()
+
+    def write_file(self, relative_path, content):
+        path = self.root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+class MigrateDatabaseTest(LocalDatabaseTest):
+    def add_migration(self, tag, sql):
+        journal_path = self.root / "migrations" / "meta" / "_journal.json"
+        journal = json.loads(journal_path.read_text()) if journal_path.exists() else {"entries": []}
+        journal["entries"].append({"idx": len(journal["entries"]), "tag": tag, "when": 1700000000000 + len(journal["entries"])})
+        self.write_file(f"migrations/{tag}.sql", sql)
+        self.write_file("migrations/meta/_journal.json", json.dumps(journal))
+
+    def test_skips_already_recorded_migrations(self):
+        self.write_file("drizzle.config.ts", DRIZZLE_CONFIG)
+        self.add_migration("0000_users", "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);")
+        self.add_migration("0001_posts", "CREATE TABLE posts (id INTEGER PRIMARY KEY);\n--> statement-breakpoint\nCREATE INDEX posts_id ON posts (id);")
+        self.assertEqual(turso.migrate_database(self.connection, self.root), (2, 2))
+
+        self.add_migration("0002_users_email", "ALTER TABLE users ADD COLUMN email TEXT;")
+        self.assertEqual(turso.migrate_database(self.connection, self.root), (1, 3)) # Re-running 0000 would fail
+        self.assertEqual(turso.migrate_database(self.connection, self.root), (0, 3))
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(users)").fetchall()]
+        self.assertEqual(columns, ["id", "name", "email"])
+        self.assertEqual(self.connection.execute('SELECT COUNT(*) FROM "__drizzle_migrations"').fetchone(), (3,))
+
+class InsertStatementsTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = turso.SEED_MAX_VARIABLES
+        turso.SEED_MAX_VARIABLES = 6
+
+    def tearDown(self):
+        turso.SEED_MAX_VARIABLES = self.saved
+
+    def test_splits_at_the_variable_limit(self):
+        rows = [{"id": i, "name": f"user {i}"} for i in range(7)]
+        statements = list(turso.insert_statements("users", rows))
+        self.assertEqual([row_count for _, _, row_count in statements], [3, 3, 1])
+        sql, params, _ = statements[0]
+        self.assertEqual(sql, 'INSERT INTO "users" ("id", "name") VALUES (?, ?), (?, ?), (?, ?)')
+        self.assertEqual(params, [0, "user 0", 1, "user 1", 2, "user 2"])
+
+    def test_splits_when_the_columns_change(self):
+        rows = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3}, {}, {"id": 4, "name": "d"}]
+        statements = list(turso.insert_statements("users", rows))
+        self.assertEqual([(sql.split(" VALUES ")[0], row_count) for sql, _, row_count in statements], [
+            ('INSERT INTO "users" ("id", "name")', 2),
+            ('INSERT INTO "users" ("id")', 1),
+            ('INSERT INTO "users" DEFAULT VALUES', 1),
+            ('INSERT INTO "users" ("id", "name")', 1),
+        ])
+
+class SeedDatabaseTest(LocalDatabaseTest):
+    def setUp(self):
+        super().setUp()
+        self.connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, meta TEXT)")
+        self.connection.execute("CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT)")
+        self.connection.commit()
+
+    def test_seeds_json_and_csv(self):
+        self.write_file("seed/users.json", json.dumps([{"id": 1, "name": "Ada", "meta": {"admin": True}}, {"id": 2, "name": "Linus"}]))
+        self.write_file("seed/posts.csv", "id,title\n1,Hello\n2,World\n")
+        self.write_file("extra.json", json.dumps({"posts": [{"id": 3, "title": "Again"}]}))
+        rows, _ = turso.seed_database(self.connection, [self.root / "seed", self.root / "extra.json"])
+
+        self.assertEqual(rows, 5)
+        self.assertEqual(self.connection.execute("SELECT id, name, meta FROM users ORDER BY id").fetchall(),
+                         [(1, "Ada", '{"admin": true}'), (2, "Linus", None)])
+        self.assertEqual(self.connection.execute("SELECT id, title FROM posts ORDER BY id").fetchall(),
+                         [(1, "Hello"), (2, "World"), (3, "Again")])
+
+    def test_malformed_rows_are_provisioning_errors(self):
+        for name, content in [("users.json", "[1, 2]"), ("users.csv", "id,name\n1,Ada,extra\n"), ("tables.json", '{"users": 5}')]:
+            seed_path = self.write_file(f"bad/{name}", content)
+            with self.subTest(name), self.assertRaises(turso.ProvisioningError):
+                turso.prepare_database(self.db_url, None, seed_paths=[seed_path])
+
+class ProbeDatabaseTest(LocalDatabaseTest):
+    def test_report_shape_and_cleanup(self):
+        report = turso.probe_database(self.db_url, None, operations=40, write_ratio=0.5, concurrency=2)
+
+        self.assertEqual(report["url"], self.db_url)
+        self.assertEqual(report["operations"], 40)
+        self.assertEqual(report["concurrency"], 2)
+        self.assertGreater(report["ops_per_second"], 0)
+        self.assertEqual(report["connect_ms"]["count"], 2) # One connection per worker
+        latency = report["latency_ms"]
+        self.assertEqual(latency["read"]["count"] + latency["write"]["count"], latency["all"]["count"])
+        for summary in latency.values():
+            self.assertLessEqual(summary["p50"], summary["p95"])
+            self.assertLessEqual(summary["p95"], summary["p99"])
+            self.assertLessEqual(summary["p99"], summary["max"])
+        self.assertIsNone(self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (turso.PROBE_TABLE,)).fetchone())
+
+    def test_write_only_workload_has_no_read_summary(self):
+        report = turso.probe_database(self.db_url, None, operations=5, write_ratio=1.0)
+        self.assertIsNone(report["latency_ms"]["read"])
+        self.assertEqual(report["latency_ms"]["write"]["count"], 5)
+
+if __name__ == "__main__":
+    unittest.main()